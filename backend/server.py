@@ -1,8 +1,10 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, Form, Depends, HTTPException, status
-from fastapi.responses import FileResponse, Response
+from fastapi import FastAPI, APIRouter, UploadFile, File, Form, Depends, Header, HTTPException, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from bson import ObjectId
 import os
 import logging
 from pathlib import Path
@@ -17,6 +19,9 @@ import json
 import aiofiles
 import re
 import base64
+import time
+import hashlib
+from collections import OrderedDict
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -58,6 +63,9 @@ ALLOWED_EXTENSIONS = {
 
 # LLM Config
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY', '')
+LLM_MODEL = "gpt-5.2"
+# Universal keys are served by the integrations proxy, which speaks the OpenAI API
+INTEGRATION_PROXY_URL = os.environ.get('INTEGRATION_PROXY_URL', 'https://integrations.emergentagent.com')
 
 # OpenAI Config for embeddings (separate from Emergent key which doesn't support embeddings)
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
@@ -147,20 +155,80 @@ def chunk_text(text: str, chunk_size: int = EMBEDDING_CHUNK_SIZE, overlap: int =
         start += chunk_size - overlap
     return chunks
 
+# Short-lived memo for status endpoints the UI polls: key -> (expires_at, value)
+POLL_MEMO_TTL_SECONDS = 5
+poll_memo: Dict[str, tuple] = {}
+
+def poll_memo_get(key: str):
+    cached = poll_memo.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+def poll_memo_set(key: str, value):
+    now = time.monotonic()
+    if len(poll_memo) >= 1000:
+        for k in [k for k, v in poll_memo.items() if v[0] <= now]:
+            poll_memo.pop(k, None)
+    poll_memo[key] = (now + POLL_MEMO_TTL_SECONDS, value)
+
+# In-process pub/sub feeding /api/events: user_id -> set of subscriber queues
+EVENT_QUEUE_SIZE = 100
+event_subscribers: Dict[str, set] = {}
+
+def offer_event(queue, message: dict):
+    """Queue a message for one stream without blocking"""
+    import asyncio
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # Slow consumer - evict its oldest event so the newest state (e.g. a task's
+        # completed/failed event) always gets through
+        queue.get_nowait()
+        queue.put_nowait(message)
+
+def publish_event(user_id: Optional[str], event: str, data: dict):
+    """Push an event to every open /api/events stream of a user (never blocks)"""
+    if not user_id:
+        return
+    for queue in list(event_subscribers.get(user_id, ())):
+        offer_event(queue, {"event": event, "data": data})
+
+def task_event_data(task_id: str, task: dict) -> dict:
+    """A background task's progress in the same shape its progress endpoint returns"""
+    return {"task_id": task_id, **{k: v for k, v in task.items() if k != "user_id"}}
+
+def publish_task_event(event: str, task_id: str, task: dict):
+    publish_event(task.get("user_id"), event, task_event_data(task_id, task))
+
+async def set_embedding_status(file_id: str, status: str, error: Optional[str] = None, **fields):
+    """Record a file's embedding status transition, drop memoized status summaries
+    and notify the owner's event streams"""
+    file_doc = await db.files.find_one_and_update(
+        {"id": file_id},
+        {"$set": {"embedding_status": status, "embedding_error": error, **fields}},
+        projection={"_id": 0, "id": 1, "user_id": 1, "original_filename": 1, "file_type": 1,
+                    "embedding_status": 1, "embedding_count": 1, "embedding_error": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    poll_memo.clear()
+    if file_doc:
+        publish_event(file_doc.pop("user_id", None), "file_status", file_doc)
+
 async def process_file_embeddings(file_id: str, content_text: str, filename: str, tags: List[str]):
     """Process and store embeddings for a file's content using batch embedding for efficiency"""
     if not content_text and not tags:
         logger.info(f"No content to embed for file {file_id}")
-        await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "skipped", "embedding_error": "No text content to embed"}})
+        await set_embedding_status(file_id, "skipped", "No text content to embed", embedding_count=0)
         return
     
     if not openai_client:
         logger.warning(f"OpenAI client not configured, skipping embeddings for {file_id}")
-        await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "disabled", "embedding_error": "AI service not configured"}})
+        await set_embedding_status(file_id, "disabled", "AI service not configured")
         return
     
     # Mark as processing
-    await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "processing", "embedding_error": None}})
+    await set_embedding_status(file_id, "processing")
     
     try:
         # Combine content with metadata for richer embeddings
@@ -170,7 +238,7 @@ async def process_file_embeddings(file_id: str, content_text: str, filename: str
         chunks = chunk_text(full_text)
         if not chunks:
             logger.info(f"No chunks created for file {file_id}")
-            await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "skipped", "embedding_error": "No text content to embed"}})
+            await set_embedding_status(file_id, "skipped", "No text content to embed", embedding_count=0)
             return
         
         logger.info(f"Processing {len(chunks)} chunks for file {file_id}")
@@ -204,15 +272,12 @@ async def process_file_embeddings(file_id: str, content_text: str, filename: str
             await db.embeddings.delete_many({"file_id": file_id})
             # Insert new embeddings
             await db.embeddings.insert_many(embeddings_docs)
+            invalidate_project_index(file_id)
             logger.info(f"Created {len(embeddings_docs)} embeddings for file {file_id} ({filename})")
-            await db.files.update_one({"id": file_id}, {"$set": {
-                "embedding_status": "completed",
-                "embedding_count": len(embeddings_docs),
-                "embedding_error": None
-            }})
+            await set_embedding_status(file_id, "completed", embedding_count=len(embeddings_docs))
         else:
             logger.warning(f"No embeddings generated for file {file_id}")
-            await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "failed", "embedding_error": "Embedding failed — check API key configuration"}})
+            await set_embedding_status(file_id, "failed", "Embedding failed — check API key configuration", embedding_count=0)
             
     except Exception as e:
         logger.error(f"Error processing embeddings for {file_id}: {e}", exc_info=True)
@@ -225,10 +290,41 @@ async def process_file_embeddings(file_id: str, content_text: str, filename: str
             reason = "Request timed out — try again"
         else:
             reason = "Unexpected error during embedding"
-        await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "failed", "embedding_error": reason}})
+        await set_embedding_status(file_id, "failed", reason, embedding_count=0)
+
+# Concurrent identical calls (same operation, normalized inputs and scope) share one
+# in-flight task instead of each embedding, scanning and generating on its own
+inflight_calls: Dict[tuple, "asyncio.Task"] = {}
+
+async def singleflight(key: tuple, factory):
+    """Await factory() once for every concurrent caller with the same key"""
+    import asyncio
+    task = inflight_calls.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        inflight_calls[key] = task
+
+        def forget(done):
+            if inflight_calls.get(key) is done:
+                del inflight_calls[key]
+            if not done.cancelled():
+                done.exception()  # retrieved here in case every caller went away
+
+        task.add_done_callback(forget)
+    # A caller that disconnects must not cancel the work others are waiting on
+    return await asyncio.shield(task)
 
 async def find_relevant_content(query: str, user_id: str, limit: int = 5) -> List[dict]:
     """Find most relevant content chunks for a query using cosine similarity"""
+    chunks = await singleflight(
+        ("find_relevant_content", " ".join(query.split()), user_id, limit),
+        lambda: search_relevant_content(query, user_id, limit)
+    )
+    # Callers re-rank in place, so each gets its own copies
+    return [dict(chunk) for chunk in chunks]
+
+async def search_relevant_content(query: str, user_id: str, limit: int = 5) -> List[dict]:
+    """Cosine-similarity search over the embeddings of files the user can see"""
     if not openai_client:
         logger.warning("OpenAI client not configured, skipping RAG search")
         return []
@@ -304,7 +400,7 @@ app = FastAPI()
 # Create text index on startup
 @app.on_event("startup")
 async def create_indexes():
-    """Create MongoDB text index for full-text search"""
+    """Create MongoDB indexes for full-text search and listings"""
     try:
         # Create compound text index with weights
         # Higher weight = more important in search ranking
@@ -328,6 +424,64 @@ async def create_indexes():
         if "already exists" not in str(e).lower():
             logger.warning(f"Could not create text index: {e}")
 
+    try:
+        # Keyset pagination: newest first, id breaks ties between equal upload dates
+        await db.files.create_index([("upload_date", -1), ("id", -1)], name="files_upload_date_id")
+        await db.files.create_index([("user_id", 1), ("upload_date", -1), ("id", -1)], name="files_user_upload_date_id")
+        await db.files.create_index([("is_public", 1), ("upload_date", -1), ("id", -1)], name="files_public_upload_date_id")
+    except Exception as e:
+        logger.warning(f"Could not create pagination indexes: {e}")
+
+    try:
+        await db.user_stats.create_index("user_id", unique=True, name="user_stats_user_id")
+    except Exception as e:
+        logger.warning(f"Could not create user_stats index: {e}")
+
+    try:
+        await db.llm_cache.create_index("key", unique=True, name="llm_cache_key")
+        await db.llm_cache.create_index("created_at", expireAfterSeconds=LLM_CACHE_TTL_SECONDS, name="llm_cache_ttl")
+    except Exception as e:
+        logger.warning(f"Could not create llm_cache indexes: {e}")
+
+    try:
+        await db.conversation_summaries.create_index("scope", unique=True, name="conversation_summaries_scope")
+    except Exception as e:
+        logger.warning(f"Could not create conversation_summaries index: {e}")
+
+    try:
+        # Reverse-chronological message pages; _id orders messages saved in the same instant
+        await db.project_messages.create_index([("project_id", 1), ("created_at", 1), ("_id", 1)], name="project_messages_project_created")
+        await db.story_messages.create_index([("story_id", 1), ("chapter_id", 1), ("created_at", 1), ("_id", 1)], name="story_messages_story_chapter_created")
+        await db.story_messages.create_index([("story_id", 1), ("created_at", 1), ("_id", 1)], name="story_messages_story_created")
+    except Exception as e:
+        logger.warning(f"Could not create message indexes: {e}")
+
+    try:
+        await db.file_digests.create_index("file_id", unique=True, name="file_digests_file_id")
+    except Exception as e:
+        logger.warning(f"Could not create file_digests index: {e}")
+
+    try:
+        await db.chapters.create_index([("story_id", 1), ("order", 1)], name="chapters_story_order")
+    except Exception as e:
+        logger.warning(f"Could not create chapters index: {e}")
+
+    try:
+        await db.translation_memory.create_index(
+            [("user_id", 1), ("source_hash", 1), ("target_language", 1), ("model", 1)], unique=True, name="translation_memory_key"
+        )
+        await db.translation_memory.create_index("story_ids", name="translation_memory_story_ids")
+        await db.translation_memory.create_index("used_at", expireAfterSeconds=TRANSLATION_MEMORY_TTL_SECONDS, name="translation_memory_ttl")
+    except Exception as e:
+        logger.warning(f"Could not create translation_memory index: {e}")
+
+    try:
+        await db.chat_messages.create_index([("session_id", 1), ("created_at", -1)], name="chat_messages_session_created")
+        # Messages expire individually, so an idle session disappears once its newest turn ages out
+        await db.chat_messages.create_index("created_at", expireAfterSeconds=CHAT_SESSION_TTL_SECONDS, name="chat_messages_ttl")
+    except Exception as e:
+        logger.warning(f"Could not create chat_messages indexes: {e}")
+
 # CORS - add immediately after app creation
 app.add_middleware(
     CORSMiddleware,
@@ -357,6 +511,7 @@ class TagUpdate(BaseModel):
 class SummarizeRequest(BaseModel):
     file_ids: List[str]
     query: Optional[str] = None
+    use_cache: bool = True  # False forces a fresh generation
 
 class ChatMessage(BaseModel):
     role: str  # "user" or "assistant"
@@ -400,6 +555,7 @@ class ContentBlock(BaseModel):
     file_id: Optional[str] = None  # for media blocks
     url: Optional[str] = None
     caption: Optional[str] = None
+    block_id: Optional[str] = None  # stable id, assigned by the server
 
 class StoryCreate(BaseModel):
     name: str
@@ -416,11 +572,14 @@ class ChapterCreate(BaseModel):
 class ChapterUpdate(BaseModel):
     name: Optional[str] = None
     content_blocks: Optional[List[ContentBlock]] = None
-    order: Optional[int] = None
+    order: Optional[float] = None
 
 class ChapterReorder(BaseModel):
     chapter_ids: List[str]  # ordered list of chapter IDs
 
+class ChapterMove(BaseModel):
+    after_id: Optional[str] = None  # place after this chapter, None for the start
+
 class StoryChatRequest(BaseModel):
     message: str
     mode: str = "coauthor"  # "coauthor" or "scribe"
@@ -442,17 +601,198 @@ def create_token(user_id: str, email: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def token_user(token: str) -> dict:
+    """User a JWT belongs to, or 401 if the token is invalid or the user is gone"""
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await token_user(credentials.credentials)
+
+# ==================== LLM GATEWAY ====================
+
+LLM_TIMEOUT_SECONDS = 120
+LLM_STREAM_TIMEOUT_SECONDS = 300
+LLM_MAX_CONNECTIONS = 50
+
+class LlmGateway:
+    """One pooled OpenAI-compatible client shared by every chat completion. Universal keys
+    go through the integrations proxy. Calls take a messages array, give up at their
+    deadline, and cancelling the awaiting task aborts the upstream request."""
+
+    def __init__(self):
+        self.client = None
+
+    def get_client(self):
+        if self.client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            base_url = f"{INTEGRATION_PROXY_URL}/llm" if EMERGENT_LLM_KEY.startswith("sk-emergent-") else None
+            self.client = AsyncOpenAI(
+                api_key=EMERGENT_LLM_KEY,
+                base_url=base_url,
+                timeout=LLM_TIMEOUT_SECONDS,
+                http_client=httpx.AsyncClient(limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS // 2
+                ))
+            )
+        return self.client
+
+    async def complete(self, messages: list, timeout: float = LLM_TIMEOUT_SECONDS) -> str:
+        """Full completion text; raises asyncio.TimeoutError past the deadline"""
+        import asyncio
+        response = await asyncio.wait_for(
+            self.get_client().chat.completions.create(model=LLM_MODEL, messages=messages),
+            timeout
+        )
+        return response.choices[0].message.content or ""
+
+    async def stream(self, messages: list, timeout: float = LLM_STREAM_TIMEOUT_SECONDS):
+        """Yield completion text deltas; the deadline covers the whole stream"""
+        import asyncio
+        deadline = time.monotonic() + timeout
+        stream = await asyncio.wait_for(
+            self.get_client().chat.completions.create(model=LLM_MODEL, messages=messages, stream=True),
+            timeout
+        )
+        try:
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - time.monotonic(), 0))
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+llm = LlmGateway()
+
+def build_llm_messages(system_message: str, history: list = (), user_text: Optional[str] = None) -> list:
+    """Messages array for a system prompt, prior turns and the new user message"""
+    messages = [{"role": "system", "content": system_message}]
+    messages += [{"role": m["role"], "content": m["content"]} for m in history]
+    if user_text is not None:
+        messages.append({"role": "user", "content": user_text})
+    return messages
+
+# ==================== REQUEST CANCELLATION ====================
+
+# Chat and TTS handlers run their upstream AI work as a task that is cancelled when the
+# client disconnects or the deadline passes, so abandoned requests stop spending tokens
+# and write nothing. Chat POSTs may send an Idempotency-Key header: a retry with the same
+# key attaches to the generation already running (or gets its finished result) instead
+# of starting a second one.
+CHAT_TURN_TIMEOUT_SECONDS = 180
+TTS_TIMEOUT_SECONDS = 60
+DISCONNECT_POLL_SECONDS = 0.5
+IDEMPOTENCY_GRACE_SECONDS = 15  # how long an abandoned keyed call waits for a retry
+IDEMPOTENCY_RESULT_TTL_SECONDS = 600
+idempotent_calls: Dict[tuple, dict] = {}
+
+async def wait_for_disconnect(request: Request):
+    """Return once the client has gone away"""
+    import asyncio
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+def idempotency_scope(user_id: str, request: Request, key: Optional[str]) -> Optional[tuple]:
+    """Key under which retries of the same request share one call"""
+    return ("idempotent", user_id, request.url.path, key) if key else None
+
+def request_fingerprint(*parts, **params) -> str:
+    """Identity of a keyed request's payload, so a key reused for a different request is caught"""
+    material = json.dumps([parts, params], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+def get_idempotent_call(scope: tuple, fingerprint: str) -> Optional[dict]:
+    """Live or recently finished call for an idempotency scope"""
+    entry = idempotent_calls.get(scope)
+    if entry is None:
+        return None
+    if entry["expires"] is not None and entry["expires"] <= time.monotonic():
+        del idempotent_calls[scope]
+        return None
+    if entry["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    return entry
+
+def start_idempotent_call(scope: Optional[tuple], fingerprint: str, factory, timeout: float) -> dict:
+    """Start factory() under a deadline, registered under scope when one is given"""
+    import asyncio
+    entry = {"task": asyncio.ensure_future(asyncio.wait_for(factory(), timeout)),
+             "fingerprint": fingerprint, "scope": scope, "waiters": 0, "expires": None}
+    if scope is None:
+        return entry
+    now = time.monotonic()
+    for key in [k for k, v in idempotent_calls.items() if v["expires"] is not None and v["expires"] <= now]:
+        del idempotent_calls[key]
+    idempotent_calls[scope] = entry
+
+    def on_done(task):
+        # Keep successful results for late retries; failures may be retried afresh
+        if task.cancelled() or task.exception() is not None:
+            if idempotent_calls.get(scope) is entry:
+                del idempotent_calls[scope]
+        else:
+            entry["expires"] = time.monotonic() + IDEMPOTENCY_RESULT_TTL_SECONDS
+
+    entry["task"].add_done_callback(on_done)
+    return entry
+
+def release_call(entry: dict):
+    """Cancel a call nobody is waiting for; keyed calls get a grace period for a retry"""
+    import asyncio
+    if entry["waiters"] or entry["task"].done():
+        return
+    if entry["scope"] is None:
+        entry["task"].cancel()
+        return
+
+    def cancel_if_abandoned():
+        if not entry["waiters"]:
+            entry["task"].cancel()
+
+    asyncio.get_running_loop().call_later(IDEMPOTENCY_GRACE_SECONDS, cancel_if_abandoned)
+
+async def run_cancellable(request: Request, factory, timeout: float = CHAT_TURN_TIMEOUT_SECONDS,
+                          idempotency: Optional[tuple] = None, fingerprint: str = ""):
+    """Await factory() on behalf of this request. The call is cancelled when every client
+    waiting on it has disconnected, and fails with 504 past its deadline."""
+    import asyncio
+    entry = get_idempotent_call(idempotency, fingerprint) if idempotency else None
+    if entry is None:
+        entry = start_idempotent_call(idempotency, fingerprint, factory, timeout)
+    task = entry["task"]
+    entry["waiters"] += 1
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        entry["waiters"] -= 1
+        release_call(entry)
+    if not task.done():
+        raise HTTPException(status_code=499, detail="Client closed request")
+    if task.cancelled():
+        raise HTTPException(status_code=499, detail="Request was cancelled")
+    if isinstance(task.exception(), asyncio.TimeoutError):
+        raise HTTPException(status_code=504, detail="AI service timed out")
+    return task.result()
 
 # ==================== FILE HELPERS ====================
 
@@ -468,6 +808,87 @@ def is_allowed_file(filename: str) -> bool:
     all_exts = [e for exts in ALLOWED_EXTENSIONS.values() for e in exts]
     return ext in all_exts
 
+def encode_cursor(values: list) -> str:
+    """Encode keyset values (e.g. [upload_date, id]) as an opaque pagination cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor produced by encode_cursor, rejecting anything malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+MESSAGE_PAGE_LIMIT = 50
+MESSAGE_PAGE_MAX = 200
+
+def message_cursor(doc: dict) -> str:
+    """Cursor for a chat message; _id breaks ties between messages saved in the same instant"""
+    return encode_cursor([doc["created_at"], str(doc["_id"])])
+
+def message_seek(cursor: str, op: str) -> dict:
+    """Query for messages before ($lt) or after ($gt) a message cursor"""
+    created_at, oid = decode_cursor(cursor)
+    try:
+        oid = ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [{"created_at": {op: created_at}}, {"created_at": created_at, "_id": {op: oid}}]}
+
+async def page_messages(collection, query: dict, limit: int = MESSAGE_PAGE_LIMIT,
+                        cursor: Optional[str] = None, since: Optional[str] = None) -> dict:
+    """One page of chat messages, oldest first. Without arguments it is the newest `limit`
+    messages; `cursor` (a previous next_cursor) pages back through older ones, and `since`
+    (a previous sync_cursor) returns only messages saved after it."""
+    limit = max(1, min(limit, MESSAGE_PAGE_MAX))
+    direction = 1 if since else -1
+    find_query = query
+    if since or cursor:
+        find_query = {"$and": [query, message_seek(since, "$gt") if since else message_seek(cursor, "$lt")]}
+    docs = await collection.find(find_query).sort(
+        [("created_at", direction), ("_id", direction)]
+    ).limit(limit + 1).to_list(limit + 1)
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    if direction == -1:
+        docs.reverse()
+    if since:
+        next_cursor = None
+        sync_cursor = message_cursor(docs[-1]) if docs else since
+    else:
+        next_cursor = message_cursor(docs[0]) if has_more else None
+        sync_cursor = message_cursor(docs[-1]) if docs else None
+    for doc in docs:
+        doc.pop("_id", None)
+    return {"messages": docs, "has_more": has_more, "next_cursor": next_cursor, "sync_cursor": sync_cursor}
+
+# Cached totals for paginated file listings: query key -> (expires_at, count)
+FILE_COUNT_TTL_SECONDS = 60
+file_count_cache: Dict[str, tuple] = {}
+
+async def get_cached_file_count(query: dict) -> int:
+    """Count files matching a query, reusing a recent count instead of recounting on every page"""
+    key = json.dumps(query, sort_keys=True, default=str)
+    now = time.monotonic()
+    cached = file_count_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    total = await db.files.count_documents(query)
+    if len(file_count_cache) >= 1000:
+        file_count_cache.clear()
+    file_count_cache[key] = (now + FILE_COUNT_TTL_SECONDS, total)
+    return total
+
+def invalidate_file_counts():
+    """Drop cached listing totals and status summaries after files are added, removed or re-tagged"""
+    file_count_cache.clear()
+    poll_memo.clear()
+
 async def extract_text_content(file_path: str, filename: str) -> str:
     ext = Path(filename).suffix.lower()
     try:
@@ -492,43 +913,87 @@ async def extract_text_content(file_path: str, filename: str) -> str:
         logger.error(f"Error extracting text from {filename}: {e}")
     return ""
 
-async def generate_ai_tags(filename: str, file_type: str, content_text: str) -> List[str]:
+# Deterministic generations (tags, articles) are cached in db.llm_cache, keyed by a hash
+# of model, system prompt, prompt and parameters. Entries expire after LLM_CACHE_TTL_SECONDS
+# and the collection is trimmed to LLM_CACHE_MAX_ENTRIES, oldest first.
+LLM_CACHE_TTL_SECONDS = 30 * 24 * 3600
+LLM_CACHE_MAX_ENTRIES = 20000
+LLM_CACHE_MAX_RESPONSE_CHARS = 100_000
+LLM_CACHE_TRIM_EVERY = 100  # stores between size checks
+llm_cache_stores = 0
+
+def llm_cache_key(system_message: str, prompt: str, **params) -> str:
+    """Content address of an LLM call"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    material = json.dumps([LLM_MODEL, system_message, prompt_hash, params], sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+async def get_cached_llm_response(key: str) -> Optional[str]:
+    """Stored response for a cache key, if any"""
+    entry = await db.llm_cache.find_one_and_update(
+        {"key": key}, {"$inc": {"hits": 1}}, projection={"_id": 0, "response": 1}
+    )
+    return entry["response"] if entry else None
+
+async def store_llm_response(key: str, kind: str, response: str):
+    """Cache a validated response, trimming the collection back to its size limit now and then"""
+    global llm_cache_stores
+    if len(response) > LLM_CACHE_MAX_RESPONSE_CHARS:
+        return
+    await db.llm_cache.update_one(
+        {"key": key},
+        {"$set": {"kind": kind, "model": LLM_MODEL, "response": response, "created_at": datetime.now(timezone.utc)},
+         "$setOnInsert": {"hits": 0}},
+        upsert=True
+    )
+    llm_cache_stores += 1
+    if llm_cache_stores % LLM_CACHE_TRIM_EVERY == 0:
+        excess = await db.llm_cache.estimated_document_count() - LLM_CACHE_MAX_ENTRIES
+        if excess > 0:
+            oldest = await db.llm_cache.find({}, {"_id": 1}).sort("created_at", 1).limit(excess).to_list(excess)
+            await db.llm_cache.delete_many({"_id": {"$in": [d["_id"] for d in oldest]}})
+
+TAGGING_SYSTEM_PROMPT = "You are a file tagging assistant. Given a filename, file type, and optional content, generate 3-8 relevant tags. Return ONLY a JSON array of lowercase tag strings, nothing else. Example: [\"report\", \"finance\", \"quarterly\"]"
+
+async def generate_ai_tags(filename: str, file_type: str, content_text: str, use_cache: bool = True) -> List[str]:
     if not EMERGENT_LLM_KEY:
         return []
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"tagging-{uuid.uuid4()}",
-            system_message="You are a file tagging assistant. Given a filename, file type, and optional content, generate 3-8 relevant tags. Return ONLY a JSON array of lowercase tag strings, nothing else. Example: [\"report\", \"finance\", \"quarterly\"]"
-        )
-        chat.with_model("openai", "gpt-5.2")
-
         prompt = f"Filename: {filename}\nFile type: {file_type}\n"
         if content_text:
             prompt += f"Content preview: {content_text[:2000]}\n"
         prompt += "\nGenerate relevant tags as a JSON array:"
 
-        response = await chat.send_message(UserMessage(text=prompt))
+        cache_key = llm_cache_key(TAGGING_SYSTEM_PROMPT, prompt)
+        response = await get_cached_llm_response(cache_key) if use_cache else None
+        cached = response is not None
+        if not cached:
+            response = await llm.complete(build_llm_messages(TAGGING_SYSTEM_PROMPT, user_text=prompt))
         tags = json.loads(response.strip().strip('`').replace('json\n', '').replace('json', ''))
         if isinstance(tags, list):
+            if not cached:
+                await store_llm_response(cache_key, "tags", response)
             return [str(t).lower().strip() for t in tags if t][:8]
     except Exception as e:
         logger.error(f"AI tagging error: {e}")
     return []
 
-async def generate_article(files_data: list, query: str = None) -> dict:
+ARTICLE_SYSTEM_PROMPT = "You are a content summarization expert. Given information about multiple files and their content, create a well-structured article that synthesizes the information. Return a JSON object with 'title' (string), 'content' (string in markdown format), and 'key_points' (array of strings). The content should be informative and well-organized with headings and paragraphs."
+
+async def generate_article(files_data: list, query: str = None, use_cache: bool = True) -> dict:
+    """Synthesize an article from files, sharing the generation among identical concurrent requests"""
+    article = await singleflight(
+        ("generate_article", tuple(sorted(f.get("id", "") for f in files_data)), query, use_cache),
+        lambda: write_article(files_data, query, use_cache)
+    )
+    return dict(article)
+
+async def write_article(files_data: list, query: str = None, use_cache: bool = True) -> dict:
     if not EMERGENT_LLM_KEY:
         return {"title": "Summary", "content": "AI summarization unavailable.", "sources": []}
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"article-{uuid.uuid4()}",
-            system_message="You are a content summarization expert. Given information about multiple files and their content, create a well-structured article that synthesizes the information. Return a JSON object with 'title' (string), 'content' (string in markdown format), and 'key_points' (array of strings). The content should be informative and well-organized with headings and paragraphs."
-        )
-        chat.with_model("openai", "gpt-5.2")
-
+        # Same file set, same prompt: order files canonically so repeats hit the cache
+        files_data = sorted(files_data, key=lambda f: f.get("id", ""))
         files_info = []
         for f in files_data:
             info = f"- File: {f.get('original_filename', 'Unknown')} (Type: {f.get('file_type', 'unknown')})"
@@ -542,9 +1007,15 @@ async def generate_article(files_data: list, query: str = None) -> dict:
         if query:
             prompt += f"\n\nThe user searched for: {query}\nFocus the article around this topic."
 
-        response = await chat.send_message(UserMessage(text=prompt))
+        cache_key = llm_cache_key(ARTICLE_SYSTEM_PROMPT, prompt)
+        response = await get_cached_llm_response(cache_key) if use_cache else None
+        cached = response is not None
+        if not cached:
+            response = await llm.complete(build_llm_messages(ARTICLE_SYSTEM_PROMPT, user_text=prompt))
         cleaned = response.strip().strip('`').replace('json\n', '').replace('json', '')
         result = json.loads(cleaned)
+        if not cached:
+            await store_llm_response(cache_key, "article", response)
         return {
             "title": result.get("title", "Summary"),
             "content": result.get("content", ""),
@@ -555,6 +1026,281 @@ async def generate_article(files_data: list, query: str = None) -> dict:
         logger.error(f"Article generation error: {e}")
         return {"title": "Summary", "content": f"Error generating article: {str(e)}", "key_points": [], "sources": []}
 
+# ==================== FILE DIGESTS ====================
+
+# Every text file gets a compact digest (short summary plus a few verbatim key passages)
+# generated once at ingestion and stored in db.file_digests. Project chat lists digests
+# instead of fetching each file's full content_text every turn. The assembled listing is
+# cached per project and rebuilt when the project's file_ids or one of its files change.
+DIGEST_SOURCE_CHARS = 12000
+DIGEST_MAX_CHARS = 2000
+DIGEST_FALLBACK_CHARS = 1500
+PROJECT_DIGEST_CACHE_SIZE = 200
+project_digest_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+DIGEST_SYSTEM_PROMPT = "You are a document digest assistant. Summarize the document in at most 80 words, then quote up to 3 short key passages (under 300 characters each) verbatim from it. Return ONLY a JSON object with 'summary' (string) and 'key_passages' (array of strings)."
+
+def render_file_digest(summary: str, passages: List[str]) -> str:
+    """Digest text as it appears in a project chat prompt"""
+    parts = [summary.strip()] if summary and summary.strip() else []
+    passages = [p.strip() for p in passages if p and p.strip()]
+    if passages:
+        parts.append("Key passages:\n" + "\n".join(f'- "{p}"' for p in passages))
+    return "\n".join(parts)[:DIGEST_MAX_CHARS]
+
+async def generate_file_digest(filename: str, content_text: str) -> str:
+    """Summary and key passages of a file; the opening of the text when AI is unavailable"""
+    if EMERGENT_LLM_KEY:
+        try:
+            prompt = f"Filename: {filename}\n\nContent:\n{content_text[:DIGEST_SOURCE_CHARS]}"
+            cache_key = llm_cache_key(DIGEST_SYSTEM_PROMPT, prompt)
+            response = await get_cached_llm_response(cache_key)
+            cached = response is not None
+            if not cached:
+                response = await llm.complete(build_llm_messages(DIGEST_SYSTEM_PROMPT, user_text=prompt))
+            parsed = json.loads(response.strip().strip('`').replace('json\n', '', 1))
+            digest = render_file_digest(str(parsed.get("summary", "")), [str(p) for p in parsed.get("key_passages", [])][:3])
+            if digest:
+                if not cached:
+                    await store_llm_response(cache_key, "digest", response)
+                return digest
+        except Exception as e:
+            logger.error(f"File digest error for {filename}: {e}")
+    return content_text[:DIGEST_FALLBACK_CHARS]
+
+async def build_file_digest(file_id: str, filename: str, content_text: str):
+    """Generate and store a file's digest (run in the background at ingestion). Files
+    without text store an empty digest so project listings never backfill them again."""
+    digest = await generate_file_digest(filename, content_text) if content_text else ""
+    await db.file_digests.update_one(
+        {"file_id": file_id},
+        {"$set": {"digest": digest, "created_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
+    invalidate_project_digests(file_id)
+
+def schedule_file_digest(file_id: str, filename: str, content_text: str):
+    """Build a file's digest in the background, once even if requested repeatedly"""
+    import asyncio
+    asyncio.create_task(singleflight(
+        ("file_digest", file_id), lambda: build_file_digest(file_id, filename, content_text)
+    ))
+
+def invalidate_project_digests(file_id: Optional[str] = None, project_id: Optional[str] = None):
+    """Drop cached project listings for a project, or for every project containing a file"""
+    if project_id is not None:
+        project_digest_cache.pop(project_id, None)
+    if file_id is not None:
+        for key in [k for k, (file_ids, _) in project_digest_cache.items() if file_id in file_ids]:
+            del project_digest_cache[key]
+
+async def load_project_digests(project: dict) -> list:
+    """Project files (name, type, tags) with their digests, cached per project. Files
+    ingested before digests existed get an excerpt now and a digest in the background."""
+    import asyncio
+    file_ids = tuple(project.get("file_ids", []))
+    cached = project_digest_cache.get(project["id"])
+    if cached and cached[0] == file_ids:
+        project_digest_cache.move_to_end(project["id"])
+        return cached[1]
+    if not file_ids:
+        return []
+    files, digests = await asyncio.gather(
+        db.files.find(
+            {"id": {"$in": list(file_ids)}},
+            {"_id": 0, "id": 1, "original_filename": 1, "file_type": 1, "tags": 1}
+        ).to_list(100),
+        db.file_digests.find({"file_id": {"$in": list(file_ids)}}, {"_id": 0, "file_id": 1, "digest": 1}).to_list(100)
+    )
+    by_file = {d["file_id"]: d["digest"] for d in digests}
+    missing = [f["id"] for f in files if f["id"] not in by_file]
+    if missing:
+        for f in await db.files.find({"id": {"$in": missing}}, {"_id": 0, "id": 1, "original_filename": 1, "content_text": 1}).to_list(100):
+            content_text = f.get("content_text") or ""
+            by_file[f["id"]] = content_text[:DIGEST_FALLBACK_CHARS]
+            schedule_file_digest(f["id"], f["original_filename"], content_text)
+    for f in files:
+        f["digest"] = by_file.get(f["id"], "")
+    # Backfilled excerpts are replaced (and this entry dropped) once their digests are stored
+    project_digest_cache[project["id"]] = (file_ids, files)
+    while len(project_digest_cache) > PROJECT_DIGEST_CACHE_SIZE:
+        project_digest_cache.popitem(last=False)
+    return files
+
+# ==================== USER STATS ====================
+
+# Per-user dashboard counters kept in db.user_stats and adjusted with $inc on every
+# upload, delete, tag change and visibility change. rebuild_user_stats() recomputes a
+# document from the files collection when it is missing or has drifted.
+RECENT_FILES_LIMIT = 5
+RECENT_FILE_FIELDS = ["id", "original_filename", "file_type", "file_extension", "file_size", "mime_type", "tags", "upload_date", "is_public"]
+
+def stats_key(value: str) -> str:
+    """Escape a tag or file type for use as a MongoDB field name"""
+    return str(value).replace(".", "\uff0e").replace("$", "\uff04")
+
+def unstats_key(key: str) -> str:
+    return key.replace("\uff0e", ".").replace("\uff04", "$")
+
+def recent_file_summary(file_doc: dict) -> dict:
+    return {k: file_doc.get(k) for k in RECENT_FILE_FIELDS}
+
+def file_stats_inc(file_doc: dict, sign: int) -> dict:
+    """Build the $inc delta that adds (sign=1) or removes (sign=-1) one file from a user's stats"""
+    file_type = stats_key(file_doc.get("file_type") or "other")
+    size = file_doc.get("file_size", 0) or 0
+    inc = {
+        "total_files": sign,
+        "total_size": sign * size,
+        f"type_breakdown.{file_type}.count": sign,
+        f"type_breakdown.{file_type}.size": sign * size,
+    }
+    if file_doc.get("is_public"):
+        inc["public_files"] = sign
+    for tag in file_doc.get("tags") or []:
+        key = f"tag_counts.{stats_key(tag)}"
+        inc[key] = inc.get(key, 0) + sign
+    return inc
+
+async def rebuild_user_stats(user_id: str) -> dict:
+    """Recompute a user's stats document from scratch (repair/backfill)"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$facet": {
+            "types": [{"$group": {"_id": "$file_type", "count": {"$sum": 1}, "size": {"$sum": "$file_size"}}}],
+            "tags": [{"$unwind": "$tags"}, {"$group": {"_id": "$tags", "count": {"$sum": 1}}}],
+            "public": [{"$match": {"is_public": True}}, {"$count": "count"}],
+            "recent": [
+                {"$sort": {"upload_date": -1}},
+                {"$limit": RECENT_FILES_LIMIT},
+                {"$project": {"_id": 0, **{k: 1 for k in RECENT_FILE_FIELDS}}}
+            ]
+        }}
+    ]
+    result = (await db.files.aggregate(pipeline).to_list(1))[0]
+    type_breakdown = {
+        stats_key(t["_id"] or "other"): {"count": t["count"], "size": t.get("size", 0) or 0}
+        for t in result["types"]
+    }
+    stats = {
+        "user_id": user_id,
+        "total_files": sum(t["count"] for t in type_breakdown.values()),
+        "total_size": sum(t["size"] for t in type_breakdown.values()),
+        "public_files": result["public"][0]["count"] if result["public"] else 0,
+        "type_breakdown": type_breakdown,
+        "tag_counts": {stats_key(t["_id"]): t["count"] for t in result["tags"]},
+        "recent_files": [recent_file_summary(f) for f in result["recent"]],
+        "rebuilt_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.user_stats.replace_one({"user_id": user_id}, stats, upsert=True)
+    return stats
+
+async def get_user_stats(user_id: str) -> dict:
+    """Read a user's stats document, building it on first access"""
+    stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if not stats:
+        stats = await rebuild_user_stats(user_id)
+    return stats
+
+async def record_file_added(file_doc: dict):
+    """Count a newly stored file. Users without a stats document are skipped;
+    their document is built from the files collection on the next read."""
+    await db.user_stats.update_one(
+        {"user_id": file_doc["user_id"]},
+        {
+            "$inc": file_stats_inc(file_doc, 1),
+            "$push": {"recent_files": {
+                "$each": [recent_file_summary(file_doc)],
+                "$sort": {"upload_date": -1},
+                "$slice": RECENT_FILES_LIMIT
+            }}
+        }
+    )
+
+async def record_files_removed(user_id: str, file_docs: List[dict]):
+    """Un-count a user's deleted files in one update and refill the recent list if any was shown there"""
+    inc = {}
+    for file_doc in file_docs:
+        for key, value in file_stats_inc(file_doc, -1).items():
+            inc[key] = inc.get(key, 0) + value
+    await db.user_stats.update_one({"user_id": user_id}, {"$inc": inc})
+    if await db.user_stats.count_documents({"user_id": user_id, "recent_files.id": {"$in": [f["id"] for f in file_docs]}}):
+        recent = await db.files.find(
+            {"user_id": user_id}, {"_id": 0, **{k: 1 for k in RECENT_FILE_FIELDS}}
+        ).sort("upload_date", -1).limit(RECENT_FILES_LIMIT).to_list(RECENT_FILES_LIMIT)
+        await db.user_stats.update_one(
+            {"user_id": user_id},
+            {"$set": {"recent_files": [recent_file_summary(f) for f in recent]}}
+        )
+
+async def record_tags_changed(user_id: str, file_id: str, old_tags: List[str], new_tags: List[str]):
+    inc = {}
+    for tag in old_tags or []:
+        key = f"tag_counts.{stats_key(tag)}"
+        inc[key] = inc.get(key, 0) - 1
+    for tag in new_tags or []:
+        key = f"tag_counts.{stats_key(tag)}"
+        inc[key] = inc.get(key, 0) + 1
+    inc = {k: v for k, v in inc.items() if v}
+    if inc:
+        await db.user_stats.update_one({"user_id": user_id}, {"$inc": inc})
+    await db.user_stats.update_one(
+        {"user_id": user_id, "recent_files.id": file_id},
+        {"$set": {"recent_files.$.tags": new_tags}}
+    )
+
+async def record_visibility_changed(user_id: str, file_id: str, was_public: bool, is_public: bool):
+    if bool(was_public) == bool(is_public):
+        return
+    await db.user_stats.update_one({"user_id": user_id}, {"$inc": {"public_files": 1 if is_public else -1}})
+    await db.user_stats.update_one(
+        {"user_id": user_id, "recent_files.id": file_id},
+        {"$set": {"recent_files.$.is_public": is_public}}
+    )
+
+# ==================== PARENT COUNTERS ====================
+
+# projects.message_count and stories.chapter_count are adjusted with $inc by every path
+# that inserts or deletes project messages or chapters, so list pages read them instead
+# of counting per item. rebuild_parent_counts() recomputes them (repair/backfill).
+PARENT_COUNTERS = {
+    "message_count": ("projects", "project_messages", "project_id"),
+    "chapter_count": ("stories", "chapters", "story_id"),
+}
+
+async def rebuild_parent_counts(field: str, parent_ids: List[str]) -> Dict[str, int]:
+    """Recount children for the given parents with one aggregation and store the counter"""
+    parents, children, foreign_key = PARENT_COUNTERS[field]
+    grouped = await db[children].aggregate([
+        {"$match": {foreign_key: {"$in": parent_ids}}},
+        {"$group": {"_id": f"${foreign_key}", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    counts = {parent_id: 0 for parent_id in parent_ids}
+    counts.update({g["_id"]: g["count"] for g in grouped})
+    if counts:
+        await db[parents].bulk_write(
+            [UpdateOne({"id": parent_id}, {"$set": {field: count}}) for parent_id, count in counts.items()],
+            ordered=False
+        )
+    return counts
+
+async def rebuild_user_parent_counts(user_id: str) -> dict:
+    """Recount every counter on a user's projects and stories, repairing any drift left
+    by a write that stored the child but lost the parent's $inc"""
+    rebuilt = {}
+    for field, (parents, _, _) in PARENT_COUNTERS.items():
+        parent_ids = [doc["id"] for doc in await db[parents].find({"user_id": user_id}, {"_id": 0, "id": 1}).to_list(None)]
+        rebuilt[field] = len(await rebuild_parent_counts(field, parent_ids)) if parent_ids else 0
+    return rebuilt
+
+async def ensure_parent_counts(field: str, docs: List[dict]):
+    """Backfill the counter on documents created before it existed"""
+    missing = [d["id"] for d in docs if field not in d]
+    if missing:
+        counts = await rebuild_parent_counts(field, missing)
+        for d in docs:
+            d.setdefault(field, counts.get(d["id"], 0))
+
 # ==================== AUTH ROUTES ====================
 
 @api_router.post("/auth/register")
@@ -636,10 +1382,14 @@ async def upload_file(
     }
     await db.files.insert_one(file_doc)
     file_doc.pop("_id", None)
+    invalidate_file_counts()
+    invalidate_overview_context(file_doc["user_id"], file_doc.get("is_public", False))
+    await record_file_added(file_doc)
     
     # Generate embeddings for RAG (in background, don't block response)
     import asyncio
     asyncio.create_task(process_file_embeddings(file_id, content_text, file.filename, all_tags))
+    schedule_file_digest(file_id, file.filename, content_text)
     
     return file_doc
 
@@ -650,8 +1400,12 @@ async def list_files(
     visibility: Optional[str] = "all",  # "all", "public", "private"
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     user=Depends(get_current_user)
 ):
+    """List files newest first. Pass the returned next_cursor back as `cursor` for
+    constant-time paging; `page` still works for numbered navigation."""
     # Build query based on visibility filter
     if visibility == "public":
         # Show all public files from any user
@@ -671,77 +1425,103 @@ async def list_files(
     if tag:
         query["tags"] = tag
     
-    skip = (page - 1) * limit
-    total = await db.files.count_documents(query)
-    files = await db.files.find(query, {"_id": 0}).sort("upload_date", -1).skip(skip).limit(limit).to_list(limit)
+    # Seek past the last (upload_date, id) seen instead of skipping over earlier pages
+    find_query = query
+    skip = 0
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        find_query = {"$and": [query, {"$or": [
+            {"upload_date": {"$lt": last_date}},
+            {"upload_date": last_date, "id": {"$lt": last_id}}
+        ]}]}
+    else:
+        skip = (page - 1) * limit
+    
+    files = await db.files.find(find_query, {"_id": 0}).sort(
+        [("upload_date", -1), ("id", -1)]
+    ).skip(skip).limit(limit + 1).to_list(limit + 1)
+    has_more = len(files) > limit
+    files = files[:limit]
+    next_cursor = encode_cursor([files[-1].get("upload_date"), files[-1]["id"]]) if has_more else None
     
     # Add has_content_text flag and remove full content_text (too large for listing)
     for f in files:
         f["has_content_text"] = bool(f.get("content_text"))
         f.pop("content_text", None)
     
-    return {"files": files, "total": total, "page": page, "pages": (total + limit - 1) // limit}
+    total = await get_cached_file_count(query) if include_total else None
+    pages = (total + limit - 1) // limit if total is not None else None
+    return {"files": files, "total": total, "page": page, "pages": pages, "next_cursor": next_cursor, "has_more": has_more}
 
 @api_router.get("/files/stats")
 async def get_stats(user=Depends(get_current_user)):
-    user_id = user["id"]
-    total = await db.files.count_documents({"user_id": user_id})
-    pipeline = [
-        {"$match": {"user_id": user_id}},
-        {"$group": {"_id": "$file_type", "count": {"$sum": 1}, "size": {"$sum": "$file_size"}}}
-    ]
-    type_stats = await db.files.aggregate(pipeline).to_list(100)
-    tag_pipeline = [
-        {"$match": {"user_id": user_id}},
-        {"$unwind": "$tags"},
-        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 20}
-    ]
-    top_tags = await db.files.aggregate(tag_pipeline).to_list(20)
-    recent = await db.files.find({"user_id": user_id}, {"_id": 0, "content_text": 0}).sort("upload_date", -1).limit(5).to_list(5)
-    total_size = sum(s.get("size", 0) for s in type_stats)
+    stats = await get_user_stats(user["id"])
+    type_breakdown = {
+        unstats_key(t): v for t, v in stats.get("type_breakdown", {}).items() if v.get("count", 0) > 0
+    }
+    tag_counts = sorted(
+        ((unstats_key(t), c) for t, c in stats.get("tag_counts", {}).items() if c > 0),
+        key=lambda x: (-x[1], x[0])
+    )
     return {
-        "total_files": total,
-        "total_size": total_size,
-        "type_breakdown": {s["_id"]: {"count": s["count"], "size": s["size"]} for s in type_stats},
-        "top_tags": [{"tag": t["_id"], "count": t["count"]} for t in top_tags],
-        "recent_files": recent
+        "total_files": stats.get("total_files", 0),
+        "total_size": stats.get("total_size", 0),
+        "public_files": stats.get("public_files", 0),
+        "type_breakdown": type_breakdown,
+        "top_tags": [{"tag": t, "count": c} for t, c in tag_counts[:20]],
+        "recent_files": stats.get("recent_files", [])
     }
 
+@api_router.post("/files/stats/rebuild")
+async def rebuild_stats(user=Depends(get_current_user)):
+    """Repair job: recompute the user's stats document from their files"""
+    stats = await rebuild_user_stats(user["id"])
+    return {"message": "Stats rebuilt", "total_files": stats["total_files"], "rebuilt_at": stats["rebuilt_at"]}
+
+@api_router.post("/counts/rebuild")
+async def rebuild_counts(user=Depends(get_current_user)):
+    """Repair job: recompute message counts of the user's projects and chapter counts of their stories"""
+    rebuilt = await rebuild_user_parent_counts(user["id"])
+    return {"message": "Counts rebuilt", "projects": rebuilt["message_count"], "stories": rebuilt["chapter_count"]}
+
 @api_router.get("/files/tags")
 async def get_all_tags(user=Depends(get_current_user)):
-    pipeline = [
-        {"$match": {"user_id": user["id"]}},
-        {"$unwind": "$tags"},
-        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}}
-    ]
-    tags = await db.files.aggregate(pipeline).to_list(200)
-    return [{"tag": t["_id"], "count": t["count"]} for t in tags]
+    stats = await get_user_stats(user["id"])
+    tag_counts = sorted(
+        ((unstats_key(t), c) for t, c in stats.get("tag_counts", {}).items() if c > 0),
+        key=lambda x: (-x[1], x[0])
+    )
+    return [{"tag": t, "count": c} for t, c in tag_counts[:200]]
 
 @api_router.get("/files/embedding-stats")
 async def get_embedding_stats(user=Depends(get_current_user)):
     """Get a breakdown of embedding statuses for user's files"""
-    user_filter = {"$or": [{"user_id": user["id"]}, {"is_public": True}]}
-    total = await db.files.count_documents(user_filter)
+    memo_key = f"embedding-stats:{user['id']}"
+    cached = poll_memo_get(memo_key)
+    if cached is not None:
+        return cached
     
+    # One round trip: status counts and the problem-file list come from a single $facet
+    user_filter = {"$or": [{"user_id": user["id"]}, {"is_public": True}]}
     pipeline = [
         {"$match": user_filter},
-        {"$group": {"_id": "$embedding_status", "count": {"$sum": 1}}}
+        {"$facet": {
+            "statuses": [{"$group": {"_id": "$embedding_status", "count": {"$sum": 1}}}],
+            "problem_files": [
+                # Get files that failed or have no embeddings for the detail list
+                {"$match": {"embedding_status": {"$in": ["failed", "skipped", "disabled", "pending", None]}}},
+                {"$limit": 500},
+                {"$project": {"_id": 0, "id": 1, "original_filename": 1, "embedding_status": 1, "embedding_error": 1, "file_type": 1, "upload_date": 1}}
+            ]
+        }}
     ]
+    result = (await db.files.aggregate(pipeline).to_list(1))[0]
     status_counts = {}
-    async for doc in db.files.aggregate(pipeline):
-        status_counts[doc["_id"] or "none"] = doc["count"]
-    
-    # Get files that failed or have no embeddings for the detail list
-    problem_files = await db.files.find(
-        {**user_filter, "embedding_status": {"$in": ["failed", "skipped", "disabled", "pending", None]}},
-        {"_id": 0, "id": 1, "original_filename": 1, "embedding_status": 1, "embedding_error": 1, "file_type": 1, "upload_date": 1}
-    ).to_list(500)
+    for doc in result["statuses"]:
+        status_counts[doc["_id"] or "none"] = status_counts.get(doc["_id"] or "none", 0) + doc["count"]
     
-    return {
-        "total": total,
+    stats = {
+        "total": sum(status_counts.values()),
         "completed": status_counts.get("completed", 0),
         "processing": status_counts.get("processing", 0),
         "pending": status_counts.get("pending", 0),
@@ -749,8 +1529,10 @@ async def get_embedding_stats(user=Depends(get_current_user)):
         "skipped": status_counts.get("skipped", 0),
         "disabled": status_counts.get("disabled", 0),
         "none": status_counts.get("none", 0),
-        "problem_files": problem_files
+        "problem_files": result["problem_files"]
     }
+    poll_memo_set(memo_key, stats)
+    return stats
 
 
 @api_router.post("/files/reindex")
@@ -775,28 +1557,28 @@ async def reindex_embeddings(user=Depends(get_current_user), filter: str = "all"
     
     task_id = str(uuid.uuid4())
     reindex_tasks[task_id] = {
+        "user_id": user["id"],
         "status": "running",
         "processed": 0,
         "total": len(files),
         "errors": [],
         "current_file": ""
     }
+    publish_task_event("reindex", task_id, reindex_tasks[task_id])
     
     async def run_reindex():
         try:
             for i, f in enumerate(files):
                 try:
                     reindex_tasks[task_id]["current_file"] = f["original_filename"]
+                    publish_task_event("reindex", task_id, reindex_tasks[task_id])
                     content_text = f.get("content_text", "")
                     if content_text or f.get("tags"):
                         await process_file_embeddings(
                             f["id"], content_text, f["original_filename"], f.get("tags", [])
                         )
                     else:
-                        await db.files.update_one(
-                            {"id": f["id"]},
-                            {"$set": {"embedding_status": "skipped", "embedding_error": "No text content to embed"}}
-                        )
+                        await set_embedding_status(f["id"], "skipped", "No text content to embed", embedding_count=0)
                     reindex_tasks[task_id]["processed"] = i + 1
                 except Exception as e:
                     reindex_tasks[task_id]["errors"].append(f"{f['original_filename']}: {str(e)}")
@@ -807,6 +1589,7 @@ async def reindex_embeddings(user=Depends(get_current_user), filter: str = "all"
         except Exception as e:
             reindex_tasks[task_id]["status"] = "failed"
             logger.error(f"Reindex task {task_id} failed: {e}")
+        publish_task_event("reindex", task_id, reindex_tasks[task_id])
     
     import asyncio
     asyncio.create_task(run_reindex())
@@ -834,48 +1617,38 @@ async def get_embedding_status(user=Depends(get_current_user)):
             "total_embeddings": 0
         }
     
-    # Count total accessible files
-    total_files = await db.files.count_documents({
-        "$or": [{"user_id": user["id"]}, {"is_public": True}]
-    })
-    
-    # Count files with textual content
-    files_with_content = await db.files.count_documents({
-        "$or": [{"user_id": user["id"]}, {"is_public": True}],
-        "content_text": {"$exists": True, "$ne": ""}
-    })
-    
-    # Get file IDs for accessible files
-    file_docs = await db.files.find(
-        {"$or": [{"user_id": user["id"]}, {"is_public": True}]},
-        {"id": 1}
-    ).to_list(1000)
-    file_ids = [f["id"] for f in file_docs]
-    
-    # Count embeddings
-    total_embeddings = await db.embeddings.count_documents({"file_id": {"$in": file_ids}})
+    memo_key = f"embedding-status:{user['id']}"
+    cached = poll_memo_get(memo_key)
+    if cached is not None:
+        return cached
     
-    # Count unique files that have embeddings
-    if file_ids:
-        pipeline = [
-            {"$match": {"file_id": {"$in": file_ids}}},
-            {"$group": {"_id": "$file_id"}},
-            {"$count": "count"}
-        ]
-        result = await db.embeddings.aggregate(pipeline).to_list(1)
-        files_with_embeddings = result[0]["count"] if result else 0
-    else:
-        files_with_embeddings = 0
+    # Single pass over accessible files; embedding_count is maintained per file by
+    # process_file_embeddings, so the embeddings collection isn't touched here
+    pipeline = [
+        {"$match": {"$or": [{"user_id": user["id"]}, {"is_public": True}]}},
+        {"$group": {
+            "_id": None,
+            "total_files": {"$sum": 1},
+            "files_with_content": {"$sum": {"$cond": [{"$gt": [{"$ifNull": ["$content_text", ""]}, ""]}, 1, 0]}},
+            "files_with_embeddings": {"$sum": {"$cond": [{"$gt": [{"$ifNull": ["$embedding_count", 0]}, 0]}, 1, 0]}},
+            "total_embeddings": {"$sum": {"$ifNull": ["$embedding_count", 0]}}
+        }}
+    ]
+    result = await db.files.aggregate(pipeline).to_list(1)
+    counts = result[0] if result else {}
+    files_with_embeddings = counts.get("files_with_embeddings", 0)
     
-    return {
+    status = {
         "status": "enabled",
         "model": EMBEDDING_MODEL,
-        "total_files": total_files,
-        "files_with_content": files_with_content,
+        "total_files": counts.get("total_files", 0),
+        "files_with_content": counts.get("files_with_content", 0),
         "files_with_embeddings": files_with_embeddings,
-        "total_embeddings": total_embeddings,
+        "total_embeddings": counts.get("total_embeddings", 0),
         "rag_ready": files_with_embeddings > 0
     }
+    poll_memo_set(memo_key, status)
+    return status
 
 
 @api_router.get("/files/batch-status")
@@ -909,7 +1682,7 @@ async def retry_file_embedding(file_id: str, user=Depends(get_current_user)):
     if not openai_client:
         raise HTTPException(status_code=503, detail="AI embedding service not configured")
     # Reset status to pending and re-trigger
-    await db.files.update_one({"id": file_id}, {"$set": {"embedding_status": "pending"}})
+    await set_embedding_status(file_id, "pending", file_doc.get("embedding_error"))
     import asyncio
     asyncio.create_task(process_file_embeddings(
         file_id,
@@ -927,10 +1700,12 @@ async def search_files(
     visibility: Optional[str] = "all",  # "all", "public", "private"
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     user=Depends(get_current_user)
 ):
     if not q:
-        return {"files": [], "total": 0, "page": 1, "pages": 0}
+        return {"files": [], "total": 0, "page": 1, "pages": 0, "next_cursor": None, "has_more": False}
     
     # Build query based on visibility filter
     if visibility == "public":
@@ -950,23 +1725,36 @@ async def search_files(
     if file_type and file_type != "all":
         query["file_type"] = file_type
     
-    skip = (page - 1) * limit
-    total = await db.files.count_documents(query)
-    
-    # Sort by text search score (relevance) then by upload date
-    files = await db.files.find(
-        query, 
-        {"_id": 0, "content_text": 0, "score": {"$meta": "textScore"}}
-    ).sort([
-        ("score", {"$meta": "textScore"}),
-        ("upload_date", -1)
-    ]).skip(skip).limit(limit).to_list(limit)
+    # Sort by text search score (relevance), id breaks ties so the cursor position is exact
+    pipeline = [
+        {"$match": query},
+        {"$addFields": {"score": {"$meta": "textScore"}}}
+    ]
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": last_score}},
+            {"score": last_score, "id": {"$lt": last_id}}
+        ]}})
+    pipeline.append({"$sort": {"score": -1, "id": -1}})
+    if not cursor and page > 1:
+        pipeline.append({"$skip": (page - 1) * limit})
+    pipeline += [
+        {"$limit": limit + 1},
+        {"$project": {"_id": 0, "content_text": 0}}
+    ]
+    files = await db.files.aggregate(pipeline).to_list(limit + 1)
+    has_more = len(files) > limit
+    files = files[:limit]
+    next_cursor = encode_cursor([files[-1]["score"], files[-1]["id"]]) if has_more else None
     
     # Remove the score field from response
     for f in files:
         f.pop("score", None)
     
-    return {"files": files, "total": total, "page": page, "pages": (total + limit - 1) // limit}
+    total = await get_cached_file_count(query) if include_total else None
+    pages = (total + limit - 1) // limit if total is not None else None
+    return {"files": files, "total": total, "page": page, "pages": pages, "next_cursor": next_cursor, "has_more": has_more}
 
 @api_router.get("/files/smart-search")
 async def smart_search_files(
@@ -1168,6 +1956,10 @@ async def update_tags(file_id: str, data: TagUpdate, user=Depends(get_current_us
         raise HTTPException(status_code=404, detail="File not found")
     clean_tags = [t.strip().lower() for t in data.tags if t.strip()]
     await db.files.update_one({"id": file_id}, {"$set": {"tags": clean_tags, "manual_tags": clean_tags}})
+    invalidate_file_counts()
+    invalidate_overview_context(user["id"], file_doc.get("is_public", False))
+    invalidate_project_digests(file_id)
+    await record_tags_changed(user["id"], file_id, file_doc.get("tags", []), clean_tags)
     updated = await db.files.find_one({"id": file_id}, {"_id": 0})
     return updated
 
@@ -1181,52 +1973,102 @@ async def update_visibility(file_id: str, data: VisibilityUpdate, user=Depends(g
     if not file_doc:
         raise HTTPException(status_code=404, detail="File not found or you don't have permission")
     await db.files.update_one({"id": file_id}, {"$set": {"is_public": data.is_public}})
+    invalidate_file_counts()
+    invalidate_overview_context(user["id"], True)
+    await record_visibility_changed(user["id"], file_id, file_doc.get("is_public", False), data.is_public)
     updated = await db.files.find_one({"id": file_id}, {"_id": 0})
     return updated
 
-@api_router.delete("/files/{file_id}")
-async def delete_file(file_id: str, user=Depends(get_current_user)):
-    file_doc = await db.files.find_one({"id": file_id, "user_id": user["id"]}, {"_id": 0})
-    if not file_doc:
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    # Delete physical file
-    file_path = UPLOAD_DIR / file_doc["stored_filename"]
-    if file_path.exists():
-        file_path.unlink()
-    
-    # Delete embeddings for this file
-    deleted_embeddings = await db.embeddings.delete_many({"file_id": file_id})
+async def delete_user_files(user_id: str, file_docs: List[dict]) -> dict:
+    """Delete files with their embeddings, digests and project references in a few bulk
+    operations, running the independent ones concurrently"""
+    import asyncio
+    file_ids = [f["id"] for f in file_docs]
     
-    # Remove file ID from all projects that reference it
+    # Projects that reference any of the files, reported back to the caller
     affected_projects = await db.projects.find(
-        {"file_ids": file_id, "user_id": user["id"]},
+        {"user_id": user_id, "file_ids": {"$in": file_ids}},
         {"_id": 0, "id": 1, "name": 1, "file_ids": 1}
-    ).to_list(100)
+    ).to_list(None)
+    
+    async def detach_from_projects():
+        await db.projects.update_many(
+            {"user_id": user_id, "file_ids": {"$in": file_ids}},
+            {"$pull": {"file_ids": {"$in": file_ids}}, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        await db.projects.update_many(
+            {"id": {"$in": [p["id"] for p in affected_projects]}, "file_ids": {"$size": 0}},
+            {"$set": {"status": "inactive"}}
+        )
+    
+    def remove_stored_files():
+        for f in file_docs:
+            file_path = UPLOAD_DIR / f["stored_filename"]
+            if file_path.exists():
+                file_path.unlink()
+    
+    deleted_embeddings, *_ = await asyncio.gather(
+        db.embeddings.delete_many({"file_id": {"$in": file_ids}}),
+        db.file_digests.delete_many({"file_id": {"$in": file_ids}}),
+        db.files.delete_many({"id": {"$in": file_ids}}),
+        detach_from_projects(),
+        asyncio.to_thread(remove_stored_files)
+    )
+    
+    invalidate_file_counts()
+    invalidate_overview_context(user_id, any(f.get("is_public", False) for f in file_docs))
+    for file_id in file_ids:
+        invalidate_project_digests(file_id)
+        invalidate_project_index(file_id)
+    await record_files_removed(user_id, file_docs)
     
+    removed = set(file_ids)
     affected_info = []
     for proj in affected_projects:
-        new_file_ids = [fid for fid in proj["file_ids"] if fid != file_id]
-        update_fields = {"file_ids": new_file_ids, "updated_at": datetime.now(timezone.utc).isoformat()}
-        if len(new_file_ids) == 0:
-            update_fields["status"] = "inactive"
-        await db.projects.update_one({"id": proj["id"]}, {"$set": update_fields})
+        remaining = len([fid for fid in proj["file_ids"] if fid not in removed])
         affected_info.append({
             "id": proj["id"],
             "name": proj["name"],
-            "remaining_files": len(new_file_ids),
-            "became_inactive": len(new_file_ids) == 0
+            "remaining_files": remaining,
+            "became_inactive": remaining == 0
         })
     
-    # Delete file document
-    await db.files.delete_one({"id": file_id})
-    
     return {
-        "message": "File deleted",
         "embeddings_removed": deleted_embeddings.deleted_count,
         "affected_projects": affected_info
     }
 
+@api_router.delete("/files/{file_id}")
+async def delete_file(file_id: str, user=Depends(get_current_user)):
+    file_doc = await db.files.find_one({"id": file_id, "user_id": user["id"]}, {"_id": 0, "content_text": 0})
+    if not file_doc:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    result = await delete_user_files(user["id"], [file_doc])
+    return {"message": "File deleted", **result}
+
+BULK_DELETE_MAX_FILES = 1000
+
+class BulkDeleteRequest(BaseModel):
+    file_ids: List[str]
+
+@api_router.post("/files/bulk-delete")
+async def bulk_delete_files(data: BulkDeleteRequest, user=Depends(get_current_user)):
+    """Delete many of the user's files at once; ids that are not the user's are reported as not found"""
+    if len(data.file_ids) > BULK_DELETE_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files (max {BULK_DELETE_MAX_FILES} per request)")
+    file_docs = await db.files.find(
+        {"id": {"$in": data.file_ids}, "user_id": user["id"]}, {"_id": 0, "content_text": 0}
+    ).to_list(None)
+    found = {f["id"] for f in file_docs}
+    not_found = [fid for fid in dict.fromkeys(data.file_ids) if fid not in found]
+    if not file_docs:
+        return {"message": "No files deleted", "deleted": 0, "not_found": not_found,
+                "embeddings_removed": 0, "affected_projects": []}
+    
+    result = await delete_user_files(user["id"], file_docs)
+    return {"message": f"{len(file_docs)} file(s) deleted", "deleted": len(file_docs), "not_found": not_found, **result}
+
 @api_router.post("/files/summarize")
 async def summarize_files(data: SummarizeRequest, user=Depends(get_current_user)):
     files = await db.files.find(
@@ -1234,17 +2076,156 @@ async def summarize_files(data: SummarizeRequest, user=Depends(get_current_user)
     ).to_list(50)
     if not files:
         raise HTTPException(status_code=404, detail="No files found")
-    article = await generate_article(files, data.query)
+    article = await generate_article(files, data.query, use_cache=data.use_cache)
     return article
 
 # ==================== AI CHAT ROUTES ====================
 
-# Store chat sessions in memory (for simplicity - could use MongoDB for persistence)
-chat_sessions: Dict[str, list] = {}
+# Chat history lives in the chat_messages collection; recent turns of active
+# sessions are kept in a bounded LRU cache written through on every exchange
+CHAT_HISTORY_MESSAGES = 20
+CHAT_SESSION_CACHE_SIZE = 500
+CHAT_SESSION_TTL_SECONDS = 7 * 24 * 3600
+chat_history_cache: "OrderedDict[tuple, list]" = OrderedDict()  # (user_id, session_id) -> recent messages
+
+def chat_cache_put(key: tuple, messages: list):
+    """Store a session's recent messages, evicting the least recently used sessions"""
+    chat_history_cache[key] = messages[-CHAT_HISTORY_MESSAGES:]
+    chat_history_cache.move_to_end(key)
+    while len(chat_history_cache) > CHAT_SESSION_CACHE_SIZE:
+        chat_history_cache.popitem(last=False)
+
+async def load_chat_history(user_id: str, session_id: str) -> list:
+    """Last CHAT_HISTORY_MESSAGES messages of a session, oldest first"""
+    key = (user_id, session_id)
+    cached = chat_history_cache.get(key)
+    query = {"session_id": session_id, "user_id": user_id}
+    if cached:
+        # Another worker may have written newer turns, cleared the session or let the TTL
+        # expire it; fetch what is past our tail plus our oldest message, which proves the
+        # cached turns still exist
+        query["$or"] = [
+            {"created_at": {"$gt": cached[-1]["created_at"]}},
+            {"created_at": cached[0]["created_at"]}
+        ]
+    docs = await db.chat_messages.find(
+        query, {"_id": 0, "role": 1, "content": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(CHAT_HISTORY_MESSAGES + 1).to_list(CHAT_HISTORY_MESSAGES + 1)
+    if cached:
+        if not any(d["created_at"] == cached[0]["created_at"] for d in docs) and len(docs) <= CHAT_HISTORY_MESSAGES:
+            chat_history_cache.pop(key, None)
+            return await load_chat_history(user_id, session_id)
+        docs = [d for d in docs if d["created_at"] > cached[-1]["created_at"]]
+    messages = (cached or []) + docs[::-1]
+    chat_cache_put(key, messages)
+    return chat_history_cache[key]
+
+def stored_datetime(value: datetime) -> datetime:
+    """A datetime as Mongo hands it back: naive UTC at millisecond precision"""
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+async def append_chat_messages(user_id: str, session_id: str, messages: list):
+    """Persist new messages of a session and write them through to the cache"""
+    docs = [{"session_id": session_id, "user_id": user_id, **m, "created_at": stored_datetime(m["created_at"])} for m in messages]
+    await db.chat_messages.insert_many([dict(d) for d in docs])
+    key = (user_id, session_id)
+    if key in chat_history_cache:
+        chat_cache_put(key, chat_history_cache[key] + [
+            {"role": d["role"], "content": d["content"], "created_at": d["created_at"]} for d in docs
+        ])
 
 # Reindex progress tracking
 reindex_tasks: Dict[str, dict] = {}  # task_id -> {processed, total, status, errors}
 
+# Rendered archive overviews per user, dropped whenever a file the user can see is
+# added, removed, re-tagged or changes visibility; the TTL covers other workers' writes
+OVERVIEW_CACHE_TTL_SECONDS = 300
+OVERVIEW_CACHE_SIZE = 500
+overview_cache: "OrderedDict[str, dict]" = OrderedDict()  # user_id -> {"text", "tokens", "cached_at"}
+token_encoder = None
+
+def count_tokens(text: str) -> int:
+    """Token count of a prompt fragment (chars/4 estimate if tiktoken's encoding can't be loaded)"""
+    global token_encoder
+    if token_encoder is None:
+        try:
+            import tiktoken
+            token_encoder = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+            token_encoder = False
+    if token_encoder:
+        return len(token_encoder.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text that fits in max_tokens"""
+    if max_tokens <= 0:
+        return ""
+    if token_encoder:
+        tokens = token_encoder.encode(text)
+        return text if len(tokens) <= max_tokens else token_encoder.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+# Upper bound on system prompt plus history tokens sent with each chat turn
+PROMPT_TOKEN_BUDGET = int(os.environ.get('PROMPT_TOKEN_BUDGET', '12000'))
+
+def fit_prompt_sections(label: str, base: str, sections: list, budget: int = PROMPT_TOKEN_BUDGET) -> dict:
+    """Fill a token budget with prompt sections by priority and log what each section used.
+    base (instructions) is always kept. sections is [(name, items)] highest priority first;
+    each section keeps its items in order until the budget runs out, truncating the item
+    that crosses it. Returns {name: kept_items}."""
+    remaining = budget - count_tokens(base)
+    usage = {"base": budget - remaining}
+    kept = {}
+    for name, items in sections:
+        kept[name] = []
+        used = 0
+        for item in items:
+            if remaining <= 0:
+                break
+            tokens = count_tokens(item)
+            if tokens > remaining:
+                item = truncate_to_tokens(item, remaining)
+                tokens = remaining
+            kept[name].append(item)
+            used += tokens
+            remaining -= tokens
+        usage[name] = used
+        if len(kept[name]) < len(items):
+            logger.info(f"{label} prompt: kept {len(kept[name])}/{len(items)} {name} items within budget")
+    breakdown = ", ".join(f"{name}={tokens}" for name, tokens in usage.items())
+    logger.info(f"{label} prompt tokens: {breakdown}, total={budget - remaining}/{budget}")
+    return kept
+
+def fit_history(history: list, kept_contents: list) -> list:
+    """Messages matching the newest-first contents fit_prompt_sections kept, oldest first"""
+    recent = history[len(history) - len(kept_contents):]
+    return [{**msg, "content": content} for msg, content in zip(recent, reversed(kept_contents))]
+
+def invalidate_overview_context(user_id: str, is_public: bool):
+    """Drop cached overviews affected by a change to one of user_id's files.
+    Public files appear in every user's overview, so those clear the whole cache."""
+    if is_public:
+        overview_cache.clear()
+    else:
+        overview_cache.pop(user_id, None)
+
+async def get_cached_file_context(user_id: str) -> dict:
+    """Archive overview for chat as {"text", "tokens"}, rendered at most once per change"""
+    entry = overview_cache.get(user_id)
+    if entry and time.monotonic() - entry["cached_at"] < OVERVIEW_CACHE_TTL_SECONDS:
+        overview_cache.move_to_end(user_id)
+        return entry
+    text = await get_user_file_context(user_id)
+    entry = {"text": text, "tokens": count_tokens(text), "cached_at": time.monotonic()}
+    overview_cache[user_id] = entry
+    overview_cache.move_to_end(user_id)
+    while len(overview_cache) > OVERVIEW_CACHE_SIZE:
+        overview_cache.popitem(last=False)
+    return entry
+
 async def get_user_file_context(user_id: str, limit: int = 20) -> str:
     """Get a summary of user's files for AI context"""
     files = await db.files.find(
@@ -1316,20 +2297,103 @@ async def get_rag_context(query: str, user_id: str, priority_file_ids: List[str]
     
     return "\n".join(context_parts), sources
 
-@api_router.post("/chat")
-async def chat_with_ai(data: ChatRequest, user=Depends(get_current_user)):
-    """AI chat endpoint with RAG-based file context awareness"""
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=503, detail="AI service not configured")
-    
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        # Get or create session
-        session_id = data.session_id or f"chat-{user['id']}-{uuid.uuid4()}"
-        
-        # Build system message with file context
-        system_message = """You are the AI Archivist, an intelligent assistant for a multimedia archive application. 
+async def stream_llm_reply(system_message: str, history: list, user_text: str):
+    """Yield the assistant's reply text as it is generated"""
+    async for delta in llm.stream(build_llm_messages(system_message, history, user_text)):
+        yield delta
+
+def sse_format(event: str, data: dict) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_chat_response(request: Request, prepare, idempotency: Optional[tuple] = None, fingerprint: str = ""):
+    """SSE response for a chat turn. prepare() returns (prelude, system_message, history,
+    user_text, on_complete); the stream carries the prelude events (e.g. sources), then a
+    token event per delta, then a done event with whatever on_complete(full_text) returns
+    once persisted. The turn runs like run_cancellable() calls: a keyed retry replays the
+    events so far and follows the generation already running instead of starting another."""
+    import asyncio
+    entry = get_idempotent_call(idempotency, fingerprint) if idempotency else None
+    if entry is None:
+        prelude, system_message, history, user_text, on_complete = await prepare()
+        # A retry may have started the same turn while this one was preparing
+        entry = get_idempotent_call(idempotency, fingerprint) if idempotency else None
+    if entry is None:
+        feed = {"events": list(prelude), "signal": asyncio.Event()}
+
+        def emit(event: str, data: dict):
+            feed["events"].append((event, data))
+            feed["signal"].set()
+            feed["signal"] = asyncio.Event()
+
+        async def generate():
+            parts = []
+            try:
+                async for delta in stream_llm_reply(system_message, history, user_text):
+                    parts.append(delta)
+                    emit("token", {"text": delta})
+            except Exception as e:
+                logger.error(f"Chat stream error: {e}")
+                emit("error", {"detail": f"Chat failed: {str(e)}"})
+                raise
+            # Once the reply is complete it is saved even if every client has gone
+            emit("done", await asyncio.shield(on_complete("".join(parts))))
+
+        entry = start_idempotent_call(idempotency, fingerprint, generate, LLM_STREAM_TIMEOUT_SECONDS)
+        entry["feed"] = feed
+        entry["task"].add_done_callback(lambda task: feed["signal"].set())
+
+    async def event_generator():
+        feed, task = entry["feed"], entry["task"]
+        entry["waiters"] += 1
+        sent = 0
+        try:
+            while True:
+                signal, finished = feed["signal"], task.done()
+                while sent < len(feed["events"]):
+                    event, data = feed["events"][sent]
+                    sent += 1
+                    yield sse_format(event, data)
+                if finished:
+                    break
+                await signal.wait()
+            if not task.cancelled() and isinstance(task.exception(), asyncio.TimeoutError):
+                yield sse_format("error", {"detail": "AI service timed out"})
+        finally:
+            # A disconnect while tokens are flowing cancels the upstream stream (keyed
+            # turns wait a grace period for a retry first)
+            entry["waiters"] -= 1
+            release_call(entry)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def gather_context_stages(label: str, **stages) -> dict:
+    """Await independent context stages concurrently and log how long each one took.
+    Returns {stage_name: result}."""
+    import asyncio
+    timings = {}
+
+    async def timed(name, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            timings[name] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed(name, coro) for name, coro in stages.items()))
+    breakdown = ", ".join(f"{name}={timings[name]:.0f}ms" for name in stages)
+    logger.info(f"{label} context: {breakdown}, total={(time.perf_counter() - started) * 1000:.0f}ms")
+    return dict(zip(stages, results))
+
+async def build_archive_chat_prompt(data: ChatRequest, user: dict, session_id: str) -> tuple:
+    """System message for archive chat with RAG and overview context, plus the session's
+    recent history. Returns (system_message, sources, history)."""
+    system_message = """You are the AI Archivist, an intelligent assistant for a multimedia archive application. 
 You help users with:
 - Finding and searching their archived files
 - Summarizing content from their documents
@@ -1342,69 +2406,121 @@ file content, use the RELEVANT CONTENT section provided - this contains the most
 information from the user's archive that matches their query. Always cite which file the 
 information comes from."""
 
-        # Get RAG-based context (semantic search for relevant content)
-        rag_context, rag_sources = await get_rag_context(data.message, user["id"], data.priority_file_ids)
-        if rag_context:
-            system_message += f"\n\n{rag_context}"
-        
-        # Also include general file overview if requested
-        if data.include_file_context:
-            file_context = await get_user_file_context(user["id"])
-            system_message += f"\n\nGeneral archive overview:\n{file_context}"
-        
-        # Initialize chat
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=system_message
-        )
-        chat.with_model("openai", "gpt-5.2")
-        
-        # Get chat history for this session
-        if session_id in chat_sessions:
-            for msg in chat_sessions[session_id]:
-                if msg["role"] == "user":
-                    chat.messages.append({"role": "user", "content": msg["content"]})
-                else:
-                    chat.messages.append({"role": "assistant", "content": msg["content"]})
-        
-        # Send message and get response
-        response = await chat.send_message(UserMessage(text=data.message))
+    # RAG (semantic search for relevant content), history and the overview are independent
+    stages = {
+        "rag": get_rag_context(data.message, user["id"], data.priority_file_ids),
+        "history": load_chat_history(user["id"], session_id),
+    }
+    if data.include_file_context:
+        stages["overview"] = get_cached_file_context(user["id"])
+    context = await gather_context_stages("chat", **stages)
+    
+    rag_context, rag_sources = context["rag"]
+    history = context["history"]
+    kept = fit_prompt_sections("chat", system_message, [
+        ("rag", [rag_context] if rag_context else []),
+        ("history", [m["content"] for m in reversed(history)]),
+        ("overview", [context["overview"]["text"]] if data.include_file_context else []),
+    ])
+    if kept["rag"]:
+        system_message += f"\n\n{kept['rag'][0]}"
+    
+    # Also include general file overview if requested
+    if kept["overview"]:
+        system_message += f"\n\nGeneral archive overview:\n{kept['overview'][0]}"
+    
+    return system_message, rag_sources, fit_history(history, kept["history"])
+
+def new_chat_session_id(user_id: str, idempotency_key: Optional[str]) -> str:
+    """Id for a session started by a chat turn; retries under the same Idempotency-Key get the same id"""
+    suffix = uuid.uuid5(uuid.NAMESPACE_URL, idempotency_key) if idempotency_key else uuid.uuid4()
+    return f"chat-{user_id}-{suffix}"
+
+@api_router.post("/chat")
+async def chat_with_ai(data: ChatRequest, request: Request, user=Depends(get_current_user),
+                       idempotency_key: Optional[str] = Header(None)):
+    """AI chat endpoint with RAG-based file context awareness"""
+    import asyncio
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    # Get or create session
+    session_id = data.session_id or new_chat_session_id(user["id"], idempotency_key)
+    
+    async def chat_turn() -> dict:
+        # Build system message with file context
+        system_message, rag_sources, history = await build_archive_chat_prompt(data, user, session_id)
         
-        # Store in session history
-        if session_id not in chat_sessions:
-            chat_sessions[session_id] = []
-        chat_sessions[session_id].append({"role": "user", "content": data.message})
-        chat_sessions[session_id].append({"role": "assistant", "content": response})
+        # Send message with the session's history and get response
+        asked_at = datetime.now(timezone.utc)
+        response = await llm.complete(build_llm_messages(system_message, history, data.message))
         
-        # Keep only last 20 messages per session
-        if len(chat_sessions[session_id]) > 20:
-            chat_sessions[session_id] = chat_sessions[session_id][-20:]
+        # Store in session history; once the reply exists a disconnect no longer discards it
+        await asyncio.shield(append_chat_messages(user["id"], session_id, [
+            {"role": "user", "content": data.message, "created_at": asked_at},
+            {"role": "assistant", "content": response, "created_at": datetime.now(timezone.utc)}
+        ]))
         
         return {
             "response": response,
             "session_id": session_id,
             "sources": rag_sources if rag_sources else []
         }
-        
+    
+    try:
+        return await run_cancellable(
+            request, chat_turn,
+            idempotency=idempotency_scope(user["id"], request, idempotency_key),
+            fingerprint=request_fingerprint(data.session_id, data.message, files=data.priority_file_ids)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
+@api_router.post("/chat/stream")
+async def chat_with_ai_stream(data: ChatRequest, request: Request, user=Depends(get_current_user),
+                              idempotency_key: Optional[str] = Header(None)):
+    """Streaming variant of /chat: sources event, token events, then done once the turn is saved"""
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    session_id = data.session_id or new_chat_session_id(user["id"], idempotency_key)
+    
+    async def prepare() -> tuple:
+        system_message, rag_sources, history = await build_archive_chat_prompt(data, user, session_id)
+        asked_at = datetime.now(timezone.utc)
+        
+        async def save_turn(response: str) -> dict:
+            await append_chat_messages(user["id"], session_id, [
+                {"role": "user", "content": data.message, "created_at": asked_at},
+                {"role": "assistant", "content": response, "created_at": datetime.now(timezone.utc)}
+            ])
+            return {"session_id": session_id}
+        
+        prelude = [("sources", {"session_id": session_id, "sources": rag_sources})]
+        return prelude, system_message, history, data.message, save_turn
+    
+    return await stream_chat_response(
+        request, prepare,
+        idempotency=idempotency_scope(user["id"], request, idempotency_key),
+        fingerprint=request_fingerprint(data.session_id, data.message, files=data.priority_file_ids)
+    )
+
 @api_router.get("/chat/sessions")
 async def get_chat_session(session_id: Optional[str] = None, user=Depends(get_current_user)):
     """Get chat history for a session"""
     if not session_id:
         return {"messages": []}
-    if session_id in chat_sessions:
-        return {"messages": chat_sessions[session_id]}
-    return {"messages": []}
+    history = await load_chat_history(user["id"], session_id)
+    return {"messages": [{"role": m["role"], "content": m["content"]} for m in history]}
 
 @api_router.delete("/chat/sessions/{session_id}")
 async def clear_chat_session(session_id: str, user=Depends(get_current_user)):
     """Clear a chat session"""
-    if session_id in chat_sessions:
-        del chat_sessions[session_id]
+    await db.chat_messages.delete_many({"session_id": session_id, "user_id": user["id"]})
+    chat_history_cache.pop((user["id"], session_id), None)
     return {"message": "Session cleared"}
 
 @api_router.post("/chat/speech-to-text")
@@ -1455,7 +2571,7 @@ async def speech_to_text(
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
 @api_router.post("/chat/text-to-speech")
-async def text_to_speech(data: TTSRequest, user=Depends(get_current_user)):
+async def text_to_speech(data: TTSRequest, request: Request, user=Depends(get_current_user)):
     """Convert text to speech audio using OpenAI TTS"""
     if not EMERGENT_LLM_KEY:
         raise HTTPException(status_code=503, detail="AI service not configured")
@@ -1468,14 +2584,14 @@ async def text_to_speech(data: TTSRequest, user=Depends(get_current_user)):
         
         tts = OpenAITextToSpeech(api_key=EMERGENT_LLM_KEY)
         
-        # Generate speech
-        audio_bytes = await tts.generate_speech(
+        # Generate speech, abandoning it if the client goes away
+        audio_bytes = await run_cancellable(request, lambda: tts.generate_speech(
             text=data.text,
             model="tts-1",
             voice=data.voice,
             speed=data.speed,
             response_format="mp3"
-        )
+        ), timeout=TTS_TIMEOUT_SECONDS)
         
         # Return as base64 for easy frontend handling
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
@@ -1485,11 +2601,95 @@ async def text_to_speech(data: TTSRequest, user=Depends(get_current_user)):
             "format": "mp3"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Text-to-speech error: {e}")
         raise HTTPException(status_code=500, detail=f"Speech generation failed: {str(e)}")
 
-# ==================== PROJECT ROUTES ====================
+# ==================== CONVERSATION COMPACTION ====================
+
+# Project and story chats send a running summary of older turns plus the recent raw
+# turns. Once COMPACTION_BATCH_MESSAGES messages have left the recent window they are
+# folded into the summary in the background.
+COMPACTION_RECENT_MESSAGES = 20
+COMPACTION_BATCH_MESSAGES = 10
+COMPACTION_MESSAGE_TOKENS = 1000  # per-message cap in the summarizer's transcript
+compactions_running: set = set()
+
+COMPACTION_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Merge the new messages into the current summary. Keep facts, decisions, names, open questions
+and the user's stated preferences; drop pleasantries and repetition. Write compact prose of at
+most 400 words. Reply with the updated summary only."""
+
+async def load_compacted_history(scope: str, collection, query: dict) -> tuple:
+    """Running summary for a conversation and the messages not yet folded into it, oldest
+    first. Returns (summary, messages)."""
+    import asyncio
+    limit = COMPACTION_RECENT_MESSAGES + COMPACTION_BATCH_MESSAGES
+    state, total, recent = await asyncio.gather(
+        db.conversation_summaries.find_one({"scope": scope}, {"_id": 0}),
+        collection.count_documents(query),
+        # A user message and its reply can share created_at; _id keeps them in insertion order
+        collection.find(query, {"_id": 0}).sort([("created_at", -1), ("_id", -1)]).limit(limit).to_list(limit)
+    )
+    recent.reverse()
+    if not state:
+        return "", recent
+    first_index = total - len(recent)
+    already_summarized = max(0, state["message_count"] - first_index)
+    return state["summary"], recent[already_summarized:]
+
+async def compact_conversation(scope: str, collection, query: dict):
+    """Fold messages that have left the recent window into the conversation's running summary"""
+    if scope in compactions_running or not EMERGENT_LLM_KEY:
+        return
+    compactions_running.add(scope)
+    try:
+        state = await db.conversation_summaries.find_one({"scope": scope}, {"_id": 0}) or {}
+        covered = state.get("message_count", 0)
+        pending = await collection.count_documents(query) - COMPACTION_RECENT_MESSAGES - covered
+        if pending < COMPACTION_BATCH_MESSAGES:
+            return
+        older = await collection.find(
+            query, {"_id": 0, "role": 1, "content": 1}
+        ).sort([("created_at", 1), ("_id", 1)]).skip(covered).limit(pending).to_list(pending)
+        transcript = "\n\n".join(
+            f"{m['role'].upper()}: {truncate_to_tokens(m['content'], COMPACTION_MESSAGE_TOKENS)}" for m in older
+        )
+
+        summary = await llm.complete(build_llm_messages(
+            COMPACTION_SYSTEM_PROMPT,
+            user_text=f"Current summary:\n{state.get('summary') or '(none yet)'}\n\nNew messages:\n{transcript}"
+        ))
+
+        await db.conversation_summaries.update_one(
+            {"scope": scope},
+            {"$set": {
+                "summary": summary.strip(),
+                "message_count": covered + len(older),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+        logger.info(f"Compacted {len(older)} messages into summary for {scope}")
+    except Exception as e:
+        logger.error(f"Conversation compaction failed for {scope}: {e}")
+    finally:
+        compactions_running.discard(scope)
+
+def schedule_compaction(scope: str, collection, query: dict):
+    """Run compact_conversation in the background after a new exchange is saved"""
+    import asyncio
+    asyncio.create_task(compact_conversation(scope, collection, query))
+
+def project_chat_scope(project_id: str) -> str:
+    return f"project:{project_id}"
+
+def story_chat_scope(story_id: str, chapter_id: Optional[str]) -> str:
+    return f"story:{story_id}:{chapter_id or 'general'}"
+
+# ==================== PROJECT ROUTES ====================
 
 @api_router.post("/projects")
 async def create_project(data: ProjectCreate, user=Depends(get_current_user)):
@@ -1515,7 +2715,8 @@ async def create_project(data: ProjectCreate, user=Depends(get_current_user)):
         "file_ids": valid_ids,
         "created_at": now,
         "updated_at": now,
-        "last_message_at": None
+        "last_message_at": None,
+        "message_count": 0
     }
     await db.projects.insert_one(project_doc)
     project_doc.pop("_id", None)
@@ -1534,8 +2735,9 @@ async def create_project(data: ProjectCreate, user=Depends(get_current_user)):
         await db.project_messages.insert_one(summary_msg)
         await db.projects.update_one(
             {"id": project_id},
-            {"$set": {"last_message_at": now_msg, "updated_at": now_msg}}
+            {"$set": {"last_message_at": now_msg, "updated_at": now_msg}, "$inc": {"message_count": 1}}
         )
+        project_doc["message_count"] = 1
     
     return project_doc
 
@@ -1547,11 +2749,10 @@ async def list_projects(user=Depends(get_current_user)):
         {"_id": 0}
     ).sort("updated_at", -1).to_list(100)
     
-    # Enrich with file count and message count
+    # Enrich with file count; message_count is stored on the project
+    await ensure_parent_counts("message_count", projects)
     for p in projects:
         p["file_count"] = len(p.get("file_ids", []))
-        msg_count = await db.project_messages.count_documents({"project_id": p["id"]})
-        p["message_count"] = msg_count
         if "status" not in p:
             p["status"] = "inactive" if p["file_count"] == 0 else "active"
     
@@ -1578,8 +2779,7 @@ async def get_project(project_id: str, user=Depends(get_current_user)):
         project["files"] = []
     
     project["file_count"] = len(project.get("files", []))
-    msg_count = await db.project_messages.count_documents({"project_id": project_id})
-    project["message_count"] = msg_count
+    await ensure_parent_counts("message_count", [project])
     if "status" not in project:
         project["status"] = "inactive" if project["file_count"] == 0 else "active"
     
@@ -1608,6 +2808,8 @@ async def update_project(project_id: str, data: ProjectUpdate, user=Depends(get_
         update_fields["status"] = "active" if update_fields["file_ids"] else "inactive"
     
     await db.projects.update_one({"id": project_id}, {"$set": update_fields})
+    invalidate_project_digests(project_id=project_id)
+    invalidate_project_index(project_id=project_id)
     
     updated = await db.projects.find_one({"id": project_id}, {"_id": 0})
     return updated
@@ -1637,6 +2839,8 @@ async def append_to_project(project_id: str, data: ProjectAppend, user=Depends(g
         {"id": project_id},
         {"$set": {"file_ids": merged_ids, "updated_at": now, "status": "active" if merged_ids else "inactive"}}
     )
+    invalidate_project_digests(project_id=project_id)
+    invalidate_project_index(project_id=project_id)
     
     # Add summary as a new assistant message
     if data.summary:
@@ -1651,7 +2855,7 @@ async def append_to_project(project_id: str, data: ProjectAppend, user=Depends(g
         await db.project_messages.insert_one(summary_msg)
         await db.projects.update_one(
             {"id": project_id},
-            {"$set": {"last_message_at": now}}
+            {"$set": {"last_message_at": now}, "$inc": {"message_count": 1}}
         )
     
     added_count = len(merged_ids) - len(existing_file_ids)
@@ -1662,6 +2866,13 @@ async def append_to_project(project_id: str, data: ProjectAppend, user=Depends(g
 @api_router.get("/projects/{project_id}/export-pdf")
 async def export_project_pdf(project_id: str, user=Depends(get_current_user)):
     """Export project content (messages + file list) as a PDF"""
+    return await singleflight(
+        ("export_project_pdf", project_id, user["id"]),
+        lambda: render_project_pdf(project_id, user["id"])
+    )
+
+async def render_project_pdf(project_id: str, user_id: str) -> Response:
+    """Build the project PDF export response"""
     from fpdf import FPDF
     import textwrap
     
@@ -1679,7 +2890,7 @@ async def export_project_pdf(project_id: str, user=Depends(get_current_user)):
         # Remove any remaining non-latin1 characters
         return text.encode('latin-1', 'replace').decode('latin-1')
     
-    project = await db.projects.find_one({"id": project_id, "user_id": user["id"]})
+    project = await db.projects.find_one({"id": project_id, "user_id": user_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -1848,25 +3059,94 @@ async def delete_project(project_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Project not found")
     
     await db.project_messages.delete_many({"project_id": project_id})
+    await db.conversation_summaries.delete_one({"scope": project_chat_scope(project_id)})
     await db.projects.delete_one({"id": project_id})
+    invalidate_project_digests(project_id=project_id)
+    invalidate_project_index(project_id=project_id)
     
     return {"message": "Project deleted"}
 
 @api_router.get("/projects/{project_id}/messages")
-async def get_project_messages(project_id: str, user=Depends(get_current_user)):
-    """Get all chat messages for a project"""
+async def get_project_messages(
+    project_id: str,
+    limit: int = MESSAGE_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    user=Depends(get_current_user)
+):
+    """Get a project's chat messages, newest page first (see page_messages)"""
     project = await db.projects.find_one({"id": project_id, "user_id": user["id"]})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    messages = await db.project_messages.find(
-        {"project_id": project_id},
-        {"_id": 0}
-    ).sort("created_at", 1).to_list(500)
-    
-    return {"messages": messages, "project_id": project_id}
+    page = await page_messages(db.project_messages, {"project_id": project_id}, limit, cursor, since)
+    return {**page, "project_id": project_id}
+
+# Project chat retrieval keeps, per project, a matrix of its files' unit-normalized chunk
+# embeddings built on first use, so a query is one matrix-vector product. Entries carry
+# the file set they were built from, are dropped when a member file is re-embedded or
+# deleted, and are evicted least recently used beyond PROJECT_INDEX_MAX_BYTES.
+PROJECT_INDEX_MAX_BYTES = int(os.environ.get('PROJECT_INDEX_MAX_BYTES', str(256 * 1024 * 1024)))
+project_vector_index: "OrderedDict[str, dict]" = OrderedDict()
+project_vector_index_bytes = 0
+project_index_generation = 0  # bumped whenever a file's embeddings change
+
+def invalidate_project_index(file_id: Optional[str] = None, project_id: Optional[str] = None):
+    """Drop the vector sub-index of a project, or of every project containing a file"""
+    global project_vector_index_bytes, project_index_generation
+    if file_id is not None:
+        project_index_generation += 1
+    keys = [project_id] if project_id in project_vector_index else []
+    if file_id is not None:
+        keys += [k for k, entry in project_vector_index.items() if file_id in entry["file_ids"] and k != project_id]
+    for key in keys:
+        project_vector_index_bytes -= project_vector_index.pop(key)["nbytes"]
+
+async def build_project_index(file_ids: List[str], dim: int) -> dict:
+    """Normalized embedding matrix and chunk metadata for a set of files"""
+    import numpy as np
+    embeddings = await db.embeddings.find(
+        {"file_id": {"$in": file_ids}},
+        {"_id": 0, "file_id": 1, "chunk_text": 1, "chunk_index": 1, "embedding": 1}
+    ).to_list(5000)
+    rows = [e for e in embeddings if e.get("embedding") and len(e["embedding"]) == dim]
+    matrix = np.array([e["embedding"] for e in rows], dtype=np.float32).reshape(len(rows), dim)
+    norms = np.linalg.norm(matrix, axis=1)
+    keep = norms > 0
+    matrix = matrix[keep] / norms[keep][:, None]
+    chunks = [(e["file_id"], e["chunk_text"], e.get("chunk_index", 0)) for e, k in zip(rows, keep) if k]
+    return {
+        "file_ids": frozenset(file_ids),
+        "dim": dim,
+        "matrix": matrix,
+        "chunks": chunks,
+        "nbytes": matrix.nbytes + sum(len(c[1]) for c in chunks)
+    }
 
-async def get_project_rag_context(query: str, file_ids: List[str]) -> tuple:
+async def get_project_index(project_id: str, file_ids: List[str], dim: int) -> dict:
+    """Warm vector sub-index for a project, built once per file set"""
+    global project_vector_index_bytes
+    entry = project_vector_index.get(project_id)
+    if entry and entry["file_ids"] == frozenset(file_ids) and entry["dim"] == dim:
+        project_vector_index.move_to_end(project_id)
+        return entry
+    generation = project_index_generation
+    entry = await singleflight(
+        # A caller arriving after a re-embed must not join a build of the old vectors
+        ("project_index", project_id, tuple(sorted(file_ids)), dim, generation),
+        lambda: build_project_index(file_ids, dim)
+    )
+    if generation != project_index_generation:
+        return entry  # embeddings changed mid-build; use it once but don't keep it
+    invalidate_project_index(project_id=project_id)
+    project_vector_index[project_id] = entry
+    project_vector_index_bytes += entry["nbytes"]
+    while project_vector_index_bytes > PROJECT_INDEX_MAX_BYTES and len(project_vector_index) > 1:
+        _, evicted = project_vector_index.popitem(last=False)
+        project_vector_index_bytes -= evicted["nbytes"]
+    return entry
+
+async def get_project_rag_context(query: str, file_ids: List[str], project_id: str) -> tuple:
     """Get RAG context scoped to project files only"""
     if not openai_client or not file_ids:
         return "", []
@@ -1876,47 +3156,40 @@ async def get_project_rag_context(query: str, file_ids: List[str]) -> tuple:
         if not query_embedding:
             return "", []
         
-        # Only search embeddings for project files
-        embeddings = await db.embeddings.find(
-            {"file_id": {"$in": file_ids}}
-        ).to_list(5000)
-        
-        if not embeddings:
-            return "", []
-        
         import numpy as np
-        query_vec = np.array(query_embedding)
+        query_vec = np.array(query_embedding, dtype=np.float32)
         query_norm = np.linalg.norm(query_vec)
         
         if query_norm == 0:
             return "", []
         
-        results = []
-        for emb in embeddings:
-            embedding_vec = emb.get("embedding")
-            if embedding_vec and len(embedding_vec) == len(query_embedding):
-                emb_vec = np.array(embedding_vec)
-                emb_norm = np.linalg.norm(emb_vec)
-                if emb_norm > 0:
-                    similarity = np.dot(query_vec, emb_vec) / (query_norm * emb_norm)
-                    if similarity > 0.3:
-                        results.append({
-                            "file_id": emb["file_id"],
-                            "chunk_text": emb["chunk_text"],
-                            "chunk_index": emb.get("chunk_index", 0),
-                            "similarity": float(similarity)
-                        })
+        # Only search embeddings for project files
+        index = await get_project_index(project_id, file_ids, len(query_embedding))
+        if not index["chunks"]:
+            return "", []
         
-        results.sort(key=lambda x: x["similarity"], reverse=True)
-        top_results = results[:5]
+        similarities = index["matrix"] @ (query_vec / query_norm)
+        matches = np.flatnonzero(similarities > 0.3)
+        top = matches[np.argsort(-similarities[matches], kind="stable")][:5]
+        top_results = [
+            {"file_id": index["chunks"][i][0], "chunk_text": index["chunks"][i][1],
+             "chunk_index": index["chunks"][i][2], "similarity": float(similarities[i])}
+            for i in top
+        ]
         
         context_parts = ["Relevant content from the project files (cite source file names when using this):"]
         sources = []
         seen_files = set()
         seen_source_files = set()
+        file_docs = {
+            f["id"]: f for f in await db.files.find(
+                {"id": {"$in": list({chunk["file_id"] for chunk in top_results})}},
+                {"_id": 0, "original_filename": 1, "file_type": 1, "id": 1}
+            ).to_list(5)
+        }
         
         for chunk in top_results:
-            file_doc = await db.files.find_one({"id": chunk["file_id"]}, {"original_filename": 1, "file_type": 1, "id": 1})
+            file_doc = file_docs.get(chunk["file_id"])
             if not file_doc:
                 continue
             filename = file_doc.get("original_filename", "Unknown")
@@ -1944,42 +3217,36 @@ async def get_project_rag_context(query: str, file_ids: List[str]) -> tuple:
         logger.error(f"Error in project RAG: {e}", exc_info=True)
         return "", []
 
-@api_router.post("/projects/{project_id}/chat")
-async def project_chat(project_id: str, data: ProjectChatRequest, user=Depends(get_current_user)):
-    """Chat within a project context — RAG scoped to project files, messages persisted"""
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=503, detail="AI service not configured")
+async def build_project_chat_prompt(project: dict, message: str) -> tuple:
+    """System message scoped to a project's files plus project RAG, and the project's recent
+    history. Returns (system_message, sources, history)."""
+    file_ids = project.get("file_ids", [])
     
-    project = await db.projects.find_one({"id": project_id, "user_id": user["id"]})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    # File listing, RAG scoped to project files and history are independent
+    context = await gather_context_stages(
+        "project chat",
+        files=load_project_digests(project),
+        rag=get_project_rag_context(message, file_ids, project["id"]),
+        history=load_project_history(project["id"])
+    )
     
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        file_ids = project.get("file_ids", [])
-        
-        # Build system message scoped to project
-        file_list_parts = []
-        file_content_parts = []
-        if file_ids:
-            project_files = await db.files.find(
-                {"id": {"$in": file_ids}},
-                {"_id": 0, "original_filename": 1, "file_type": 1, "tags": 1, "content_text": 1}
-            ).to_list(100)
-            for f in project_files:
-                tags = ", ".join(f.get("tags", [])[:5]) if f.get("tags") else "no tags"
-                file_list_parts.append(f"- {f['original_filename']} ({f['file_type']}): tags=[{tags}]")
-                # Include actual content so AI can always answer about files
-                ct = f.get("content_text", "")
-                if ct:
-                    file_content_parts.append(f"=== {f['original_filename']} ===\n{ct[:3000]}")
-        
+    # Build system message scoped to project
+    file_list_parts = []
+    file_content_parts = []
+    if file_ids:
+        for f in context["files"]:
+            tags = ", ".join(f.get("tags", [])[:5]) if f.get("tags") else "no tags"
+            file_list_parts.append(f"- {f['original_filename']} ({f['file_type']}): tags=[{tags}]")
+            # Include each file's digest so AI can always answer about files
+            if f.get("digest"):
+                file_content_parts.append(f"=== {f['original_filename']} ===\n{f['digest']}")
+    
+    def render_system_message(file_content_parts):
         file_content_section = ""
         if file_content_parts:
-            file_content_section = "\n\nFILE CONTENTS (use this to answer questions about the files):\n" + "\n\n".join(file_content_parts)
+            file_content_section = "\n\nFILE DIGESTS (summaries and key passages; use these to answer questions about the files):\n" + "\n\n".join(file_content_parts)
         
-        system_message = f"""You are the AI Archivist working on the project "{project['name']}".
+        return f"""You are the AI Archivist working on the project "{project['name']}".
 {f'Project description: {project["description"]}' if project.get("description") else ''}
 
 This project has {len(file_ids)} selected file(s):
@@ -1988,79 +3255,126 @@ This project has {len(file_ids)} selected file(s):
 
 You help the user analyze, summarize, and discuss the content of these project files.
 Be helpful, concise, and always cite which file the information comes from.
-When answering questions about file content, use the FILE CONTENTS and RELEVANT CONTENT sections."""
-
-        # Get RAG context scoped to project files
-        rag_context, rag_sources = await get_project_rag_context(data.message, file_ids)
-        if rag_context:
-            system_message += f"\n\n{rag_context}"
-        
-        # Initialize chat
-        session_id = f"project-{project_id}"
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=system_message
-        )
-        chat.with_model("openai", "gpt-5.2")
-        
-        # Load existing project messages for context
-        existing_messages = await db.project_messages.find(
-            {"project_id": project_id},
-            {"_id": 0}
-        ).sort("created_at", 1).to_list(50)
-        
-        # Add last N messages for context (limit to avoid token overflow)
-        recent = existing_messages[-20:] if len(existing_messages) > 20 else existing_messages
-        for msg in recent:
-            if msg["role"] == "user":
-                chat.messages.append({"role": "user", "content": msg["content"]})
-            else:
-                chat.messages.append({"role": "assistant", "content": msg["content"]})
-        
-        # Send message
-        response = await chat.send_message(UserMessage(text=data.message))
-        
-        now = datetime.now(timezone.utc).isoformat()
-        
-        # Persist user message
-        user_msg_doc = {
-            "id": str(uuid.uuid4()),
-            "project_id": project_id,
-            "role": "user",
-            "content": data.message,
-            "sources": [],
-            "created_at": now
-        }
-        await db.project_messages.insert_one(user_msg_doc)
+When answering questions about file content, use the FILE DIGESTS and RELEVANT CONTENT sections."""
+
+    rag_context, rag_sources = context["rag"]
+    summary, history = context["history"]
+    kept = fit_prompt_sections("project chat", render_system_message([]), [
+        ("rag", [rag_context] if rag_context else []),
+        ("summary", [summary] if summary else []),
+        ("history", [m["content"] for m in reversed(history)]),
+        ("file_digests", file_content_parts),
+    ])
+    system_message = render_system_message(kept["file_digests"])
+    if kept["rag"]:
+        system_message += f"\n\n{kept['rag'][0]}"
+    if kept["summary"]:
+        system_message += f"\n\nSummary of the earlier conversation:\n{kept['summary'][0]}"
+    
+    return system_message, rag_sources, fit_history(history, kept["history"])
+
+async def load_project_history(project_id: str) -> tuple:
+    """Running summary and recent messages of a project chat. Returns (summary, messages)."""
+    return await load_compacted_history(project_chat_scope(project_id), db.project_messages, {"project_id": project_id})
+
+async def save_project_exchange(project_id: str, message: str, response: str, sources: list):
+    """Persist a user/assistant exchange in a project and bump its activity timestamps"""
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Persist user message
+    user_msg_doc = {
+        "id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "role": "user",
+        "content": message,
+        "sources": [],
+        "created_at": now
+    }
+    await db.project_messages.insert_one(user_msg_doc)
+    
+    # Persist assistant message with sources
+    assistant_msg_doc = {
+        "id": str(uuid.uuid4()),
+        "project_id": project_id,
+        "role": "assistant",
+        "content": response,
+        "sources": sources,
+        "created_at": now
+    }
+    await db.project_messages.insert_one(assistant_msg_doc)
+    
+    # Update project last_message_at
+    await db.projects.update_one(
+        {"id": project_id},
+        {"$set": {"last_message_at": now, "updated_at": now}, "$inc": {"message_count": 2}}
+    )
+    schedule_compaction(project_chat_scope(project_id), db.project_messages, {"project_id": project_id})
+
+@api_router.post("/projects/{project_id}/chat")
+async def project_chat(project_id: str, data: ProjectChatRequest, request: Request, user=Depends(get_current_user),
+                       idempotency_key: Optional[str] = Header(None)):
+    """Chat within a project context — RAG scoped to project files, messages persisted"""
+    import asyncio
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    project = await db.projects.find_one({"id": project_id, "user_id": user["id"]})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    async def chat_turn() -> dict:
+        system_message, rag_sources, history = await build_project_chat_prompt(project, data.message)
         
-        # Persist assistant message with sources
-        assistant_msg_doc = {
-            "id": str(uuid.uuid4()),
-            "project_id": project_id,
-            "role": "assistant",
-            "content": response,
-            "sources": rag_sources,
-            "created_at": now
-        }
-        await db.project_messages.insert_one(assistant_msg_doc)
+        # Send message with recent project history
+        response = await llm.complete(build_llm_messages(system_message, history, data.message))
         
-        # Update project last_message_at
-        await db.projects.update_one(
-            {"id": project_id},
-            {"$set": {"last_message_at": now, "updated_at": now}}
-        )
+        await asyncio.shield(save_project_exchange(project_id, data.message, response, rag_sources))
         
         return {
             "response": response,
             "sources": rag_sources,
             "project_id": project_id
         }
-        
+    
+    try:
+        return await run_cancellable(
+            request, chat_turn,
+            idempotency=idempotency_scope(user["id"], request, idempotency_key),
+            fingerprint=request_fingerprint(project_id, data.message)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Project chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
+@api_router.post("/projects/{project_id}/chat/stream")
+async def project_chat_stream(project_id: str, data: ProjectChatRequest, request: Request, user=Depends(get_current_user),
+                              idempotency_key: Optional[str] = Header(None)):
+    """Streaming variant of project chat: sources event, token events, then done once saved"""
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    
+    project = await db.projects.find_one({"id": project_id, "user_id": user["id"]})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    async def prepare() -> tuple:
+        system_message, rag_sources, history = await build_project_chat_prompt(project, data.message)
+        
+        async def save_turn(response: str) -> dict:
+            await save_project_exchange(project_id, data.message, response, rag_sources)
+            return {"project_id": project_id}
+        
+        prelude = [("sources", {"project_id": project_id, "sources": rag_sources})]
+        return prelude, system_message, history, data.message, save_turn
+    
+    return await stream_chat_response(
+        request, prepare,
+        idempotency=idempotency_scope(user["id"], request, idempotency_key),
+        fingerprint=request_fingerprint(project_id, data.message)
+    )
+
 # ==================== STORY ROUTES ====================
 
 @api_router.post("/stories")
@@ -2075,11 +3389,11 @@ async def create_story(data: StoryCreate, user=Depends(get_current_user)):
         "detected_languages": [],
         "status": "active",
         "created_at": now,
-        "updated_at": now
+        "updated_at": now,
+        "chapter_count": 0
     }
     await db.stories.insert_one(story)
     story.pop("_id", None)
-    story["chapter_count"] = 0
     return story
 
 
@@ -2090,8 +3404,7 @@ async def list_stories(user=Depends(get_current_user)):
         {"user_id": user["id"]},
         {"_id": 0}
     ).sort("updated_at", -1).to_list(100)
-    for s in stories:
-        s["chapter_count"] = await db.chapters.count_documents({"story_id": s["id"]})
+    await ensure_parent_counts("chapter_count", stories)
     return stories
 
 
@@ -2144,19 +3457,7 @@ async def get_audio_export_progress(task_id: str, user=Depends(get_current_user)
     if not task:
         raise HTTPException(status_code=404, detail="Audio export task not found")
     
-    return {
-        "status": task["status"],
-        "story_name": task["story_name"],
-        "voice": task["voice"],
-        "model": task["model"],
-        "total_chapters": task["total_chapters"],
-        "current_chapter": task["current_chapter"],
-        "current_chapter_name": task["current_chapter_name"],
-        "total_characters": task["total_characters"],
-        "characters_processed": task["characters_processed"],
-        "error": task["error"],
-        "has_audio": task.get("audio_file") is not None
-    }
+    return audio_progress_view(task)
 
 
 @api_router.get("/stories/audio-download/{task_id}")
@@ -2194,19 +3495,37 @@ async def download_audio(task_id: str, token: str = None):
     )
 
 
+# Fields returned per chapter by get_story(outline=true); bodies come from get_chapter
+CHAPTER_OUTLINE_FIELDS = {
+    "_id": 0, "id": 1, "name": 1, "order": 1, "updated_at": 1, "version": 1, "stats": 1, "source_chapter_id": 1
+}
+
+
 @api_router.get("/stories/{story_id}")
-async def get_story(story_id: str, user=Depends(get_current_user)):
-    """Get story details with all chapters"""
+async def get_story(story_id: str, outline: bool = False, user=Depends(get_current_user)):
+    """Get story details with all chapters, or with chapter outlines (counts, no content) when outline=true"""
     story = await db.stories.find_one(
         {"id": story_id, "user_id": user["id"]},
         {"_id": 0}
     )
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapters = await db.chapters.find(
-        {"story_id": story_id},
-        {"_id": 0}
-    ).sort("order", 1).to_list(100)
+    if outline:
+        chapters = await db.chapters.find(
+            {"story_id": story_id},
+            CHAPTER_OUTLINE_FIELDS
+        ).sort("order", 1).to_list(None)
+        # Chapters saved before stats existed are upgraded once, all together
+        legacy = [chapter["id"] for chapter in chapters if "stats" not in chapter]
+        upgraded = await upgrade_legacy_chapters(legacy) if legacy else {}
+        for chapter in chapters:
+            chapter.update(upgraded.get(chapter["id"], {}))
+            chapter.update(chapter.pop("stats", None) or block_stats([]))
+    else:
+        chapters = await db.chapters.find(
+            {"story_id": story_id},
+            {"_id": 0}
+        ).sort("order", 1).to_list(100)
     story["chapters"] = chapters
     story["chapter_count"] = len(chapters)
     return story
@@ -2235,10 +3554,138 @@ async def delete_story(story_id: str, user=Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Story not found")
     await db.chapters.delete_many({"story_id": story_id})
     await db.story_messages.delete_many({"story_id": story_id})
+    await db.conversation_summaries.delete_many({"scope": {"$regex": f"^story:{re.escape(story_id)}:"}})
+    await forget_story_translations(story_id)
     await db.stories.delete_one({"id": story_id})
     return {"message": "Story deleted"}
 
 
+# ---------- Chapter content blocks ----------
+# Block edits are single atomic array updates ($push/$set/$pull) guarded by a
+# per-chapter version counter, so they never rewrite the whole content_blocks list.
+
+MEDIA_BLOCK_TYPES = ("image", "video", "audio")
+CHAPTER_WRITE_RETRIES = 5
+
+
+def with_block_ids(blocks: List[dict]) -> List[dict]:
+    """Give every block a stable block_id, keeping the ones it already has. A repeated id
+    goes to its first block only; later copies get fresh ids, so ops address one block."""
+    seen = set()
+    for block in blocks:
+        if not block.get("block_id") or block["block_id"] in seen:
+            block["block_id"] = str(uuid.uuid4())
+        seen.add(block["block_id"])
+    return blocks
+
+
+def is_exhibit_label(block: dict) -> bool:
+    """True for the 'Exhibit N' text block that add_chapter_media puts before a media block"""
+    if block.get("type") != "text":
+        return False
+    content = (block.get("content") or "").strip()
+    return content.startswith("Exhibit ") and content.replace("Exhibit ", "").strip().isdigit()
+
+
+def block_stats(blocks: List[dict]) -> dict:
+    """Outline counters for a list of content blocks"""
+    texts = [b.get("content") or "" for b in blocks if b.get("type") == "text"]
+    return {
+        "block_count": len(blocks),
+        "text_block_count": len(texts),
+        "word_count": sum(len(t.split()) for t in texts),
+        "char_count": sum(len(t) for t in texts),
+    }
+
+
+def stats_inc(added: List[dict], removed: List[dict] = ()) -> dict:
+    """$inc fields that move a chapter's stats from the `removed` blocks to the `added` ones"""
+    plus, minus = block_stats(added), block_stats(list(removed))
+    return {f"stats.{key}": plus[key] - minus[key] for key in plus}
+
+
+async def load_chapter_state(story_id: str, chapter_id: str, projection: Optional[dict] = None) -> dict:
+    """Read a chapter's version plus `projection`, upgrading chapters saved before block ids and stats existed"""
+    fields = {"_id": 0, "id": 1, "version": 1, "stats": 1, **(projection or {})}
+    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, fields)
+    if not chapter:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    if "version" not in chapter or "stats" not in chapter:
+        await upgrade_legacy_chapters([chapter_id])
+        chapter = await db.chapters.find_one({"id": chapter_id}, fields)
+    return chapter
+
+
+async def upgrade_legacy_chapters(chapter_ids: List[str]) -> Dict[str, dict]:
+    """Give chapters saved before block ids and stats existed their ids, stats and a version,
+    in one read and one bulk write. Returns {chapter_id: {"version", "stats"}}."""
+    legacy = await db.chapters.find(
+        {"id": {"$in": chapter_ids}, "stats": {"$exists": False}}, {"_id": 0, "id": 1, "content_blocks": 1, "version": 1}
+    ).to_list(None)
+    upgraded, ops = {}, []
+    for chapter in legacy:
+        blocks = with_block_ids(chapter.get("content_blocks", []))
+        upgraded[chapter["id"]] = {"version": chapter.get("version", 0), "stats": block_stats(blocks)}
+        # Only upgrade a chapter nobody has written since it was read
+        query = {"id": chapter["id"], "stats": {"$exists": False}}
+        query["version"] = chapter["version"] if "version" in chapter else {"$exists": False}
+        ops.append(UpdateOne(query, {"$set": {"content_blocks": blocks, **upgraded[chapter["id"]]}}))
+    if ops:
+        await db.chapters.bulk_write(ops, ordered=False)
+    return upgraded
+
+
+def block_array_update(current: List[dict], blocks: List[dict]) -> dict:
+    """$set fields turning a chapter's `current` blocks into `blocks`; when the layout is
+    unchanged only the differing elements are rewritten"""
+    if [b.get("block_id") for b in current] == [b.get("block_id") for b in blocks]:
+        update_fields = {f"content_blocks.{i}": new for i, (old, new) in enumerate(zip(current, blocks)) if old != new}
+    else:
+        update_fields = {"content_blocks": blocks}
+    return {**update_fields, "stats": block_stats(blocks)}
+
+
+async def count_chapter_blocks(chapter_id: str) -> int:
+    """Number of content blocks in a chapter, computed by Mongo"""
+    result = await db.chapters.aggregate([
+        {"$match": {"id": chapter_id}},
+        {"$project": {"_id": 0, "total": {"$size": {"$ifNull": ["$content_blocks", []]}}}}
+    ]).to_list(1)
+    return result[0]["total"] if result else 0
+
+
+async def edit_chapter_blocks(
+    story_id: str, chapter_id: str, plan, projection: Optional[dict] = None,
+    expected_version: Optional[int] = None, guarded: bool = True
+):
+    """Build an atomic update from the chapter state with `plan(state)` and apply it, returning the new version.
+    Guarded edits only apply if the chapter is still at the version that was read, and are retried
+    on concurrent writes unless the caller pinned expected_version."""
+    for _ in range(CHAPTER_WRITE_RETRIES):
+        state = await load_chapter_state(story_id, chapter_id, projection)
+        if expected_version is not None and state["version"] != expected_version:
+            raise HTTPException(status_code=409, detail="Chapter has changed, reload it and retry")
+        update = plan(state)
+        now = datetime.now(timezone.utc).isoformat()
+        update = {
+            **update,
+            "$set": {**update.get("$set", {}), "updated_at": now},
+            "$inc": {**update.get("$inc", {}), "version": 1}
+        }
+        query = {"id": chapter_id}
+        if guarded or expected_version is not None:
+            query["version"] = state["version"]
+        before = await db.chapters.find_one_and_update(
+            query, update, projection={"_id": 0, "version": 1}, return_document=ReturnDocument.BEFORE
+        )
+        if before:
+            await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
+            return before["version"] + 1
+        if expected_version is not None:
+            raise HTTPException(status_code=409, detail="Chapter has changed, reload it and retry")
+    raise HTTPException(status_code=409, detail="Chapter is being edited concurrently, retry")
+
+
 @api_router.post("/stories/{story_id}/chapters")
 async def create_chapter(story_id: str, data: ChapterCreate, user=Depends(get_current_user)):
     """Add a new chapter to a story"""
@@ -2246,35 +3693,56 @@ async def create_chapter(story_id: str, data: ChapterCreate, user=Depends(get_cu
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     existing_count = await db.chapters.count_documents({"story_id": story_id})
+    last = await db.chapters.find_one({"story_id": story_id}, {"_id": 0, "order": 1}, sort=[("order", -1)])
+    blocks = with_block_ids([b.dict() for b in data.content_blocks])
     now = datetime.now(timezone.utc).isoformat()
     chapter = {
         "id": str(uuid.uuid4()),
         "story_id": story_id,
         "name": data.name or f"Chapter {existing_count + 1}",
-        "order": existing_count,
-        "content_blocks": [b.dict() for b in data.content_blocks] if data.content_blocks else [],
+        "order": int(last["order"]) + 1 if last else 0,
+        "content_blocks": blocks,
+        "stats": block_stats(blocks),
+        "version": 0,
         "detected_languages": [],
         "created_at": now,
         "updated_at": now
     }
     await db.chapters.insert_one(chapter)
     chapter.pop("_id", None)
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
+    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}, "$inc": {"chapter_count": 1}})
     return chapter
 
 
+def chapter_etag(chapter: dict) -> str:
+    """Validator for a chapter body; every edit bumps version or updated_at"""
+    digest = hashlib.sha1(f"{chapter.get('version')}:{chapter.get('updated_at')}".encode()).hexdigest()[:16]
+    return f'W/"{digest}"'
+
+
 @api_router.get("/stories/{story_id}/chapters/{chapter_id}")
-async def get_chapter(story_id: str, chapter_id: str, user=Depends(get_current_user)):
-    """Get a single chapter"""
+async def get_chapter(
+    story_id: str, chapter_id: str,
+    request: Request, response: Response,
+    user=Depends(get_current_user)
+):
+    """Get a single chapter, or 304 when If-None-Match still matches its ETag"""
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one(
-        {"id": chapter_id, "story_id": story_id},
-        {"_id": 0}
-    )
+    query = {"id": chapter_id, "story_id": story_id}
+    meta = await db.chapters.find_one(query, {"_id": 0, "version": 1, "updated_at": 1})
+    if not meta:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    headers = {"ETag": chapter_etag(meta), "Cache-Control": "private, no-cache"}
+    if headers["ETag"] in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    chapter = await db.chapters.find_one(query, {"_id": 0})
     if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
+    # Tag the body actually returned, in case it changed since the check above
+    headers["ETag"] = chapter_etag(chapter)
+    response.headers.update(headers)
     return chapter
 
 
@@ -2286,35 +3754,112 @@ async def reorder_chapters(story_id: str, data: ChapterReorder, user=Depends(get
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     now = datetime.now(timezone.utc).isoformat()
-    for i, cid in enumerate(data.chapter_ids):
-        await db.chapters.update_one(
-            {"id": cid, "story_id": story_id},
-            {"$set": {"order": i, "updated_at": now}}
-        )
+    if data.chapter_ids:
+        await db.chapters.bulk_write([
+            UpdateOne({"id": cid, "story_id": story_id}, {"$set": {"order": i, "updated_at": now}})
+            for i, cid in enumerate(data.chapter_ids)
+        ], ordered=False)
     await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
     return {"message": "Chapters reordered"}
 
 
+async def rebalance_chapter_order(story_id: str):
+    """Renumber a story's chapters 0..n-1 in their current order, in one bulk write.
+    Each key is only replaced if it is still the one that was read; a chapter moved
+    meanwhile is skipped and the renumbering re-read and repeated."""
+    for _ in range(CHAPTER_WRITE_RETRIES):
+        chapters = await db.chapters.find({"story_id": story_id}, {"_id": 0, "id": 1, "order": 1}).sort("order", 1).to_list(None)
+        if not chapters:
+            return
+        result = await db.chapters.bulk_write([
+            UpdateOne({"id": ch["id"], "order": ch["order"]}, {"$set": {"order": i}}) for i, ch in enumerate(chapters)
+        ], ordered=False)
+        if result.matched_count == len(chapters):
+            return
+
+
+async def chapter_placed_after(story_id: str, chapter_id: str, order: float, after_id: Optional[str]) -> bool:
+    """True if the chapter holds `order` alone and directly follows `after_id` (first when None)"""
+    if await db.chapters.count_documents({"story_id": story_id, "order": order}) != 1:
+        return False
+    previous = await db.chapters.find_one(
+        {"story_id": story_id, "order": {"$lt": order}}, {"_id": 0, "id": 1}, sort=[("order", -1)]
+    )
+    current = await db.chapters.find_one({"id": chapter_id}, {"_id": 0, "order": 1})
+    return current is not None and current["order"] == order and (previous["id"] if previous else None) == after_id
+
+
+async def order_key_after(story_id: str, after_id: Optional[str], moving_id: str) -> Optional[float]:
+    """Order key between `after_id` (None for the start) and the chapter that follows it.
+    Returns None when the two keys are too close to fit another float between them."""
+    query = {"story_id": story_id, "id": {"$ne": moving_id}}
+    lower = None
+    if after_id:
+        prev = await db.chapters.find_one({"id": after_id, "story_id": story_id}, {"_id": 0, "order": 1})
+        if not prev:
+            raise HTTPException(status_code=404, detail="Chapter not found")
+        lower = prev["order"]
+        query["order"] = {"$gt": lower}
+    following = await db.chapters.find_one(query, {"_id": 0, "order": 1}, sort=[("order", 1)])
+    upper = following["order"] if following else None
+    if lower is None:
+        return 0 if upper is None else upper - 1
+    if upper is None:
+        return lower + 1
+    key = (lower + upper) / 2
+    return key if lower < key < upper else None
+
+
+@api_router.post("/stories/{story_id}/chapters/{chapter_id}/move")
+async def move_chapter(story_id: str, chapter_id: str, data: ChapterMove, user=Depends(get_current_user)):
+    """Move one chapter after another; only the moved chapter's fractional order key changes"""
+    story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    if data.after_id == chapter_id:
+        raise HTTPException(status_code=400, detail="Cannot move a chapter after itself")
+    if not await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    for _ in range(CHAPTER_WRITE_RETRIES):
+        order = await order_key_after(story_id, data.after_id, chapter_id)
+        if order is None:
+            # Repeated moves into the same gap exhausted float precision: spread the keys out
+            await rebalance_chapter_order(story_id)
+            continue
+        now = datetime.now(timezone.utc).isoformat()
+        await db.chapters.update_one({"id": chapter_id}, {"$set": {"order": order, "updated_at": now}})
+        # A concurrent move may have taken the same key, or a rebalance renumbered the
+        # neighbours; re-read and place the chapter again if so
+        if await chapter_placed_after(story_id, chapter_id, order, data.after_id):
+            await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
+            return {"message": "Chapter moved", "order": order}
+    raise HTTPException(status_code=409, detail="Chapters are being reordered concurrently, retry")
+
+
 @api_router.put("/stories/{story_id}/chapters/{chapter_id}")
-async def update_chapter(story_id: str, chapter_id: str, data: ChapterUpdate, user=Depends(get_current_user)):
+async def update_chapter(
+    story_id: str, chapter_id: str, data: ChapterUpdate,
+    expected_version: Optional[int] = None,
+    user=Depends(get_current_user)
+):
     """Update chapter name, content blocks, or order"""
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    now = datetime.now(timezone.utc).isoformat()
-    update_fields = {"updated_at": now}
-    if data.name is not None:
-        update_fields["name"] = data.name
-    if data.content_blocks is not None:
-        update_fields["content_blocks"] = [b.dict() for b in data.content_blocks]
-    if data.order is not None:
-        update_fields["order"] = data.order
-    await db.chapters.update_one({"id": chapter_id}, {"$set": update_fields})
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
-    return {"message": "Chapter updated"}
+
+    def plan(state):
+        update_fields = {}
+        if data.name is not None:
+            update_fields["name"] = data.name
+        if data.content_blocks is not None:
+            update_fields["content_blocks"] = with_block_ids([b.dict() for b in data.content_blocks])
+            update_fields["stats"] = block_stats(update_fields["content_blocks"])
+        if data.order is not None:
+            update_fields["order"] = data.order
+        return {"$set": update_fields}
+
+    version = await edit_chapter_blocks(story_id, chapter_id, plan, expected_version=expected_version, guarded=False)
+    return {"message": "Chapter updated", "version": version}
 
 
 @api_router.delete("/stories/{story_id}/chapters/{chapter_id}")
@@ -2326,19 +3871,23 @@ async def delete_chapter(story_id: str, chapter_id: str, user=Depends(get_curren
     chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id})
     if not chapter:
         raise HTTPException(status_code=404, detail="Chapter not found")
-    deleted_order = chapter["order"]
-    await db.chapters.delete_one({"id": chapter_id})
-    await db.story_messages.delete_many({"chapter_id": chapter_id})
-    # Re-order remaining chapters
-    await db.chapters.update_many(
-        {"story_id": story_id, "order": {"$gt": deleted_order}},
-        {"$inc": {"order": -1}}
-    )
-    now = datetime.now(timezone.utc).isoformat()
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
+    # Order keys only need to sort, so the remaining chapters keep theirs
+    await remove_chapters(story_id, [chapter_id])
     return {"message": "Chapter deleted"}
 
 
+async def remove_chapters(story_id: str, chapter_ids: List[str]) -> int:
+    """Delete chapters of a story with their messages and chat summaries, keeping chapter_count in step"""
+    deleted = await db.chapters.delete_many({"id": {"$in": chapter_ids}, "story_id": story_id})
+    await db.story_messages.delete_many({"chapter_id": {"$in": chapter_ids}})
+    # The story-wide summary counted these chapters' messages too
+    scopes = [story_chat_scope(story_id, chapter_id) for chapter_id in chapter_ids] + [story_chat_scope(story_id, None)]
+    await db.conversation_summaries.delete_many({"scope": {"$in": scopes}})
+    now = datetime.now(timezone.utc).isoformat()
+    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}, "$inc": {"chapter_count": -deleted.deleted_count}})
+    return deleted.deleted_count
+
+
 @api_router.post("/stories/{story_id}/chapters/{chapter_id}/media")
 async def add_chapter_media(
     story_id: str, chapter_id: str,
@@ -2351,8 +3900,7 @@ async def add_chapter_media(
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
+    if not await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0, "id": 1}):
         raise HTTPException(status_code=404, detail="Chapter not found")
 
     # Upload the file using existing upload logic
@@ -2384,88 +3932,114 @@ async def add_chapter_media(
         "is_public": False
     }
     await db.files.insert_one(file_doc)
+    file_doc.pop("_id", None)
+    invalidate_file_counts()
+    invalidate_overview_context(file_doc["user_id"], file_doc.get("is_public", False))
+    await record_file_added(file_doc)
+    schedule_file_digest(file_id, file.filename, "")
 
     # Build content block
     media_block = {
         "type": media_type,
         "file_id": file_id,
-        "caption": caption or file.filename
+        "caption": caption or file.filename,
+        "block_id": str(uuid.uuid4())
     }
 
     # Insert into content_blocks with "Exhibit #" label
-    blocks = chapter.get("content_blocks", [])
-    
-    # Count existing media blocks to get exhibit number
-    existing_media_count = sum(1 for b in blocks if b.get("type") in ["image", "video", "audio"])
-    exhibit_number = existing_media_count + 1
-    
-    # Create exhibit label block
-    exhibit_label_block = {
-        "type": "text",
-        "content": f"\n\nExhibit {exhibit_number}\n"
-    }
-    
-    if position < 0 or position >= len(blocks):
-        blocks.append(exhibit_label_block)
-        blocks.append(media_block)
-    else:
-        blocks.insert(position, exhibit_label_block)
-        blocks.insert(position + 1, media_block)
+    def plan(state):
+        blocks = state.get("content_blocks", [])
+        # Count existing media blocks to get exhibit number
+        exhibit_number = sum(1 for b in blocks if b.get("type") in MEDIA_BLOCK_TYPES) + 1
+        exhibit_label_block = {
+            "type": "text",
+            "content": f"\n\nExhibit {exhibit_number}\n",
+            "block_id": str(uuid.uuid4())
+        }
+        push = {"$each": [exhibit_label_block, media_block]}
+        if 0 <= position < len(blocks):
+            push["$position"] = position
+        return {"$push": {"content_blocks": push}, "$inc": stats_inc(push["$each"])}
 
-    await db.chapters.update_one(
-        {"id": chapter_id},
-        {"$set": {"content_blocks": blocks, "updated_at": now}}
-    )
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
+    # Only the block types are read, to number the exhibit
+    version = await edit_chapter_blocks(story_id, chapter_id, plan, projection={"content_blocks.type": 1})
 
     media_block["id"] = file_id
+    media_block["version"] = version
     return media_block
 
 
 @api_router.get("/stories/{story_id}/messages")
-async def get_story_messages(story_id: str, chapter_id: str = None, user=Depends(get_current_user)):
-    """Get chat messages for a story or specific chapter"""
+async def get_story_messages(
+    story_id: str,
+    chapter_id: str = None,
+    limit: int = MESSAGE_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    user=Depends(get_current_user)
+):
+    """Get chat messages for a story or specific chapter, newest page first (see page_messages)"""
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
     query = {"story_id": story_id}
     if chapter_id:
         query["chapter_id"] = chapter_id
-    messages = await db.story_messages.find(
-        query, {"_id": 0}
-    ).sort("created_at", 1).to_list(500)
-    return {"messages": messages}
+    return await page_messages(db.story_messages, query, limit, cursor, since)
 
 
-@api_router.post("/stories/{story_id}/chat")
-async def story_chat(story_id: str, data: StoryChatRequest, user=Depends(get_current_user)):
-    """AI chat for story/chapter composition. Modes: coauthor (AI helps write) or scribe (AI organizes)"""
-    story = await db.stories.find_one({"id": story_id, "user_id": user["id"]}, {"_id": 0})
-    if not story:
-        raise HTTPException(status_code=404, detail="Story not found")
+def story_history_query(story_id: str, chapter_id: Optional[str]) -> dict:
+    """Story chat messages for one chapter, or the whole story when no chapter is given"""
+    msg_query = {"story_id": story_id}
+    if chapter_id:
+        msg_query["chapter_id"] = chapter_id
+    return msg_query
+
+async def load_story_history(story_id: str, chapter_id: Optional[str]) -> tuple:
+    """Running summary and recent messages of a story chat. Returns (summary, messages)."""
+    return await load_compacted_history(
+        story_chat_scope(story_id, chapter_id), db.story_messages, story_history_query(story_id, chapter_id)
+    )
 
-    chapter = None
+async def load_story_chapter(story_id: str, chapter_id: Optional[str]) -> Optional[dict]:
+    """The chapter being discussed, if any"""
+    if not chapter_id:
+        return None
+    return await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
+
+async def build_story_chat_prompt(story: dict, data: StoryChatRequest) -> tuple:
+    """System prompt for story composition in the requested mode. Returns (system_prompt, history)."""
+    context = await gather_context_stages(
+        "story chat",
+        chapter=load_story_chapter(story["id"], data.chapter_id),
+        history=load_story_history(story["id"], data.chapter_id)
+    )
+    chapter = context["chapter"]
+    summary, history = context["history"]
+    # Context from existing content blocks
+    text_blocks = []
+    if chapter:
+        text_blocks = [b["content"] for b in chapter.get("content_blocks", []) if b.get("type") == "text" and b.get("content")]
+
+    system_prompt = render_story_system_prompt(story, data.mode, chapter, "")
+    # The latest chapter text matters most, so offer blocks newest first
+    kept = fit_prompt_sections("story chat", system_prompt, [
+        ("summary", [summary] if summary else []),
+        ("history", [m["content"] for m in reversed(history)]),
+        ("chapter", text_blocks[::-1]),
+    ])
     chapter_context = ""
-    if data.chapter_id:
-        chapter = await db.chapters.find_one(
-            {"id": data.chapter_id, "story_id": story_id}, {"_id": 0}
-        )
-        if chapter:
-            # Build context from existing content blocks
-            text_blocks = [b["content"] for b in chapter.get("content_blocks", []) if b.get("type") == "text" and b.get("content")]
-            if text_blocks:
-                chapter_context = f"\n\nExisting chapter content:\n{''.join(text_blocks)}"
+    if kept["chapter"]:
+        chapter_context = f"\n\nExisting chapter content:\n{''.join(reversed(kept['chapter']))}"
+    system_prompt = render_story_system_prompt(story, data.mode, chapter, chapter_context)
+    if kept["summary"]:
+        system_prompt += f"\n\nSummary of the earlier conversation:\n{kept['summary'][0]}"
 
-    # Get conversation history
-    msg_query = {"story_id": story_id}
-    if data.chapter_id:
-        msg_query["chapter_id"] = data.chapter_id
-    history = await db.story_messages.find(
-        msg_query, {"_id": 0}
-    ).sort("created_at", 1).to_list(50)
+    return system_prompt, fit_history(history, kept["history"])
 
-    # Build system prompt based on mode
-    if data.mode == "scribe":
+def render_story_system_prompt(story: dict, mode: str, chapter: Optional[dict], chapter_context: str) -> str:
+    """Story chat instructions for the mode, with the chapter content section filled in"""
+    if mode == "scribe":
         system_prompt = f"""You are a professional scribe and editor for the story "{story['name']}".
 Your role is to faithfully organize, structure, and clean up what the user dictates or provides.
 - Do NOT add your own creative content
@@ -2486,58 +4060,44 @@ Your role is to collaborate with the user to create compelling content.
     if chapter:
         system_prompt += f"\nCurrently working on: {chapter['name']}"
 
-    # Build messages for API call
-    api_messages = [{"role": "system", "content": system_prompt}]
-    for msg in history[-20:]:  # Last 20 messages for context
-        api_messages.append({"role": msg["role"], "content": msg["content"]})
-    api_messages.append({"role": "user", "content": data.message})
-
-    now = datetime.now(timezone.utc).isoformat()
+    return system_prompt
 
-    # Save user message
-    user_msg = {
+async def save_story_message(story_id: str, chapter_id: Optional[str], role: str, content: str):
+    """Persist one story chat message"""
+    await db.story_messages.insert_one({
         "id": str(uuid.uuid4()),
         "story_id": story_id,
-        "chapter_id": data.chapter_id,
-        "role": "user",
-        "content": data.message,
-        "created_at": now
-    }
-    await db.story_messages.insert_one(user_msg)
+        "chapter_id": chapter_id,
+        "role": role,
+        "content": content,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    })
 
-    try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage as LlmUserMessage
+async def save_story_reply(story_id: str, chapter_id: Optional[str], response: str):
+    """Persist the assistant's reply in a story chat and bump the story"""
+    await save_story_message(story_id, chapter_id, "assistant", response)
+    schedule_compaction(story_chat_scope(story_id, chapter_id), db.story_messages, story_history_query(story_id, chapter_id))
+    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()}})
 
-        session_id = f"story-{story_id}-{data.chapter_id or 'general'}"
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=session_id,
-            system_message=system_prompt
-        )
-        chat.with_model("openai", "gpt-5.2")
+@api_router.post("/stories/{story_id}/chat")
+async def story_chat(story_id: str, data: StoryChatRequest, request: Request, user=Depends(get_current_user),
+                     idempotency_key: Optional[str] = Header(None)):
+    """AI chat for story/chapter composition. Modes: coauthor (AI helps write) or scribe (AI organizes)"""
+    import asyncio
+    story = await db.stories.find_one({"id": story_id, "user_id": user["id"]}, {"_id": 0})
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
 
-        # Load recent history for context
-        for msg in history[-20:]:
-            if msg["role"] == "user":
-                chat.messages.append({"role": "user", "content": msg["content"]})
-            else:
-                chat.messages.append({"role": "assistant", "content": msg["content"]})
+    async def chat_turn() -> dict:
+        system_prompt, history = await build_story_chat_prompt(story, data)
 
-        response = await chat.send_message(LlmUserMessage(text=data.message))
-        assistant_content = response if isinstance(response, str) else str(response)
+        # Save user message; it stays in the story chat even if the reply fails
+        await asyncio.shield(save_story_message(story_id, data.chapter_id, "user", data.message))
 
-        # Save assistant message
-        assistant_msg = {
-            "id": str(uuid.uuid4()),
-            "story_id": story_id,
-            "chapter_id": data.chapter_id,
-            "role": "assistant",
-            "content": assistant_content,
-            "created_at": datetime.now(timezone.utc).isoformat()
-        }
-        await db.story_messages.insert_one(assistant_msg)
+        # Send message with recent history for context
+        assistant_content = await llm.complete(build_llm_messages(system_prompt, history, data.message))
 
-        await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": datetime.now(timezone.utc).isoformat()}})
+        await asyncio.shield(save_story_reply(story_id, data.chapter_id, assistant_content))
 
         return {
             "message": assistant_content,
@@ -2545,11 +4105,46 @@ Your role is to collaborate with the user to create compelling content.
             "chapter_id": data.chapter_id
         }
 
+    try:
+        return await run_cancellable(
+            request, chat_turn,
+            idempotency=idempotency_scope(user["id"], request, idempotency_key),
+            fingerprint=request_fingerprint(story_id, data.message, mode=data.mode, chapter=data.chapter_id)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Story chat error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
 
+@api_router.post("/stories/{story_id}/chat/stream")
+async def story_chat_stream(story_id: str, data: StoryChatRequest, request: Request, user=Depends(get_current_user),
+                            idempotency_key: Optional[str] = Header(None)):
+    """Streaming variant of story chat: token events, then done once the reply is saved"""
+    if not EMERGENT_LLM_KEY:
+        raise HTTPException(status_code=503, detail="AI service not configured")
+    story = await db.stories.find_one({"id": story_id, "user_id": user["id"]}, {"_id": 0})
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+
+    async def prepare() -> tuple:
+        system_prompt, history = await build_story_chat_prompt(story, data)
+        await save_story_message(story_id, data.chapter_id, "user", data.message)
+
+        async def save_reply(response: str) -> dict:
+            await save_story_reply(story_id, data.chapter_id, response)
+            return {"mode": data.mode, "chapter_id": data.chapter_id}
+
+        return [], system_prompt, history, data.message, save_reply
+
+    return await stream_chat_response(
+        request, prepare,
+        idempotency=idempotency_scope(user["id"], request, idempotency_key),
+        fingerprint=request_fingerprint(story_id, data.message, mode=data.mode, chapter=data.chapter_id)
+    )
+
+
 @api_router.post("/stories/{story_id}/chapters/{chapter_id}/import-file")
 async def import_file_to_chapter(
     story_id: str, chapter_id: str,
@@ -2560,9 +4155,6 @@ async def import_file_to_chapter(
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
     file_doc = await db.files.find_one(
         {"id": file_id, "$or": [{"user_id": user["id"]}, {"is_public": True}]},
         {"_id": 0}
@@ -2574,45 +4166,50 @@ async def import_file_to_chapter(
     if not content_text:
         raise HTTPException(status_code=400, detail="File has no text content to import")
 
-    blocks = chapter.get("content_blocks", [])
-    blocks.append({"type": "text", "content": content_text})
-
-    now = datetime.now(timezone.utc).isoformat()
-    await db.chapters.update_one(
-        {"id": chapter_id},
-        {"$set": {"content_blocks": blocks, "updated_at": now}}
+    new_block = {"type": "text", "content": content_text, "block_id": str(uuid.uuid4())}
+    version = await edit_chapter_blocks(
+        story_id, chapter_id,
+        lambda state: {"$push": {"content_blocks": new_block}, "$inc": stats_inc([new_block])},
+        guarded=False
     )
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
 
-    return {"message": "File content imported", "filename": file_doc.get("original_filename", "")}
+    return {"message": "File content imported", "filename": file_doc.get("original_filename", ""), "version": version}
 
 
 @api_router.put("/stories/{story_id}/chapters/{chapter_id}/blocks/{block_index}")
 async def update_content_block(
     story_id: str, chapter_id: str, block_index: int,
     block: ContentBlock,
+    expected_version: Optional[int] = None,
     user=Depends(get_current_user)
 ):
     """Update a single content block at a specific index"""
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    blocks = chapter.get("content_blocks", [])
-    if block_index < 0 or block_index >= len(blocks):
+    if block_index < 0:
         raise HTTPException(status_code=400, detail="Block index out of range")
-    blocks[block_index] = block.dict()
-    now = datetime.now(timezone.utc).isoformat()
-    await db.chapters.update_one({"id": chapter_id}, {"$set": {"content_blocks": blocks, "updated_at": now}})
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
-    return {"message": "Block updated"}
+
+    def plan(state):
+        current = state.get("content_blocks", [])
+        if not current:
+            raise HTTPException(status_code=400, detail="Block index out of range")
+        # The block keeps its id; only this array element is rewritten
+        new_block = {**block.dict(), "block_id": current[0].get("block_id")}
+        return {"$set": {f"content_blocks.{block_index}": new_block}, "$inc": stats_inc([new_block], current)}
+
+    version = await edit_chapter_blocks(
+        story_id, chapter_id, plan,
+        projection={"content_blocks": {"$slice": [block_index, 1]}},
+        expected_version=expected_version
+    )
+    return {"message": "Block updated", "version": version}
 
 
 @api_router.delete("/stories/{story_id}/chapters/{chapter_id}/blocks/{block_index}")
 async def delete_content_block(
     story_id: str, chapter_id: str, block_index: int,
+    expected_version: Optional[int] = None,
     user=Depends(get_current_user)
 ):
     """Delete a content block at a specific index. 
@@ -2620,39 +4217,127 @@ async def delete_content_block(
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    blocks = chapter.get("content_blocks", [])
-    if block_index < 0 or block_index >= len(blocks):
+    if block_index < 0:
         raise HTTPException(status_code=400, detail="Block index out of range")
-    
-    # Check if we're deleting a media block (image, video, audio)
-    block_to_delete = blocks[block_index]
-    block_type = block_to_delete.get("type", "")
-    
-    # If it's a media block, check if the previous block is an "Exhibit #" label
-    if block_type in ["image", "video", "audio"] and block_index > 0:
-        prev_block = blocks[block_index - 1]
-        if prev_block.get("type") == "text":
-            prev_content = prev_block.get("content", "").strip()
-            # Check if it's an Exhibit label (e.g., "Exhibit 1", "Exhibit 2", etc.)
-            if prev_content.startswith("Exhibit ") and prev_content.replace("Exhibit ", "").strip().isdigit():
-                # Delete the Exhibit label first (this shifts indices)
-                blocks.pop(block_index - 1)
-                # Now delete the media block (index shifted by -1)
-                blocks.pop(block_index - 1)
-            else:
-                # Just delete the media block
-                blocks.pop(block_index)
-    else:
-        # Delete just the specified block
-        blocks.pop(block_index)
-    
-    now = datetime.now(timezone.utc).isoformat()
-    await db.chapters.update_one({"id": chapter_id}, {"$set": {"content_blocks": blocks, "updated_at": now}})
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
-    return {"message": "Block deleted"}
+
+    # Read a window holding the previous block (if any) followed by the target block
+    window_size = 2 if block_index else 1
+
+    def plan(state):
+        window = state.get("content_blocks", [])
+        if len(window) < window_size:
+            raise HTTPException(status_code=400, detail="Block index out of range")
+        remove = window[-1:]
+        # If it's a media block, also remove the "Exhibit #" label in front of it
+        if remove[0].get("type") in MEDIA_BLOCK_TYPES and len(window) == 2 and is_exhibit_label(window[0]):
+            remove = window
+        return {
+            "$pull": {"content_blocks": {"block_id": {"$in": [b["block_id"] for b in remove]}}},
+            "$inc": stats_inc([], remove)
+        }
+
+    version = await edit_chapter_blocks(
+        story_id, chapter_id, plan,
+        projection={"content_blocks": {"$slice": [block_index + 1 - window_size, window_size]}},
+        expected_version=expected_version
+    )
+    return {"message": "Block deleted", "version": version}
+
+
+PATCH_MAX_OPS = 500
+
+
+class BlockPatchOp(BaseModel):
+    op: str  # "insert", "update", "move" or "delete"
+    block_id: Optional[str] = None  # target of update/move/delete
+    after_id: Optional[str] = None  # insert/move: place after this block, None for the start
+    block: Optional[ContentBlock] = None  # insert/update payload; an insert may carry its own block_id
+
+
+class ChapterPatch(BaseModel):
+    base_version: int
+    ops: List[BlockPatchOp]
+
+
+def apply_block_ops(blocks: List[dict], ops: List[BlockPatchOp]) -> tuple:
+    """Apply patch ops to a copy of `blocks` by block id; returns (blocks, inserted ids)"""
+    blocks = list(blocks)
+    inserted = []
+
+    def index_of(block_id):
+        for i, b in enumerate(blocks):
+            if b.get("block_id") == block_id:
+                return i
+        raise HTTPException(status_code=400, detail=f"Unknown block_id: {block_id}")
+
+    def insert_at(after_id):
+        return 0 if after_id is None else index_of(after_id) + 1
+
+    for op in ops:
+        if op.op == "insert":
+            if op.block is None:
+                raise HTTPException(status_code=400, detail="insert needs a block")
+            new_block = with_block_ids([op.block.dict()])[0]
+            if any(b.get("block_id") == new_block["block_id"] for b in blocks):
+                raise HTTPException(status_code=400, detail=f"Duplicate block_id: {new_block['block_id']}")
+            blocks.insert(insert_at(op.after_id), new_block)
+            inserted.append(new_block["block_id"])
+        elif op.op == "update":
+            if op.block is None:
+                raise HTTPException(status_code=400, detail="update needs a block")
+            blocks[index_of(op.block_id)] = {**op.block.dict(), "block_id": op.block_id}
+        elif op.op == "move":
+            if op.after_id == op.block_id:
+                raise HTTPException(status_code=400, detail="Cannot move a block after itself")
+            moved = blocks.pop(index_of(op.block_id))
+            blocks.insert(insert_at(op.after_id), moved)
+        elif op.op == "delete":
+            blocks.pop(index_of(op.block_id))
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown op: {op.op}")
+    return blocks, inserted
+
+
+@api_router.patch("/stories/{story_id}/chapters/{chapter_id}/blocks")
+async def patch_content_blocks(
+    story_id: str, chapter_id: str,
+    data: ChapterPatch,
+    user=Depends(get_current_user)
+):
+    """Apply a batch of block ops (insert/update/move/delete by block id) against base_version, all or nothing"""
+    story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
+    if not story:
+        raise HTTPException(status_code=404, detail="Story not found")
+    if not data.ops:
+        raise HTTPException(status_code=400, detail="No operations given")
+    if len(data.ops) > PATCH_MAX_OPS:
+        raise HTTPException(status_code=400, detail=f"At most {PATCH_MAX_OPS} operations per patch")
+    inserted = []
+
+    def plan(state):
+        current = state.get("content_blocks", [])
+        blocks, new_ids = apply_block_ops(current, data.ops)
+        inserted[:] = new_ids
+        kinds = {op.op for op in data.ops}
+        # The common single edits stay O(1) writes instead of rewriting the array
+        if kinds == {"delete"}:
+            deleted = {op.block_id for op in data.ops}
+            return {
+                "$pull": {"content_blocks": {"block_id": {"$in": list(deleted)}}},
+                "$inc": stats_inc([], [b for b in current if b.get("block_id") in deleted])
+            }
+        if kinds == {"insert"} and len(data.ops) == 1:
+            position = next(i for i, b in enumerate(blocks) if b["block_id"] == new_ids[0])
+            return {
+                "$push": {"content_blocks": {"$each": [blocks[position]], "$position": position}},
+                "$inc": stats_inc([blocks[position]])
+            }
+        return {"$set": block_array_update(current, blocks)}
+
+    version = await edit_chapter_blocks(
+        story_id, chapter_id, plan, projection={"content_blocks": 1}, expected_version=data.base_version
+    )
+    return {"message": "Chapter patched", "version": version, "inserted_ids": inserted}
 
 
 class AppendBlocksRequest(BaseModel):
@@ -2661,6 +4346,7 @@ class AppendBlocksRequest(BaseModel):
 
 class TranslateStoryRequest(BaseModel):
     target_language: str  # e.g., "Spanish", "French", "German", etc.
+    incremental: bool = False  # update the latest existing translation instead of creating a new story
 
 
 # Translation task tracking (in-memory, similar to reindex_tasks)
@@ -2693,178 +4379,504 @@ async def start_translate_story(
     if not original_chapters:
         raise HTTPException(status_code=400, detail="Story has no chapters to translate")
     
-    # Count total text blocks for progress tracking
-    total_blocks = sum(len([b for b in ch.get("content_blocks", []) if b.get("type") == "text"]) for ch in original_chapters)
+    # Translated blocks are matched to their source blocks by block_id
+    legacy = [ch["id"] for ch in original_chapters if "stats" not in ch]
+    if legacy:
+        await upgrade_legacy_chapters(legacy)
+        original_chapters = await db.chapters.find(
+            {"story_id": story_id}, {"_id": 0}
+        ).sort("order", 1).to_list(100)
+    
+    # Count the text blocks that will be translated, for progress tracking
+    total_blocks = sum(len([b for b in ch.get("content_blocks", []) if is_translatable_block(b)]) for ch in original_chapters)
+    
+    # An incremental run updates the latest translation into the same language, if there is one
+    existing_story = None
+    if data.incremental:
+        existing_story = await db.stories.find_one(
+            {"source_story_id": story_id, "translated_to": data.target_language, "user_id": user["id"]},
+            {"_id": 0}, sort=[("created_at", -1)]
+        )
     
     # Create task
     task_id = str(uuid.uuid4())
     translation_tasks[task_id] = {
+        "user_id": user["id"],
         "status": "running",
         "target_language": data.target_language,
         "story_name": original_story["name"],
+        "incremental": existing_story is not None,
         "total_chapters": len(original_chapters),
         "total_blocks": total_blocks,
         "current_chapter": 0,
         "current_chapter_name": "",
         "blocks_translated": 0,
-        "new_story_id": None,
-        "new_story_name": None,
+        "new_story_id": existing_story["id"] if existing_story else None,
+        "new_story_name": existing_story["name"] if existing_story else None,
         "error": None,
         "started_at": datetime.now(timezone.utc).isoformat()
     }
+    publish_task_event("translation", task_id, translation_tasks[task_id])
     
     # Start background translation
     import asyncio
     asyncio.create_task(run_translation_task(
         task_id, story_id, original_story, original_chapters, 
-        data.target_language, user["id"]
+        data.target_language, user["id"], existing_story
     ))
     
     return {
         "message": "Translation started",
         "task_id": task_id,
+        "incremental": existing_story is not None,
         "total_chapters": len(original_chapters),
         "total_blocks": total_blocks
     }
 
 
+# ---------- Translation engine ----------
+# A story is cut into segments (title, description, chapter names, text blocks, with
+# oversized blocks split at paragraph breaks). Segments are packed into batched requests
+# under numbered marker lines and translated with bounded concurrency; replies are matched
+# back to segments by marker, so completion order never affects the assembled story.
+
+TRANSLATION_CONCURRENCY = int(os.environ.get("TRANSLATION_CONCURRENCY", "6"))
+TRANSLATION_BATCH_CHARS = 6000
+TRANSLATION_BATCH_SEGMENTS = 25
+TRANSLATION_SEGMENT_CHARS = 6000
+TRANSLATION_MARKER = re.compile(r"^<<<SEGMENT (\d+)>>>[ \t]*$", re.MULTILINE)
+
+# Translation memory (db.translation_memory) belongs to a user and lists the source stories
+# whose text it holds; an entry goes when its last story is deleted, when it has not been
+# used for TRANSLATION_MEMORY_TTL_SECONDS, or when the collection is trimmed to
+# TRANSLATION_MEMORY_MAX_ENTRIES, least recently used first.
+TRANSLATION_MEMORY_TTL_SECONDS = 90 * 24 * 3600
+TRANSLATION_MEMORY_MAX_ENTRIES = 200000
+TRANSLATION_MEMORY_TRIM_EVERY = 100  # stores between size checks
+translation_memory_stores = 0
+
+
+def translation_system_prompt(target_language: str) -> str:
+    return f"""You are a professional translator. Translate the following text to {target_language}. 
+                
+Rules:
+- Maintain the original tone, style, and formatting
+- Keep proper nouns, names, and technical terms as appropriate for the target language
+- Preserve any markdown formatting, line breaks, and paragraph structure
+- Return ONLY the translated text, no explanations or notes
+- If text is already in the target language, return it as-is
+- The text is split into segments, each introduced by a marker line such as <<<SEGMENT 3>>>
+- Translate each segment on its own and return every segment under its unchanged marker line, in the same order"""
+
+
+def is_translatable_block(block: dict) -> bool:
+    """Text blocks with something to translate; everything else is copied as-is"""
+    return block.get("type") == "text" and bool((block.get("content") or "").strip())
+
+
+def source_block_hash(block: dict) -> str:
+    """Fingerprint of the source fields a translated block is built from"""
+    fields = {field: block.get(field) for field in ("type", "content", "file_id", "caption", "url")}
+    return translation_hash(json.dumps(fields, sort_keys=True))
+
+
+def merge_translated_blocks(current: List[dict], layout: List[tuple], recorded: Optional[dict]) -> List[dict]:
+    """Lay out a translated chapter like its source. `layout` lists the source blocks in order as
+    (block_id, translated block), None keeping the `current` translation of that block. Blocks that
+    never came from the source (per the `recorded` source hashes) were added to the translation by
+    hand and stay after the block they followed."""
+    if recorded is None:
+        # Translated before source hashes were recorded: replace it outright
+        return [block for _, block in layout if block is not None]
+    layout_ids = {block_id for block_id, _ in layout}
+    source_ids = layout_ids | set(recorded.get("blocks", {}))
+    by_id = {block.get("block_id"): block for block in current}
+    added, anchor = {}, None
+    for block in current:
+        block_id = block.get("block_id")
+        if block_id in layout_ids:
+            anchor = block_id
+        elif block_id not in source_ids:
+            added.setdefault(anchor, []).append(block)
+    merged = list(added.get(None, []))
+    for block_id, block in layout:
+        block = block or by_id.get(block_id)
+        if block:
+            merged.append(block)
+        merged += added.get(block_id, [])
+    return merged
+
+
+def split_for_translation(text: str, limit: int = TRANSLATION_SEGMENT_CHARS) -> List[tuple]:
+    """Cut a text block into (piece, joiner) pairs of at most `limit` chars, preferring paragraph
+    breaks, then spaces; joining each translated piece with its joiner rebuilds the block"""
+    if len(text) <= limit:
+        return [(text, "")]
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        while len(paragraph) > limit:
+            cut = paragraph.rfind(" ", 0, limit)
+            if cut > 0:
+                pieces.append([paragraph[:cut], " "])
+                paragraph = paragraph[cut + 1:]
+            else:
+                pieces.append([paragraph[:limit], ""])
+                paragraph = paragraph[limit:]
+        if pieces and pieces[-1][1] == "\n\n" and len(pieces[-1][0]) + 2 + len(paragraph) <= limit:
+            pieces[-1][0] += "\n\n" + paragraph
+        else:
+            pieces.append([paragraph, "\n\n"])
+    pieces[-1][1] = ""
+    return [tuple(piece) for piece in pieces]
+
+
+def pack_translation_batches(segments: List[dict]) -> List[List[dict]]:
+    """Group segments, in order, into requests bounded by total characters and segment count"""
+    batches, current, size = [], [], 0
+    for segment in segments:
+        if current and (size + len(segment["text"]) > TRANSLATION_BATCH_CHARS or len(current) >= TRANSLATION_BATCH_SEGMENTS):
+            batches.append(current)
+            current, size = [], 0
+        current.append(segment)
+        size += len(segment["text"])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translation_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def recall_translations(segments: List[dict], target_language: str, user_id: str, story_id: str) -> Dict[tuple, str]:
+    """Translations of these segments already in the user's translation memory, keyed by segment key.
+    Entries found are marked as used by `story_id`."""
+    hashes = {segment["key"]: translation_hash(segment["text"]) for segment in segments}
+    docs = await db.translation_memory.find(
+        {"user_id": user_id, "source_hash": {"$in": list(set(hashes.values()))},
+         "target_language": target_language, "model": LLM_MODEL},
+        {"_id": 1, "source_hash": 1, "translation": 1}
+    ).to_list(None)
+    if docs:
+        await db.translation_memory.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in docs]}},
+            {"$set": {"used_at": datetime.now(timezone.utc)}, "$addToSet": {"story_ids": story_id}}
+        )
+    found = {doc["source_hash"]: doc["translation"] for doc in docs}
+    return {key: found[h] for key, h in hashes.items() if h in found}
+
+
+async def remember_translations(segments: List[dict], results: Dict[tuple, str], target_language: str, user_id: str, story_id: str):
+    """Store fresh translations so the same source text is never sent to the model again,
+    trimming the collection back to its size limit now and then"""
+    global translation_memory_stores
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"user_id": user_id, "source_hash": translation_hash(segment["text"]),
+             "target_language": target_language, "model": LLM_MODEL},
+            {"$setOnInsert": {"translation": results[segment["key"]], "created_at": now},
+             "$set": {"used_at": now}, "$addToSet": {"story_ids": story_id}},
+            upsert=True
+        )
+        for segment in segments if segment["key"] in results
+    ]
+    if not ops:
+        return
+    try:
+        await db.translation_memory.bulk_write(ops, ordered=False)
+    except Exception as e:
+        # A concurrent task stored the same text first
+        logger.warning(f"Could not store translations: {e}")
+    translation_memory_stores += 1
+    if translation_memory_stores % TRANSLATION_MEMORY_TRIM_EVERY == 0:
+        excess = await db.translation_memory.estimated_document_count() - TRANSLATION_MEMORY_MAX_ENTRIES
+        if excess > 0:
+            oldest = await db.translation_memory.find({}, {"_id": 1}).sort("used_at", 1).limit(excess).to_list(excess)
+            await db.translation_memory.delete_many({"_id": {"$in": [d["_id"] for d in oldest]}})
+
+
+async def forget_story_translations(story_id: str):
+    """Drop the story from translation memory, deleting entries no other story uses"""
+    await db.translation_memory.update_many({"story_ids": story_id}, {"$pull": {"story_ids": story_id}})
+    await db.translation_memory.delete_many({"story_ids": {"$size": 0}})
+
+
+async def translate_batch(batch: List[dict], target_language: str, context: str) -> Dict[tuple, str]:
+    """Translate a batch of segments in one request, keyed by segment key.
+    Segments missing from the reply are retried on their own."""
+    body = "\n".join(f"<<<SEGMENT {n}>>>\n{segment['text']}" for n, segment in enumerate(batch))
+    notes = "\n".join(f"- Segment {n}: {segment['hint']}" for n, segment in enumerate(batch) if segment.get("hint"))
+    if notes:
+        context = f"{context}\nSegment notes:\n{notes}"
+    prompt = f"Context: {context}\n\nTranslate to {target_language}:\n\n{body}"
+    response = await llm.complete(build_llm_messages(translation_system_prompt(target_language), user_text=prompt))
+    parts = TRANSLATION_MARKER.split(response)
+    found = {int(parts[i]): parts[i + 1].strip() for i in range(1, len(parts) - 1, 2)}
+    if len(batch) == 1 and 0 not in found:
+        # A lone segment may come back without its marker
+        found[0] = response.strip()
+    results = {}
+    for n, segment in enumerate(batch):
+        if n in found:
+            results[segment["key"]] = found[n]
+        else:
+            results.update(await translate_batch([segment], target_language, context))
+    return results
+
+
 async def run_translation_task(
     task_id: str, 
     story_id: str, 
     original_story: dict, 
     original_chapters: list, 
     target_language: str,
-    user_id: str
+    user_id: str,
+    existing_story: Optional[dict] = None
 ):
-    """Background task to translate a story"""
+    """Background task to translate a story, or to bring `existing_story` (an earlier translation)
+    up to date. Text found in translation memory is reused; only new or edited text reaches the model."""
+    import asyncio
     task = translation_tasks[task_id]
+    context = f"From story '{original_story['name']}'"
+    
+    async def translate_with_memory(batch: List[dict]) -> Dict[tuple, str]:
+        results = await recall_translations(batch, target_language, user_id, story_id)
+        missing = [segment for segment in batch if segment["key"] not in results]
+        if missing:
+            fresh = await translate_batch(missing, target_language, context)
+            await remember_translations(missing, fresh, target_language, user_id, story_id)
+            results.update(fresh)
+        return results
     
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
-        # Helper function to translate text
-        async def translate_text(text: str, context: str = "") -> str:
-            if not text or not text.strip():
-                return text
-            
-            chat = LlmChat(
-                api_key=EMERGENT_LLM_KEY,
-                session_id=f"translate-{uuid.uuid4()}",
-                system_message=f"""You are a professional translator. Translate the following text to {target_language}. 
-                
-Rules:
-- Maintain the original tone, style, and formatting
-- Keep proper nouns, names, and technical terms as appropriate for the target language
-- Preserve any markdown formatting, line breaks, and paragraph structure
-- Return ONLY the translated text, no explanations or notes
-- If text is already in the target language, return it as-is"""
-            )
-            chat.with_model("openai", "gpt-5.2")
-            
-            prompt = f"Translate to {target_language}:\n\n{text}"
-            if context:
-                prompt = f"Context: {context}\n\n{prompt}"
-            
-            response = await chat.send_message(UserMessage(text=prompt))
-            return response.strip()
-        
         # Translate story name and description
         logger.info(f"Translating story '{original_story['name']}' to {target_language}")
         task["current_chapter_name"] = "Story title & description"
+        publish_task_event("translation", task_id, task)
         
-        translated_name = await translate_text(original_story["name"], "This is a story title")
-        translated_desc = await translate_text(original_story.get("description", ""), "This is a story description") if original_story.get("description") else ""
-        
-        # Create new story
-        new_story_id = str(uuid.uuid4())
+        # An earlier translation records hashes of the source it was made from; only fields
+        # whose source changed since are translated again, so edits to the others are kept
+        description = original_story.get("description") or ""
+        header_hashes = {"name": translation_hash(original_story["name"]), "description": translation_hash(description)}
+        recorded = (existing_story or {}).get("source_hashes") or {}
+        header = []
+        if recorded.get("name") != header_hashes["name"]:
+            header.append({"key": ("name",), "text": original_story["name"], "hint": "This is a story title"})
+        if description.strip() and recorded.get("description") != header_hashes["description"]:
+            header.append({"key": ("description",), "text": description, "hint": "This is a story description"})
+        header = await translate_with_memory(header)
+        story_fields = {}
+        if header.get(("name",)):
+            story_fields["name"] = header[("name",)]
+        if recorded.get("description") != header_hashes["description"]:
+            story_fields["description"] = header.get(("description",), description)
+        translated_name = story_fields.get("name") or (existing_story or original_story)["name"]
         now = datetime.now(timezone.utc).isoformat()
         
-        new_story = {
-            "id": new_story_id,
-            "user_id": user_id,
-            "name": f"{translated_name}",
-            "description": translated_desc,
-            "created_at": now,
-            "updated_at": now,
-            "source_story_id": story_id,
-            "source_language": "mixed",
-            "translated_to": target_language
-        }
-        await db.stories.insert_one(new_story)
+        existing_chapters = {}  # source chapter id -> translated chapter
+        if existing_story:
+            new_story_id = existing_story["id"]
+            if story_fields:
+                await db.stories.update_one({"id": new_story_id}, {"$set": {
+                    **story_fields, "source_hashes": header_hashes, "updated_at": now
+                }})
+            async for chapter in db.chapters.find({"story_id": new_story_id, "source_chapter_id": {"$ne": None}}, {"_id": 0}):
+                existing_chapters[chapter["source_chapter_id"]] = chapter
+        else:
+            # Create new story
+            new_story_id = str(uuid.uuid4())
+            new_story = {
+                "id": new_story_id,
+                "user_id": user_id,
+                "name": f"{translated_name}",
+                "description": story_fields["description"],
+                "created_at": now,
+                "updated_at": now,
+                "source_story_id": story_id,
+                "source_language": "mixed",
+                "translated_to": target_language,
+                "source_hashes": header_hashes,
+                "chapter_count": 0
+            }
+            await db.stories.insert_one(new_story)
         task["new_story_id"] = new_story_id
         task["new_story_name"] = translated_name
+        publish_task_event("translation", task_id, task)
         
-        # Translate each chapter
+        # Cut every chapter into segments: its name, then the pieces of each text block. Parts of an
+        # earlier translation whose source is unchanged since are kept as they are, edits included.
+        segments = []
+        pending = []  # segments still outstanding per chapter
+        block_pieces = {}  # (chapter, block) -> [(key, joiner)]
+        pieces_left = {}  # (chapter, block) -> pieces still outstanding
+        kept = set()  # (chapter, block) and ("chapter", chapter) keeping their earlier translation
         for i, chapter in enumerate(original_chapters):
-            task["current_chapter"] = i + 1
-            task["current_chapter_name"] = chapter.get("name", f"Chapter {i+1}")
-            logger.info(f"Translating chapter {i+1}/{len(original_chapters)}: {chapter.get('name', 'Untitled')}")
-            
+            name = chapter.get("name", f"Chapter {i+1}")
+            recorded = (existing_chapters.get(chapter["id"]) or {}).get("source_hashes") or {}
+            chapter_segments = []
+            if recorded.get("name") == translation_hash(name):
+                kept.add(("chapter", i))
+            else:
+                chapter_segments.append({"key": ("chapter", i), "text": name, "hint": "This is a chapter title"})
+            for j, block in enumerate(chapter.get("content_blocks", [])):
+                if recorded.get("blocks", {}).get(block.get("block_id")) == source_block_hash(block):
+                    kept.add((i, j))
+                    if is_translatable_block(block):
+                        task["blocks_translated"] += 1
+                elif is_translatable_block(block):
+                    pieces = split_for_translation(block["content"])
+                    block_pieces[(i, j)] = [(("block", i, j, k), joiner) for k, (_, joiner) in enumerate(pieces)]
+                    pieces_left[(i, j)] = len(pieces)
+                    chapter_segments += [
+                        {"key": ("block", i, j, k), "text": piece, "hint": f"From chapter '{name}'"}
+                        for k, (piece, _) in enumerate(pieces)
+                    ]
+            segments += chapter_segments
+            pending.append(len(chapter_segments))
+        
+        translated: Dict[tuple, str] = {}
+        failed = set()
+        
+        async def save_chapter(i: int):
+            """Assemble chapter i from its translated segments and store it, with hashes of the
+            source it was made from (blank for parts that failed, so they are retried next time)"""
+            chapter = original_chapters[i]
+            name = chapter.get("name", f"Chapter {i+1}")
+            source_blocks = chapter.get("content_blocks", [])
+            layout = []  # (block_id, translated block), None keeping the earlier translation
+            block_hashes = {}
+            chapter_name = None  # None keeps the earlier translated name
             try:
-                # Translate chapter name
-                translated_chapter_name = await translate_text(chapter.get("name", f"Chapter {i+1}"), "This is a chapter title")
-                
-                # Translate content blocks
-                translated_blocks = []
-                for block in chapter.get("content_blocks", []):
-                    try:
-                        if block.get("type") == "text" and block.get("content"):
-                            translated_content = await translate_text(
-                                block["content"], 
-                                f"From story '{original_story['name']}', chapter '{chapter.get('name', '')}'"
-                            )
-                            translated_blocks.append({
-                                "type": "text",
-                                "content": translated_content
-                            })
-                            task["blocks_translated"] += 1
-                        else:
-                            # Keep non-text blocks (images, videos, audio) as-is
-                            # Make a proper copy of the block with all existing fields
-                            copied_block = {"type": block.get("type")}
-                            if block.get("file_id"):
-                                copied_block["file_id"] = block.get("file_id")
-                            if block.get("caption"):
-                                copied_block["caption"] = block.get("caption")
-                            if block.get("url"):
-                                copied_block["url"] = block.get("url")
-                            if block.get("block_id"):
-                                copied_block["block_id"] = block.get("block_id")
-                            translated_blocks.append(copied_block)
-                            logger.info(f"Copied media block: {copied_block}")
-                    except Exception as block_err:
-                        logger.error(f"Error translating block in chapter {i+1}: {block_err}")
-                        # Keep original block if translation fails
-                        translated_blocks.append(block)
-                
-                new_chapter_id = str(uuid.uuid4())
-                new_chapter = {
-                    "id": new_chapter_id,
-                    "story_id": new_story_id,
-                    "name": translated_chapter_name,
-                    "order": chapter.get("order", i),
-                    "content_blocks": translated_blocks,
-                    "created_at": now,
-                    "updated_at": now,
-                    "source_chapter_id": chapter["id"]
-                }
-                await db.chapters.insert_one(new_chapter)
-                
+                for j, block in enumerate(source_blocks):
+                    block_id = block.get("block_id")
+                    block_hashes[block_id] = source_block_hash(block)
+                    if (i, j) in kept:
+                        layout.append((block_id, None))
+                    elif (i, j) in block_pieces:
+                        # Failed pieces keep their original text
+                        content = "".join(translated.get(key, "") + joiner for key, joiner in block_pieces[(i, j)])
+                        layout.append((block_id, {"type": "text", "content": content, "block_id": block_id}))
+                        if any(key in failed for key, _ in block_pieces[(i, j)]):
+                            block_hashes[block_id] = ""
+                    else:
+                        # Keep non-text blocks (images, videos, audio) as-is
+                        copied_block = {"type": block.get("type")}
+                        for field in ("file_id", "caption", "url", "block_id"):
+                            if block.get(field):
+                                copied_block[field] = block.get(field)
+                        layout.append((block_id, copied_block))
+                name_hash = translation_hash(name)
+                if ("chapter", i) not in kept:
+                    chapter_name = translated[("chapter", i)]
+                    if ("chapter", i) in failed:
+                        chapter_name = f"[Translation Error] {name}"
+                        name_hash = ""
             except Exception as chapter_err:
-                logger.error(f"Error translating chapter {i+1} '{chapter.get('name', '')}': {chapter_err}")
+                logger.error(f"Error assembling chapter {i+1} '{name}': {chapter_err}")
                 # Create chapter with original content if translation fails
-                new_chapter_id = str(uuid.uuid4())
+                chapter_name = f"[Translation Error] {name}"
+                layout = [(block.get("block_id"), block) for block in source_blocks]
+                block_hashes = {block.get("block_id"): "" for block in source_blocks}
+                name_hash = ""
+            source_hashes = {"name": name_hash, "blocks": block_hashes}
+            order = chapter.get("order", i)
+            previous = existing_chapters.get(chapter["id"])
+            if previous:
+                # Rewrite only the blocks whose source changed, merged into the chapter as it is when written
+                def plan(state: dict) -> dict:
+                    current = state.get("content_blocks", [])
+                    blocks = merge_translated_blocks(current, layout, state.get("source_hashes"))
+                    return {"$set": {
+                        **block_array_update(current, blocks),
+                        "name": chapter_name or state.get("name"), "order": order, "source_hashes": source_hashes
+                    }}
+                
+                blocks = merge_translated_blocks(previous.get("content_blocks", []), layout, previous.get("source_hashes"))
+                if (previous.get("name"), previous.get("order"), previous.get("content_blocks"), previous.get("source_hashes")) != \
+                        (chapter_name or previous.get("name"), order, blocks, source_hashes):
+                    await edit_chapter_blocks(
+                        new_story_id, previous["id"], plan,
+                        projection={"content_blocks": 1, "name": 1, "source_hashes": 1}
+                    )
+            else:
+                translated_blocks = with_block_ids([block for _, block in layout])
                 new_chapter = {
-                    "id": new_chapter_id,
+                    "id": str(uuid.uuid4()),
                     "story_id": new_story_id,
-                    "name": f"[Translation Error] {chapter.get('name', f'Chapter {i+1}')}",
-                    "order": chapter.get("order", i),
-                    "content_blocks": chapter.get("content_blocks", []),
+                    "name": chapter_name,
+                    "order": order,
+                    "content_blocks": translated_blocks,
+                    "stats": block_stats(translated_blocks),
+                    "version": 0,
                     "created_at": now,
                     "updated_at": now,
-                    "source_chapter_id": chapter["id"]
+                    "source_chapter_id": chapter["id"],
+                    "source_hashes": source_hashes
                 }
                 await db.chapters.insert_one(new_chapter)
+                await db.stories.update_one({"id": new_story_id}, {"$inc": {"chapter_count": 1}})
+            task["current_chapter"] += 1
+            task["current_chapter_name"] = name
+            publish_task_event("translation", task_id, task)
+        
+        semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+        
+        async def finish_segments(batch: List[dict]):
+            finished = set()
+            for segment in batch:
+                key = segment["key"]
+                if key[0] == "block":
+                    pieces_left[key[1:3]] -= 1
+                    if pieces_left[key[1:3]] == 0:
+                        task["blocks_translated"] += 1
+                pending[key[1]] -= 1
+                if pending[key[1]] == 0:
+                    finished.add(key[1])
+            publish_task_event("translation", task_id, task)
+            for i in sorted(finished):
+                await save_chapter(i)
+        
+        async def run_batch(batch: List[dict]):
+            async with semaphore:
+                try:
+                    results = await translate_batch(batch, target_language, context)
+                    translated.update(results)
+                except Exception as batch_err:
+                    logger.error(f"Error translating a batch of {len(batch)} segments: {batch_err}")
+                    for segment in batch:
+                        translated[segment["key"]] = segment["text"]
+                        failed.add(segment["key"])
+                else:
+                    await remember_translations(batch, results, target_language, user_id, story_id)
+            await finish_segments(batch)
+        
+        # Text translated before (in this story or any other) comes from translation memory
+        translated.update(await recall_translations(segments, target_language, user_id, story_id))
+        remembered = [segment for segment in segments if segment["key"] in translated]
+        missing = [segment for segment in segments if segment["key"] not in translated]
+        logger.info(f"Translating {len(missing)} of {len(segments)} segments of {len(original_chapters)} chapters")
+        for i, left in enumerate(pending):
+            if left == 0:
+                # Nothing in this chapter's source changed
+                await save_chapter(i)
+        if remembered:
+            await finish_segments(remembered)
+        batches = [asyncio.ensure_future(run_batch(batch)) for batch in pack_translation_batches(missing)]
+        try:
+            await asyncio.gather(*batches)
+        except BaseException:
+            # A chapter failed to save: stop the other batches before the task is marked failed
+            for batch in batches:
+                batch.cancel()
+            raise
+        
+        if existing_story:
+            # Drop translated chapters whose source chapter is gone
+            source_ids = {chapter["id"] for chapter in original_chapters}
+            stale = [c["id"] for source_id, c in existing_chapters.items() if source_id not in source_ids]
+            if stale:
+                await remove_chapters(new_story_id, stale)
         
         task["status"] = "completed"
         task["current_chapter_name"] = ""
@@ -2874,6 +4886,7 @@ Rules:
         logger.error(f"Translation task {task_id} failed: {e}", exc_info=True)
         task["status"] = "failed"
         task["error"] = str(e)
+    publish_task_event("translation", task_id, task)
 
 
 @api_router.get("/stories/translate-progress/{task_id}")
@@ -2895,17 +4908,18 @@ async def append_content_blocks(
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    new_blocks = [b.dict() for b in data.blocks]
-    now = datetime.now(timezone.utc).isoformat()
-    await db.chapters.update_one(
-        {"id": chapter_id},
-        {"$push": {"content_blocks": {"$each": new_blocks}}, "$set": {"updated_at": now}}
+    new_blocks = with_block_ids([b.dict() for b in data.blocks])
+    version = await edit_chapter_blocks(
+        story_id, chapter_id,
+        lambda state: {"$push": {"content_blocks": {"$each": new_blocks}}, "$inc": stats_inc(new_blocks)},
+        guarded=False
     )
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
-    return {"message": f"{len(new_blocks)} block(s) added", "total_blocks": len(chapter.get("content_blocks", [])) + len(new_blocks)}
+    return {
+        "message": f"{len(new_blocks)} block(s) added",
+        "total_blocks": await count_chapter_blocks(chapter_id),
+        "block_ids": [b["block_id"] for b in new_blocks],
+        "version": version
+    }
 
 
 class InsertBlockRequest(BaseModel):
@@ -2923,28 +4937,25 @@ async def insert_content_block(
     story = await db.stories.find_one({"id": story_id, "user_id": user["id"]})
     if not story:
         raise HTTPException(status_code=404, detail="Story not found")
-    chapter = await db.chapters.find_one({"id": chapter_id, "story_id": story_id}, {"_id": 0})
-    if not chapter:
-        raise HTTPException(status_code=404, detail="Chapter not found")
-    
-    blocks = chapter.get("content_blocks", [])
-    new_block = data.block.dict()
-    insert_index = data.position + 1  # Insert AFTER the specified position
-    
-    if insert_index < 0:
-        insert_index = 0
-    elif insert_index > len(blocks):
-        insert_index = len(blocks)
-    
-    blocks.insert(insert_index, new_block)
-    
-    now = datetime.now(timezone.utc).isoformat()
-    await db.chapters.update_one(
-        {"id": chapter_id},
-        {"$set": {"content_blocks": blocks, "updated_at": now}}
+    new_block = with_block_ids([data.block.dict()])[0]
+    insert_index = max(data.position + 1, 0)  # Insert AFTER the specified position
+    # $position past the end of the array appends
+    version = await edit_chapter_blocks(
+        story_id, chapter_id,
+        lambda state: {
+            "$push": {"content_blocks": {"$each": [new_block], "$position": insert_index}},
+            "$inc": stats_inc([new_block])
+        },
+        guarded=False
     )
-    await db.stories.update_one({"id": story_id}, {"$set": {"updated_at": now}})
-    return {"message": "Block inserted", "position": insert_index, "total_blocks": len(blocks)}
+    total_blocks = await count_chapter_blocks(chapter_id)
+    return {
+        "message": "Block inserted",
+        "position": min(insert_index, total_blocks - 1),
+        "total_blocks": total_blocks,
+        "block_id": new_block["block_id"],
+        "version": version
+    }
 
 
 @api_router.get("/stories/{story_id}/preview-pdf")
@@ -2960,6 +4971,14 @@ async def story_preview_pdf(story_id: str, chapter_id: str = None, token: Option
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    return await singleflight(
+        ("story_preview_pdf", story_id, chapter_id, user_id),
+        lambda: render_story_preview_pdf(story_id, chapter_id, user_id)
+    )
+
+
+async def render_story_preview_pdf(story_id: str, chapter_id: Optional[str], user_id: str) -> Response:
+    """Build the story preview PDF response"""
     from fpdf import FPDF
     from pathlib import Path
 
@@ -3123,6 +5142,14 @@ async def story_export_word(story_id: str, chapter_id: str = None, token: Option
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    return await singleflight(
+        ("story_export_word", story_id, chapter_id, user_id),
+        lambda: render_story_word(story_id, chapter_id, user_id)
+    )
+
+
+async def render_story_word(story_id: str, chapter_id: Optional[str], user_id: str) -> Response:
+    """Build the story Word export response"""
     from docx import Document
     from docx.shared import Inches, Pt
     from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -3255,6 +5282,32 @@ class ExportAudioRequest(BaseModel):
 audio_export_tasks: Dict[str, dict] = {}
 
 
+def audio_progress_view(task: dict) -> dict:
+    """Public progress fields of an audio export task (no file paths)"""
+    return {
+        "status": task["status"],
+        "story_name": task["story_name"],
+        "voice": task["voice"],
+        "model": task["model"],
+        "total_chapters": task["total_chapters"],
+        "current_chapter": task["current_chapter"],
+        "current_chapter_name": task["current_chapter_name"],
+        "total_characters": task["total_characters"],
+        "characters_processed": task["characters_processed"],
+        "error": task["error"],
+        "has_audio": task.get("audio_file") is not None
+    }
+
+
+def audio_event_data(task_id: str, task: dict) -> dict:
+    return {"task_id": task_id, **audio_progress_view(task)}
+
+
+def publish_audio_event(task_id: str, task: dict):
+    """Publish an audio export task's progress to its owner's event streams"""
+    publish_event(task.get("user_id"), "audio_export", audio_event_data(task_id, task))
+
+
 @api_router.post("/stories/{story_id}/export-audio")
 async def start_audio_export(
     story_id: str,
@@ -3302,6 +5355,7 @@ async def start_audio_export(
     # Create task
     task_id = str(uuid.uuid4())
     audio_export_tasks[task_id] = {
+        "user_id": user["id"],
         "status": "running",
         "story_name": story["name"],
         "voice": data.voice,
@@ -3316,6 +5370,7 @@ async def start_audio_export(
         "error": None,
         "started_at": datetime.now(timezone.utc).isoformat()
     }
+    publish_audio_event(task_id, audio_export_tasks[task_id])
     
     # Start background task
     import asyncio
@@ -3352,6 +5407,7 @@ async def run_audio_export_task(
         for i, chapter in enumerate(chapters):
             task["current_chapter"] = i + 1
             task["current_chapter_name"] = chapter.get("name", f"Chapter {i+1}")
+            publish_audio_event(task_id, task)
             logger.info(f"Processing audio for chapter {i+1}/{len(chapters)}: {chapter.get('name', 'Untitled')}")
             
             # Collect all text from chapter
@@ -3388,6 +5444,7 @@ async def run_audio_export_task(
                 )
                 all_audio_chunks.append(audio_bytes)
                 task["characters_processed"] += len(chunk)
+                publish_audio_event(task_id, task)
         
         # Concatenate all MP3 chunks
         if all_audio_chunks:
@@ -3412,6 +5469,73 @@ async def run_audio_export_task(
         logger.error(f"Audio export task {task_id} failed: {e}", exc_info=True)
         task["status"] = "failed"
         task["error"] = str(e)
+    publish_audio_event(task_id, task)
+
+
+# ========== Event Stream (SSE) ==========
+
+EVENT_KEEPALIVE_SECONDS = 15
+
+
+class EventTokenLogFilter(logging.Filter):
+    """Drop the query string of /api/events from uvicorn's access log, since it carries the token"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args
+        if isinstance(args, tuple) and len(args) > 2 and isinstance(args[2], str) and args[2].startswith("/api/events?"):
+            record.args = (*args[:2], args[2].split("?", 1)[0], *args[3:])
+        return True
+
+
+logging.getLogger("uvicorn.access").addFilter(EventTokenLogFilter())
+
+
+@api_router.get("/events")
+async def stream_events(request: Request, token: Optional[str] = None, credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))):
+    """Server-sent events for the user's file embedding status and reindex, translation
+    and audio export progress. Replaces polling the individual progress endpoints."""
+    # EventSource can't set headers, so accept the token as a query param too
+    auth_token = credentials.credentials if credentials else token
+    if not auth_token:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    user_id = (await token_user(auth_token))["id"]
+
+    import asyncio
+    queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+    event_subscribers.setdefault(user_id, set()).add(queue)
+
+    # Replay running tasks into this stream only, so a client connecting mid-task gets
+    # current progress without repeating it on the user's other open streams
+    for event, tasks in (("reindex", reindex_tasks), ("translation", translation_tasks)):
+        for task_id, task in list(tasks.items()):
+            if task.get("user_id") == user_id and task["status"] == "running":
+                offer_event(queue, {"event": event, "data": task_event_data(task_id, task)})
+    for task_id, task in list(audio_export_tasks.items()):
+        if task.get("user_id") == user_id and task["status"] == "running":
+            offer_event(queue, {"event": "audio_export", "data": audio_event_data(task_id, task)})
+
+    async def event_generator():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_format(message["event"], message["data"])
+        finally:
+            subscribers = event_subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    event_subscribers.pop(user_id, None)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # Root API route for deployment startup checks
@@ -3447,3 +5571,4 @@ async def api_health_check():
 @app.on_event("shutdown")
 async def shutdown():
     client.close()
+    await llm.close()
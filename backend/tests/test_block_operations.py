@@ -0,0 +1,175 @@
+"""
+Test suite for atomic chapter block operations
+Tests that block edits keep stable block ids, bump the chapter version, reject
+stale expected_version values with 409, remove Exhibit labels with media,
+apply PATCH batches of block ops against a base version, and give repeated
+block ids in a full replace fresh ids
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestBlockOperations:
+    """Tests for block ids and versions on chapter content blocks"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture
+    def chapter(self, auth_headers):
+        """A fresh story with one chapter holding blocks A, B, C"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers, json={"name": "TEST_blocks_story"}).json()
+        chapter = requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={
+            "content_blocks": [{"type": "text", "content": c} for c in "ABC"]
+        }).json()
+        yield story["id"], chapter
+        requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+
+    def get_chapter(self, auth_headers, story_id, chapter_id):
+        return requests.get(f"{BASE_URL}/api/stories/{story_id}/chapters/{chapter_id}", headers=auth_headers).json()
+
+    def test_new_chapter_has_ids_and_version(self, chapter):
+        """Created chapters start at version 0 with an id on every block"""
+        _, data = chapter
+        assert data["version"] == 0
+        ids = [b["block_id"] for b in data["content_blocks"]]
+        assert all(ids) and len(set(ids)) == 3
+        print("✓ New chapter blocks carry unique block ids")
+
+    def test_update_and_insert_keep_ids(self, auth_headers, chapter):
+        """Updating a block keeps its id; inserting shifts the others without renaming them"""
+        story_id, data = chapter
+        base = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}"
+        ids = [b["block_id"] for b in data["content_blocks"]]
+
+        response = requests.put(f"{base}/blocks/1", headers=auth_headers, json={"type": "text", "content": "B2"})
+        assert response.status_code == 200
+        assert response.json()["version"] == 1
+        response = requests.post(f"{base}/insert-block", headers=auth_headers,
+                                 json={"block": {"type": "text", "content": "Start"}, "position": -1})
+        assert response.json()["position"] == 0
+        assert response.json()["total_blocks"] == 4
+
+        blocks = self.get_chapter(auth_headers, story_id, data["id"])["content_blocks"]
+        assert [b["content"] for b in blocks] == ["Start", "A", "B2", "C"]
+        assert [b["block_id"] for b in blocks[1:]] == ids
+        print("✓ Block edits preserve block ids")
+
+    def test_stale_version_conflict(self, auth_headers, chapter):
+        """An edit based on an old version is rejected"""
+        story_id, data = chapter
+        base = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}"
+        requests.put(f"{base}/blocks/0", headers=auth_headers, json={"type": "text", "content": "A2"})
+        response = requests.delete(f"{base}/blocks/0", headers=auth_headers, params={"expected_version": 0})
+        assert response.status_code == 409
+        response = requests.delete(f"{base}/blocks/0", headers=auth_headers, params={"expected_version": 1})
+        assert response.status_code == 200
+        assert response.json()["version"] == 2
+        print("✓ Stale expected_version returns 409")
+
+    def test_out_of_range(self, auth_headers, chapter):
+        """Indexes past the end are rejected"""
+        story_id, data = chapter
+        base = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}"
+        assert requests.put(f"{base}/blocks/3", headers=auth_headers, json={"type": "text", "content": "X"}).status_code == 400
+        assert requests.delete(f"{base}/blocks/5", headers=auth_headers).status_code == 400
+        print("✓ Out-of-range block index returns 400")
+
+    def test_media_delete_removes_exhibit_label(self, auth_headers, chapter):
+        """Deleting a media block also deletes its Exhibit label"""
+        story_id, data = chapter
+        base = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}"
+        files = {"file": ("TEST_exhibit.png", b"\x89PNG\r\n\x1a\n", "image/png")}
+        media = requests.post(f"{base}/media", headers=auth_headers, files=files, params={"position": 1}).json()
+        blocks = self.get_chapter(auth_headers, story_id, data["id"])["content_blocks"]
+        assert blocks[1]["content"].strip() == "Exhibit 1"
+        assert blocks[2]["block_id"] == media["block_id"]
+        try:
+            response = requests.delete(f"{base}/blocks/2", headers=auth_headers)
+            assert response.status_code == 200
+            blocks = self.get_chapter(auth_headers, story_id, data["id"])["content_blocks"]
+            assert [b["content"] for b in blocks] == ["A", "B", "C"]
+            print("✓ Media delete removed its Exhibit label")
+        finally:
+            requests.delete(f"{BASE_URL}/api/files/{media['id']}", headers=auth_headers)
+
+    def test_patch_batch(self, auth_headers, chapter):
+        """A patch applies insert, update, move and delete in one versioned step"""
+        story_id, data = chapter
+        a, b, c = [blk["block_id"] for blk in data["content_blocks"]]
+        response = requests.patch(f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}/blocks", headers=auth_headers, json={
+            "base_version": 0,
+            "ops": [
+                {"op": "insert", "after_id": a, "block": {"type": "text", "content": "New", "block_id": "TEST_new"}},
+                {"op": "update", "block_id": "TEST_new", "block": {"type": "text", "content": "New2"}},
+                {"op": "move", "block_id": c, "after_id": None},
+                {"op": "delete", "block_id": b},
+            ]
+        })
+        assert response.status_code == 200, response.text
+        assert response.json()["version"] == 1
+        assert response.json()["inserted_ids"] == ["TEST_new"]
+        blocks = self.get_chapter(auth_headers, story_id, data["id"])["content_blocks"]
+        assert [blk["content"] for blk in blocks] == ["C", "A", "New2"]
+        print("✓ Patch applied a mixed batch of block ops")
+
+    def test_patch_rejects_stale_or_invalid(self, auth_headers, chapter):
+        """Stale base versions conflict and a bad op leaves the chapter untouched"""
+        story_id, data = chapter
+        url = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}/blocks"
+        a = data["content_blocks"][0]["block_id"]
+        update = {"op": "update", "block_id": a, "block": {"type": "text", "content": "A2"}}
+        assert requests.patch(url, headers=auth_headers, json={"base_version": 0, "ops": [update]}).status_code == 200
+        assert requests.patch(url, headers=auth_headers, json={"base_version": 0, "ops": [update]}).status_code == 409
+
+        response = requests.patch(url, headers=auth_headers, json={"base_version": 1, "ops": [
+            {"op": "delete", "block_id": a}, {"op": "delete", "block_id": "missing"}
+        ]})
+        assert response.status_code == 400
+        chapter_now = self.get_chapter(auth_headers, story_id, data["id"])
+        assert chapter_now["version"] == 1
+        assert [blk["content"] for blk in chapter_now["content_blocks"]] == ["A2", "B", "C"]
+        print("✓ Stale or invalid patches are rejected atomically")
+
+    def test_patch_single_insert_and_deletes(self, auth_headers, chapter):
+        """Single inserts and delete-only patches land where expected and keep counts right"""
+        story_id, data = chapter
+        url = f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}/blocks"
+        a, b, c = [blk["block_id"] for blk in data["content_blocks"]]
+        response = requests.patch(url, headers=auth_headers, json={"base_version": 0, "ops": [
+            {"op": "insert", "after_id": b, "block": {"type": "text", "content": "Between"}}
+        ]})
+        assert response.status_code == 200, response.text
+        response = requests.patch(url, headers=auth_headers, json={"base_version": 1, "ops": [
+            {"op": "delete", "block_id": a}, {"op": "delete", "block_id": c}
+        ]})
+        assert response.status_code == 200, response.text
+        chapter_now = self.get_chapter(auth_headers, story_id, data["id"])
+        assert chapter_now["version"] == 2
+        assert [blk["content"] for blk in chapter_now["content_blocks"]] == ["B", "Between"]
+        outline = requests.get(f"{BASE_URL}/api/stories/{story_id}", headers=auth_headers, params={"outline": "true"}).json()
+        assert outline["chapters"][0]["block_count"] == 2
+        print("✓ Single insert and delete-only patches applied")
+
+    def test_replace_with_duplicate_ids(self, auth_headers, chapter):
+        """A full replace repeating a block_id keeps it on the first block only"""
+        story_id, data = chapter
+        a = data["content_blocks"][0]["block_id"]
+        response = requests.put(f"{BASE_URL}/api/stories/{story_id}/chapters/{data['id']}", headers=auth_headers, json={
+            "content_blocks": [{"type": "text", "content": c, "block_id": a} for c in "XY"]
+        })
+        assert response.status_code == 200, response.text
+        blocks = self.get_chapter(auth_headers, story_id, data["id"])["content_blocks"]
+        assert blocks[0]["block_id"] == a
+        assert blocks[1]["block_id"] not in (None, a)
+        print("✓ Repeated block ids replaced with fresh ones")
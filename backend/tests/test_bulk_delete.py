@@ -0,0 +1,71 @@
+"""
+Test suite for bulk file deletion
+Tests that /api/files/bulk-delete removes many files at once, detaches them from
+projects (marking emptied projects inactive) and reports unknown ids
+"""
+import uuid
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestBulkDelete:
+    """Tests for POST /api/files/bulk-delete"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def upload(self, auth_headers, name):
+        files = {"file": (name, b"Bulk delete test content.", "text/plain")}
+        response = requests.post(f"{BASE_URL}/api/files/upload", headers=auth_headers, files=files)
+        assert response.status_code == 200, f"Upload failed: {response.text}"
+        return response.json()["id"]
+
+    def test_bulk_delete_detaches_projects(self, auth_headers):
+        """Deleted files leave their projects; a project left empty becomes inactive"""
+        ids = [self.upload(auth_headers, f"TEST_bulk_{i}.txt") for i in range(3)]
+        keep = self.upload(auth_headers, "TEST_bulk_keep.txt")
+        emptied = requests.post(f"{BASE_URL}/api/projects", headers=auth_headers,
+                                json={"name": "TEST_bulk_emptied", "file_ids": ids[:2]}).json()
+        partial = requests.post(f"{BASE_URL}/api/projects", headers=auth_headers,
+                                json={"name": "TEST_bulk_partial", "file_ids": [ids[2], keep]}).json()
+        missing = str(uuid.uuid4())
+        try:
+            response = requests.post(f"{BASE_URL}/api/files/bulk-delete", headers=auth_headers,
+                                     json={"file_ids": ids + [missing]})
+            assert response.status_code == 200, f"Bulk delete failed: {response.text}"
+            data = response.json()
+            assert data["deleted"] == 3
+            assert data["not_found"] == [missing]
+            affected = {p["id"]: p for p in data["affected_projects"]}
+            assert affected[emptied["id"]]["became_inactive"] is True
+            assert affected[partial["id"]]["remaining_files"] == 1
+
+            for file_id in ids:
+                assert requests.get(f"{BASE_URL}/api/files/{file_id}", headers=auth_headers).status_code == 404
+            project = requests.get(f"{BASE_URL}/api/projects/{emptied['id']}", headers=auth_headers).json()
+            assert project["file_ids"] == []
+            assert project["status"] == "inactive"
+            project = requests.get(f"{BASE_URL}/api/projects/{partial['id']}", headers=auth_headers).json()
+            assert project["file_ids"] == [keep]
+            print("✓ Bulk delete removed files and detached them from projects")
+        finally:
+            for project in (emptied, partial):
+                requests.delete(f"{BASE_URL}/api/projects/{project['id']}", headers=auth_headers)
+            requests.delete(f"{BASE_URL}/api/files/{keep}", headers=auth_headers)
+
+    def test_bulk_delete_limit(self, auth_headers):
+        """Requests over the per-call limit are rejected"""
+        response = requests.post(f"{BASE_URL}/api/files/bulk-delete", headers=auth_headers,
+                                 json={"file_ids": [str(uuid.uuid4()) for _ in range(1001)]})
+        assert response.status_code == 400
+        print("✓ Oversized bulk delete rejected")
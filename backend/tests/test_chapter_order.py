@@ -0,0 +1,88 @@
+"""
+Test suite for chapter ordering
+Tests the bulk /chapters/reorder endpoint and the /chapters/{id}/move endpoint,
+which gives the moved chapter a fractional order key between its new neighbours
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestChapterOrder:
+    """Tests for chapter reorder and move"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture
+    def story(self, auth_headers):
+        """A story with chapters named C0..C3"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers, json={"name": "TEST_order_story"}).json()
+        ids = [
+            requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={"name": f"C{i}"}).json()["id"]
+            for i in range(4)
+        ]
+        yield story["id"], ids
+        requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+
+    def names(self, auth_headers, story_id):
+        story = requests.get(f"{BASE_URL}/api/stories/{story_id}", headers=auth_headers).json()
+        return [ch["name"] for ch in story["chapters"]]
+
+    def move(self, auth_headers, story_id, chapter_id, after_id):
+        return requests.post(f"{BASE_URL}/api/stories/{story_id}/chapters/{chapter_id}/move",
+                             headers=auth_headers, json={"after_id": after_id})
+
+    def test_reorder(self, auth_headers, story):
+        """A full reorder applies the given order"""
+        story_id, ids = story
+        response = requests.put(f"{BASE_URL}/api/stories/{story_id}/chapters/reorder", headers=auth_headers,
+                                json={"chapter_ids": list(reversed(ids))})
+        assert response.status_code == 200
+        assert self.names(auth_headers, story_id) == ["C3", "C2", "C1", "C0"]
+        print("✓ Bulk reorder applied")
+
+    def test_move(self, auth_headers, story):
+        """Moves to the start, middle and end land in the right place"""
+        story_id, ids = story
+        assert self.move(auth_headers, story_id, ids[3], None).status_code == 200
+        assert self.names(auth_headers, story_id) == ["C3", "C0", "C1", "C2"]
+        assert self.move(auth_headers, story_id, ids[0], ids[1]).status_code == 200
+        assert self.names(auth_headers, story_id) == ["C3", "C1", "C0", "C2"]
+        assert self.move(auth_headers, story_id, ids[3], ids[2]).status_code == 200
+        assert self.names(auth_headers, story_id) == ["C1", "C0", "C2", "C3"]
+        print("✓ Chapter moves placed chapters correctly")
+
+    def test_repeated_moves_into_one_gap(self, auth_headers, story):
+        """Halving the same gap past float precision still keeps the order correct"""
+        story_id, ids = story
+        for i in range(60):
+            moving, anchor = (ids[3], ids[1]) if i % 2 == 0 else (ids[2], ids[1])
+            assert self.move(auth_headers, story_id, moving, anchor).status_code == 200
+        assert self.names(auth_headers, story_id) == ["C0", "C1", "C2", "C3"]
+        print("✓ Repeated moves kept a consistent order")
+
+    def test_new_chapter_goes_last_after_moves(self, auth_headers, story):
+        """Deleting and moving chapters never makes a new chapter collide with an old one"""
+        story_id, ids = story
+        requests.delete(f"{BASE_URL}/api/stories/{story_id}/chapters/{ids[1]}", headers=auth_headers)
+        self.move(auth_headers, story_id, ids[0], ids[3])
+        requests.post(f"{BASE_URL}/api/stories/{story_id}/chapters", headers=auth_headers, json={"name": "C4"})
+        assert self.names(auth_headers, story_id) == ["C2", "C3", "C0", "C4"]
+        print("✓ New chapter is appended after moved chapters")
+
+    def test_invalid_move(self, auth_headers, story):
+        """Moving after itself or after an unknown chapter is rejected"""
+        story_id, ids = story
+        assert self.move(auth_headers, story_id, ids[0], ids[0]).status_code == 400
+        assert self.move(auth_headers, story_id, ids[0], "missing").status_code == 404
+        print("✓ Invalid moves rejected")
@@ -0,0 +1,72 @@
+"""
+Test suite for persisted AI chat history
+Tests that /api/chat sessions are stored server-side, returned in order by
+/api/chat/sessions, scoped to their owner, and removed when cleared
+"""
+import uuid
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestChatHistory:
+    """Tests for the chat_messages session store"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture(scope="class")
+    def session_id(self, auth_headers):
+        """A fresh session id, cleared after the tests"""
+        session_id = f"TEST_history_{uuid.uuid4()}"
+        yield session_id
+        requests.delete(f"{BASE_URL}/api/chat/sessions/{session_id}", headers=auth_headers)
+
+    def test_history_persists_in_order(self, auth_headers, session_id):
+        """Two exchanges are returned as four messages, oldest first"""
+        for message in ["First question", "Second question"]:
+            response = requests.post(f"{BASE_URL}/api/chat", headers=auth_headers, json={
+                "message": message, "session_id": session_id, "include_file_context": False
+            })
+            assert response.status_code == 200, f"Chat failed: {response.text}"
+            assert response.json()["session_id"] == session_id
+
+        response = requests.get(f"{BASE_URL}/api/chat/sessions", headers=auth_headers, params={"session_id": session_id})
+        assert response.status_code == 200
+        messages = response.json()["messages"]
+        assert [m["role"] for m in messages] == ["user", "assistant", "user", "assistant"]
+        assert messages[0]["content"] == "First question"
+        assert messages[2]["content"] == "Second question"
+        print(f"✓ Session history persisted: {len(messages)} messages")
+
+    def test_history_is_scoped_to_owner(self, session_id):
+        """Another user sees nothing for the same session id"""
+        # One shared second account, registered on first use
+        credentials = {"email": "test_history_other@archiva.com", "password": "test123"}
+        response = requests.post(f"{BASE_URL}/api/auth/login", json=credentials)
+        if response.status_code != 200:
+            response = requests.post(f"{BASE_URL}/api/auth/register", json={**credentials, "name": "History Test"})
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        other = {"Authorization": f"Bearer {response.json()['token']}"}
+        response = requests.get(f"{BASE_URL}/api/chat/sessions", headers=other, params={"session_id": session_id})
+        assert response.status_code == 200
+        assert response.json()["messages"] == []
+        print("✓ Session history not visible to other users")
+
+    def test_clear_session(self, auth_headers, session_id):
+        """Clearing a session removes its history"""
+        response = requests.delete(f"{BASE_URL}/api/chat/sessions/{session_id}", headers=auth_headers)
+        assert response.status_code == 200
+        response = requests.get(f"{BASE_URL}/api/chat/sessions", headers=auth_headers, params={"session_id": session_id})
+        assert response.json()["messages"] == []
+        print("✓ Session cleared")
+
@@ -0,0 +1,104 @@
+"""
+Test suite for streamed chat replies
+Tests that /api/chat/stream, /api/projects/{id}/chat/stream and
+/api/stories/{id}/chat/stream emit sources/token/done events and persist the
+finished reply like their non-streaming counterparts
+"""
+import json
+import uuid
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+def collect_events(response):
+    """Parse a complete SSE body into a list of (event, data) pairs"""
+    events = []
+    for block in response.text.split("\n\n"):
+        event, data = None, None
+        for line in block.split("\n"):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):].strip())
+        if event:
+            events.append((event, data))
+    return events
+
+
+class TestChatStreaming:
+    """Tests for SSE chat endpoints"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def test_archive_chat_stream(self, auth_headers):
+        """Sources come first, then tokens, then done; the turn is saved to the session"""
+        session_id = f"TEST_stream_{uuid.uuid4()}"
+        response = requests.post(f"{BASE_URL}/api/chat/stream", headers=auth_headers, json={
+            "message": "Say hello", "session_id": session_id, "include_file_context": False
+        }, timeout=120)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = collect_events(response)
+        names = [e for e, _ in events]
+        assert names[0] == "sources"
+        assert names[-1] == "done", f"Stream did not finish cleanly: {events[-1]}"
+        reply = "".join(d["text"] for e, d in events if e == "token")
+        assert reply
+
+        history = requests.get(f"{BASE_URL}/api/chat/sessions", headers=auth_headers, params={"session_id": session_id}).json()
+        assert history["messages"][-1] == {"role": "assistant", "content": reply}
+        requests.delete(f"{BASE_URL}/api/chat/sessions/{session_id}", headers=auth_headers)
+        print(f"✓ Archive chat streamed {names.count('token')} tokens and saved the reply")
+
+    def test_project_chat_stream(self, auth_headers):
+        """Project replies stream and are persisted as project messages"""
+        project = requests.post(f"{BASE_URL}/api/projects", headers=auth_headers, json={"name": "TEST_stream_project"}).json()
+        try:
+            response = requests.post(f"{BASE_URL}/api/projects/{project['id']}/chat/stream", headers=auth_headers,
+                                     json={"message": "Say hello"}, timeout=120)
+            assert response.status_code == 200
+            events = collect_events(response)
+            assert events[0][0] == "sources"
+            assert events[-1][0] == "done"
+            reply = "".join(d["text"] for e, d in events if e == "token")
+            messages = requests.get(f"{BASE_URL}/api/projects/{project['id']}/messages", headers=auth_headers).json()["messages"]
+            assert [m["role"] for m in messages] == ["user", "assistant"]
+            assert messages[1]["content"] == reply
+            print("✓ Project chat streamed and saved")
+        finally:
+            requests.delete(f"{BASE_URL}/api/projects/{project['id']}", headers=auth_headers)
+
+    def test_story_chat_stream(self, auth_headers):
+        """Story replies stream and are persisted as story messages"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers, json={"name": "TEST_stream_story"}).json()
+        try:
+            response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/chat/stream", headers=auth_headers,
+                                     json={"message": "Write one sentence", "mode": "coauthor"}, timeout=120)
+            assert response.status_code == 200
+            events = collect_events(response)
+            assert events[-1][0] == "done"
+            reply = "".join(d["text"] for e, d in events if e == "token")
+            messages = requests.get(f"{BASE_URL}/api/stories/{story['id']}/messages", headers=auth_headers).json()["messages"]
+            assert messages[-1]["role"] == "assistant"
+            assert messages[-1]["content"] == reply
+            print("✓ Story chat streamed and saved")
+        finally:
+            requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+
+    def test_stream_unknown_project(self, auth_headers):
+        """Unknown projects are rejected before the stream starts"""
+        response = requests.post(f"{BASE_URL}/api/projects/{uuid.uuid4()}/chat/stream", headers=auth_headers,
+                                 json={"message": "hi"})
+        assert response.status_code == 404
+        print("✓ Unknown project returns 404")
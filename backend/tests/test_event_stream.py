@@ -0,0 +1,74 @@
+"""
+Test suite for the server-sent event stream at /api/events
+Tests that the stream authenticates, and that embedding status transitions
+for a freshly uploaded file are pushed to the owner
+"""
+import json
+import threading
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+def read_events(response, stop):
+    """Yield (event, data) pairs from an SSE response until stop() is true"""
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:") and event:
+            yield event, json.loads(line[len("data:"):].strip())
+            event = None
+        if stop():
+            return
+
+
+class TestEventStream:
+    """Tests for pushed file status events"""
+
+    @pytest.fixture(scope="class")
+    def token(self):
+        """Authenticate and return the auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return response.json()['token']
+
+    def test_stream_requires_auth(self):
+        """Connecting without a token is rejected"""
+        response = requests.get(f"{BASE_URL}/api/events", timeout=10)
+        assert response.status_code == 401
+        print("✓ Event stream rejects unauthenticated clients")
+
+    def test_upload_pushes_file_status(self, token):
+        """Uploading a text file pushes file_status events ending in a final state"""
+        headers = {"Authorization": f"Bearer {token}"}
+        stream = requests.get(f"{BASE_URL}/api/events", params={"token": token}, stream=True, timeout=30)
+        assert stream.status_code == 200
+        assert stream.headers["content-type"].startswith("text/event-stream")
+
+        upload = {}
+
+        def do_upload():
+            files = {"file": ("TEST_events.txt", b"Event stream test content about lighthouses.", "text/plain")}
+            upload["response"] = requests.post(f"{BASE_URL}/api/files/upload", headers=headers, files=files)
+
+        uploader = threading.Thread(target=do_upload)
+        uploader.start()
+        statuses = []
+        try:
+            for event, data in read_events(stream, lambda: statuses and statuses[-1] in ("completed", "failed", "skipped", "disabled")):
+                if event == "file_status" and data.get("original_filename") == "TEST_events.txt":
+                    statuses.append(data["embedding_status"])
+        finally:
+            stream.close()
+            uploader.join()
+            if "response" in upload:
+                requests.delete(f"{BASE_URL}/api/files/{upload['response'].json()['id']}", headers=headers)
+
+        assert statuses, "No file_status events received for the upload"
+        print(f"✓ Received file_status transitions: {statuses}")
@@ -0,0 +1,89 @@
+"""
+Test suite for keyset (cursor) pagination on /api/files
+Tests that next_cursor pages through the archive without duplicates or gaps,
+that totals can be skipped, and that malformed cursors are rejected
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestKeysetPagination:
+    """Tests for cursor-based file listing"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture(scope="class")
+    def uploaded_ids(self, auth_headers):
+        """Upload a handful of small files so there are several pages to walk"""
+        ids = []
+        for i in range(5):
+            files = {"file": (f"TEST_cursor_{i}.txt", f"Cursor pagination test file {i}".encode(), "text/plain")}
+            response = requests.post(f"{BASE_URL}/api/files/upload", headers=auth_headers, files=files)
+            assert response.status_code == 200, f"Upload failed: {response.text}"
+            ids.append(response.json()["id"])
+        yield ids
+        for file_id in ids:
+            requests.delete(f"{BASE_URL}/api/files/{file_id}", headers=auth_headers)
+
+    def test_first_page_returns_cursor(self, auth_headers, uploaded_ids):
+        """First page reports has_more and an opaque next_cursor"""
+        response = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["files"]) == 2
+        assert data["has_more"] is True
+        assert isinstance(data["next_cursor"], str) and data["next_cursor"]
+        print(f"✓ First page returned cursor {data['next_cursor'][:16]}...")
+
+    def test_cursor_walk_has_no_duplicates(self, auth_headers, uploaded_ids):
+        """Walking next_cursor visits every file exactly once, newest first"""
+        seen = []
+        cursor = None
+        for _ in range(100):
+            params = {"limit": 2, "include_total": "false"}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params=params)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(f["id"] for f in data["files"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)), "Cursor pagination returned duplicate files"
+        assert set(uploaded_ids).issubset(seen), "Cursor pagination skipped uploaded files"
+        print(f"✓ Walked {len(seen)} files without duplicates")
+
+    def test_cursor_matches_page_order(self, auth_headers, uploaded_ids):
+        """Second cursor page equals page=2 of numbered pagination"""
+        first = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"limit": 2}).json()
+        by_cursor = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"limit": 2, "cursor": first["next_cursor"]}).json()
+        by_page = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"limit": 2, "page": 2}).json()
+        assert [f["id"] for f in by_cursor["files"]] == [f["id"] for f in by_page["files"]]
+        print("✓ Cursor page 2 matches numbered page 2")
+
+    def test_total_can_be_skipped(self, auth_headers, uploaded_ids):
+        """include_total=false omits the count"""
+        response = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"limit": 2, "include_total": "false"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert data["pages"] is None
+        print("✓ Total omitted when include_total=false")
+
+    def test_invalid_cursor_rejected(self, auth_headers):
+        """Malformed cursors return 400 rather than a server error"""
+        response = requests.get(f"{BASE_URL}/api/files", headers=auth_headers, params={"cursor": "not-a-cursor!"})
+        assert response.status_code == 400
+        print("✓ Invalid cursor rejected with 400")
@@ -0,0 +1,54 @@
+"""
+Test suite for the LLM response cache behind /api/files/summarize
+Tests that repeating a summary of the same file set returns the same article
+regardless of file order, and that use_cache=false is accepted
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestLlmCache:
+    """Tests for cached summaries"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture(scope="class")
+    def file_ids(self, auth_headers):
+        """Two small text files to summarize"""
+        ids = []
+        for i, text in enumerate(["Lighthouses guide ships along rocky coasts.", "Keepers maintained the lamps every night."]):
+            files = {"file": (f"TEST_cache_{i}.txt", text.encode(), "text/plain")}
+            response = requests.post(f"{BASE_URL}/api/files/upload", headers=auth_headers, files=files)
+            assert response.status_code == 200, f"Upload failed: {response.text}"
+            ids.append(response.json()["id"])
+        yield ids
+        for file_id in ids:
+            requests.delete(f"{BASE_URL}/api/files/{file_id}", headers=auth_headers)
+
+    def test_repeat_summary_is_identical(self, auth_headers, file_ids):
+        """The same file set in any order yields the cached article"""
+        first = requests.post(f"{BASE_URL}/api/files/summarize", headers=auth_headers, json={"file_ids": file_ids}, timeout=120)
+        assert first.status_code == 200
+        second = requests.post(f"{BASE_URL}/api/files/summarize", headers=auth_headers, json={"file_ids": file_ids[::-1]}, timeout=120)
+        assert second.status_code == 200
+        assert first.json() == second.json()
+        print(f"✓ Repeat summary identical: {first.json()['title']}")
+
+    def test_cache_can_be_bypassed(self, auth_headers, file_ids):
+        """use_cache=false still returns an article"""
+        response = requests.post(f"{BASE_URL}/api/files/summarize", headers=auth_headers,
+                                 json={"file_ids": file_ids, "use_cache": False}, timeout=120)
+        assert response.status_code == 200
+        assert "title" in response.json()
+        print("✓ Cache bypass accepted")
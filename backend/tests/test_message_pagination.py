@@ -0,0 +1,89 @@
+"""
+Test suite for paginated chat history
+Tests that /api/projects/{id}/messages and /api/stories/{id}/messages return the
+newest page first, page back through older messages with next_cursor, and return
+only newer messages when given a sync_cursor as `since`
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestMessagePagination:
+    """Tests for cursor-paginated project and story messages"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture(scope="class")
+    def project(self, auth_headers):
+        """A project holding five summary messages, 'Summary 0' oldest"""
+        project = requests.post(f"{BASE_URL}/api/projects", headers=auth_headers,
+                                json={"name": "TEST_paging_project", "summary": "Summary 0"}).json()
+        for i in range(1, 5):
+            requests.post(f"{BASE_URL}/api/projects/{project['id']}/append", headers=auth_headers,
+                          json={"summary": f"Summary {i}"})
+        yield project
+        requests.delete(f"{BASE_URL}/api/projects/{project['id']}", headers=auth_headers)
+
+    def test_pages_walk_back_in_order(self, auth_headers, project):
+        """Following next_cursor yields every message exactly once, oldest first within a page"""
+        url = f"{BASE_URL}/api/projects/{project['id']}/messages"
+        first = requests.get(url, headers=auth_headers, params={"limit": 2}).json()
+        assert [m["content"] for m in first["messages"]] == ["Summary 3", "Summary 4"]
+        assert first["has_more"] is True
+
+        contents = [m["content"] for m in first["messages"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = requests.get(url, headers=auth_headers, params={"limit": 2, "cursor": cursor}).json()
+            contents = [m["content"] for m in page["messages"]] + contents
+            cursor = page["next_cursor"]
+        assert contents == [f"Summary {i}" for i in range(5)]
+        print("✓ Project message pages cover the full history in order")
+
+    def test_since_returns_only_new_messages(self, auth_headers, project):
+        """A sync cursor returns nothing until a new message arrives"""
+        url = f"{BASE_URL}/api/projects/{project['id']}/messages"
+        sync = requests.get(url, headers=auth_headers).json()["sync_cursor"]
+        assert requests.get(url, headers=auth_headers, params={"since": sync}).json()["messages"] == []
+        requests.post(f"{BASE_URL}/api/projects/{project['id']}/append", headers=auth_headers, json={"summary": "Summary 5"})
+        newer = requests.get(url, headers=auth_headers, params={"since": sync}).json()
+        assert [m["content"] for m in newer["messages"]] == ["Summary 5"]
+        assert newer["sync_cursor"] != sync
+        print("✓ since= returns only messages added after the sync cursor")
+
+    def test_invalid_cursor(self, auth_headers, project):
+        """Malformed cursors are rejected"""
+        response = requests.get(f"{BASE_URL}/api/projects/{project['id']}/messages", headers=auth_headers,
+                                params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+        print("✓ Invalid cursor returns 400")
+
+    def test_story_messages_page(self, auth_headers):
+        """Story chat history is paginated the same way"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers, json={"name": "TEST_paging_story"}).json()
+        try:
+            for message in ["One", "Two"]:
+                response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/chat", headers=auth_headers,
+                                         json={"message": message, "mode": "coauthor"}, timeout=120)
+                assert response.status_code == 200
+            url = f"{BASE_URL}/api/stories/{story['id']}/messages"
+            page = requests.get(url, headers=auth_headers, params={"limit": 2}).json()
+            assert [m["role"] for m in page["messages"]] == ["user", "assistant"]
+            assert page["messages"][0]["content"] == "Two"
+            older = requests.get(url, headers=auth_headers, params={"limit": 2, "cursor": page["next_cursor"]}).json()
+            assert older["messages"][0]["content"] == "One"
+            assert older["has_more"] is False
+            print("✓ Story messages paginate newest first")
+        finally:
+            requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
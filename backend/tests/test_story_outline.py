@@ -0,0 +1,90 @@
+"""
+Test suite for the story outline and chapter ETags
+Tests that /api/stories/{id}?outline=true returns chapter counts without content,
+that the counts follow block edits, and that /chapters/{id} answers 304 to a
+matching If-None-Match until the chapter changes
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestStoryOutline:
+    """Tests for outline mode and conditional chapter fetches"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    @pytest.fixture
+    def story(self, auth_headers):
+        """A story with one chapter of two text blocks and an image"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers, json={"name": "TEST_outline_story"}).json()
+        chapter = requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={
+            "name": "Opening",
+            "content_blocks": [
+                {"type": "text", "content": "It was a dark night."},
+                {"type": "image", "file_id": "none"},
+                {"type": "text", "content": "Rain fell."},
+            ]
+        }).json()
+        yield story["id"], chapter["id"]
+        requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+
+    def outline(self, auth_headers, story_id):
+        response = requests.get(f"{BASE_URL}/api/stories/{story_id}", headers=auth_headers, params={"outline": "true"})
+        assert response.status_code == 200
+        return response.json()["chapters"]
+
+    def test_outline_counts(self, auth_headers, story):
+        """Outline chapters carry counts but no content"""
+        story_id, chapter_id = story
+        chapter = self.outline(auth_headers, story_id)[0]
+        assert chapter["id"] == chapter_id
+        assert "content_blocks" not in chapter
+        assert chapter["block_count"] == 3
+        assert chapter["text_block_count"] == 2
+        assert chapter["word_count"] == 7
+        assert chapter["char_count"] == len("It was a dark night.") + len("Rain fell.")
+        print("✓ Outline returns chapter counts without bodies")
+
+    def test_counts_follow_edits(self, auth_headers, story):
+        """Block updates, inserts and deletes keep the counts in step"""
+        story_id, chapter_id = story
+        base = f"{BASE_URL}/api/stories/{story_id}/chapters/{chapter_id}"
+        requests.put(f"{base}/blocks/2", headers=auth_headers, json={"type": "text", "content": "Rain fell all night long."})
+        requests.post(f"{base}/insert-block", headers=auth_headers,
+                      json={"block": {"type": "text", "content": "Prologue"}, "position": -1})
+        requests.delete(f"{base}/blocks/1", headers=auth_headers)
+        chapter = self.outline(auth_headers, story_id)[0]
+        assert chapter["block_count"] == 3
+        assert chapter["text_block_count"] == 2
+        assert chapter["word_count"] == 1 + 5
+        print("✓ Outline counts track block edits")
+
+    def test_chapter_etag(self, auth_headers, story):
+        """A matching If-None-Match gets 304 until the chapter is edited"""
+        story_id, chapter_id = story
+        url = f"{BASE_URL}/api/stories/{story_id}/chapters/{chapter_id}"
+        first = requests.get(url, headers=auth_headers)
+        etag = first.headers["ETag"]
+        assert first.json()["content_blocks"]
+
+        cached = requests.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        requests.put(url, headers=auth_headers, json={"name": "Renamed"})
+        changed = requests.get(url, headers={**auth_headers, "If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["name"] == "Renamed"
+        print("✓ Chapter ETag revalidates until the chapter changes")
@@ -0,0 +1,155 @@
+"""
+Test suite for story translation
+Tests that /api/stories/{id}/translate builds a translated copy with every chapter
+in its original order, media blocks kept as-is, block ids carried over and long
+text blocks translated in pieces without losing content, and that an incremental
+re-translate updates the earlier copy in place, rewriting only blocks whose source
+was edited and keeping edits made to the translation
+"""
+import time
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestStoryTranslation:
+    """Tests for the batched translation task"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def test_translate_story(self, auth_headers):
+        """All chapters are translated and assembled in order"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers,
+                              json={"name": "TEST_translate_story", "description": "A short tale."}).json()
+        long_text = "\n\n".join(f"Paragraph {i}. " + "The wind kept blowing. " * 40 for i in range(12))
+        chapters = [
+            requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={
+                "name": f"Chapter {i}",
+                "content_blocks": [
+                    {"type": "text", "content": f"Chapter {i} opens."},
+                    {"type": "image", "file_id": "TEST_image", "caption": "A picture"},
+                    {"type": "text", "content": long_text if i == 1 else f"Chapter {i} ends."},
+                ]
+            }).json()
+            for i in range(5)
+        ]
+        translated_id = None
+        try:
+            response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/translate", headers=auth_headers,
+                                     json={"target_language": "Spanish"})
+            assert response.status_code == 200, response.text
+            task_id = response.json()["task_id"]
+            assert response.json()["total_blocks"] == 10
+
+            for _ in range(300):
+                progress = requests.get(f"{BASE_URL}/api/stories/translate-progress/{task_id}", headers=auth_headers).json()
+                if progress["status"] != "running":
+                    break
+                time.sleep(1)
+            assert progress["status"] == "completed", progress
+            assert progress["blocks_translated"] == 10
+            assert progress["current_chapter"] == 5
+            translated_id = progress["new_story_id"]
+
+            translated = requests.get(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers).json()
+            assert translated["chapter_count"] == 5
+            assert [ch["source_chapter_id"] for ch in translated["chapters"]] == [ch["id"] for ch in chapters]
+            for source, copy in zip(chapters, translated["chapters"]):
+                assert [b["type"] for b in copy["content_blocks"]] == ["text", "image", "text"]
+                assert [b["block_id"] for b in copy["content_blocks"]] == [b["block_id"] for b in source["content_blocks"]]
+                assert copy["content_blocks"][1]["file_id"] == "TEST_image"
+                assert all(b["content"].strip() for b in copy["content_blocks"] if b["type"] == "text")
+            # The long block was split for translation and put back together, paragraphs intact
+            long_copy = translated["chapters"][1]["content_blocks"][2]["content"]
+            assert long_copy.count("\n\n") == long_text.count("\n\n")
+            print("✓ Story translated with chapters in order")
+        finally:
+            requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+            if translated_id:
+                requests.delete(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers)
+
+    def wait(self, auth_headers, task_id):
+        for _ in range(300):
+            progress = requests.get(f"{BASE_URL}/api/stories/translate-progress/{task_id}", headers=auth_headers).json()
+            if progress["status"] != "running":
+                return progress
+            time.sleep(1)
+        return progress
+
+    def test_incremental_retranslate(self, auth_headers):
+        """Re-translating after an edit updates the same copy and only the edited block"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers,
+                              json={"name": "TEST_incremental_story"}).json()
+        chapters = [
+            requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={
+                "name": f"Part {i}",
+                "content_blocks": [{"type": "text", "content": f"Part {i} begins."}, {"type": "text", "content": f"Part {i} ends."}]
+            }).json()
+            for i in range(3)
+        ]
+        translated_id = None
+        try:
+            response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/translate", headers=auth_headers,
+                                     json={"target_language": "German"})
+            progress = self.wait(auth_headers, response.json()["task_id"])
+            assert progress["status"] == "completed", progress
+            translated_id = progress["new_story_id"]
+            before = requests.get(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers).json()["chapters"]
+
+            # A hand edit to the translation of an unchanged source block survives the update
+            requests.put(f"{BASE_URL}/api/stories/{translated_id}/chapters/{before[1]['id']}/blocks/0", headers=auth_headers,
+                         json={"type": "text", "content": "Hand-edited opening."})
+            requests.put(f"{BASE_URL}/api/stories/{story['id']}/chapters/{chapters[1]['id']}/blocks/1", headers=auth_headers,
+                         json={"type": "text", "content": "Part 1 ends differently."})
+            response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/translate", headers=auth_headers,
+                                     json={"target_language": "German", "incremental": True})
+            assert response.json()["incremental"] is True
+            progress = self.wait(auth_headers, response.json()["task_id"])
+            assert progress["status"] == "completed", progress
+            assert progress["new_story_id"] == translated_id
+
+            translated = requests.get(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers).json()
+            after = translated["chapters"]
+            assert translated["chapter_count"] == 3
+            assert [ch["id"] for ch in after] == [ch["id"] for ch in before]
+            assert [ch["version"] for ch in after] == [before[0]["version"], before[1]["version"] + 2, before[2]["version"]]
+            assert after[1]["content_blocks"][0]["content"] == "Hand-edited opening."
+            assert after[1]["content_blocks"][1]["content"] != before[1]["content_blocks"][1]["content"]
+            print("✓ Incremental re-translate rewrote only the edited block")
+        finally:
+            requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+            if translated_id:
+                requests.delete(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers)
+
+    def test_progress_skips_blank_blocks(self, auth_headers):
+        """Blank text blocks are not counted, so progress reaches its total"""
+        story = requests.post(f"{BASE_URL}/api/stories", headers=auth_headers,
+                              json={"name": "TEST_translate_blank"}).json()
+        requests.post(f"{BASE_URL}/api/stories/{story['id']}/chapters", headers=auth_headers, json={
+            "name": "Only",
+            "content_blocks": [{"type": "text", "content": "Words."}, {"type": "text", "content": "  "}]
+        })
+        translated_id = None
+        try:
+            response = requests.post(f"{BASE_URL}/api/stories/{story['id']}/translate", headers=auth_headers,
+                                     json={"target_language": "French"})
+            assert response.json()["total_blocks"] == 1
+            progress = self.wait(auth_headers, response.json()["task_id"])
+            translated_id = progress["new_story_id"]
+            assert progress["status"] == "completed", progress
+            assert progress["blocks_translated"] == progress["total_blocks"]
+            print("✓ Translation progress reached its total")
+        finally:
+            requests.delete(f"{BASE_URL}/api/stories/{story['id']}", headers=auth_headers)
+            if translated_id:
+                requests.delete(f"{BASE_URL}/api/stories/{translated_id}", headers=auth_headers)
@@ -0,0 +1,83 @@
+"""
+Test suite for incrementally maintained per-user archive stats
+Tests that /files/stats and /files/tags follow uploads, tag edits, visibility
+changes and deletes, and agree with a full rebuild
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', 'https://chapter-craft-10.preview.emergentagent.com')
+
+
+class TestUserStats:
+    """Tests for the materialized user_stats document"""
+
+    @pytest.fixture(scope="class")
+    def auth_headers(self):
+        """Authenticate and return headers with auth token"""
+        response = requests.post(
+            f"{BASE_URL}/api/auth/login",
+            json={"email": "test@archiva.com", "password": "test123"}
+        )
+        assert response.status_code == 200, f"Login failed: {response.text}"
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def _stats(self, headers):
+        response = requests.get(f"{BASE_URL}/api/files/stats", headers=headers)
+        assert response.status_code == 200
+        return response.json()
+
+    def _tag_count(self, headers, tag):
+        tags = requests.get(f"{BASE_URL}/api/files/tags", headers=headers).json()
+        return next((t["count"] for t in tags if t["tag"] == tag), 0)
+
+    def test_stats_shape(self, auth_headers):
+        """Stats keep the dashboard response shape"""
+        data = self._stats(auth_headers)
+        for key in ["total_files", "total_size", "type_breakdown", "top_tags", "recent_files"]:
+            assert key in data, f"Stats missing '{key}'"
+        print(f"✓ Stats returned for {data['total_files']} files")
+
+    def test_upload_tag_and_delete_update_counters(self, auth_headers):
+        """Counters move with upload, tag update, visibility change and delete"""
+        before = self._stats(auth_headers)
+        content = b"User stats counter test content"
+        response = requests.post(
+            f"{BASE_URL}/api/files/upload",
+            headers=auth_headers,
+            files={"file": ("TEST_user_stats.txt", content, "text/plain")},
+            data={"tags": "test-stats-tag"}
+        )
+        assert response.status_code == 200, f"Upload failed: {response.text}"
+        file_id = response.json()["id"]
+        try:
+            after_upload = self._stats(auth_headers)
+            assert after_upload["total_files"] == before["total_files"] + 1
+            assert after_upload["total_size"] == before["total_size"] + len(content)
+            assert after_upload["recent_files"][0]["id"] == file_id
+            assert self._tag_count(auth_headers, "test-stats-tag") >= 1
+
+            requests.put(f"{BASE_URL}/api/files/{file_id}/tags", headers=auth_headers, json={"tags": ["test-stats-renamed"]})
+            assert self._tag_count(auth_headers, "test-stats-renamed") >= 1
+
+            requests.put(f"{BASE_URL}/api/files/{file_id}/visibility", headers=auth_headers, json={"is_public": True})
+            assert self._stats(auth_headers)["public_files"] == before.get("public_files", 0) + 1
+        finally:
+            requests.delete(f"{BASE_URL}/api/files/{file_id}", headers=auth_headers)
+
+        after_delete = self._stats(auth_headers)
+        assert after_delete["total_files"] == before["total_files"]
+        assert all(f["id"] != file_id for f in after_delete["recent_files"])
+        print("✓ Stats follow upload, tag, visibility and delete")
+
+    def test_rebuild_matches_incremental(self, auth_headers):
+        """Rebuilding from scratch yields the same totals as the incremental counters"""
+        incremental = self._stats(auth_headers)
+        response = requests.post(f"{BASE_URL}/api/files/stats/rebuild", headers=auth_headers)
+        assert response.status_code == 200
+        rebuilt = self._stats(auth_headers)
+        assert rebuilt["total_files"] == incremental["total_files"]
+        assert rebuilt["total_size"] == incremental["total_size"]
+        assert rebuilt["type_breakdown"] == incremental["type_breakdown"]
+        print("✓ Rebuilt stats match incremental stats")
@@ -38,6 +38,7 @@ export const filesAPI = {
   list: (params) => api.get("/files", { params }),
   get: (id) => api.get(`/files/${id}`),
   delete: (id) => api.delete(`/files/${id}`),
+  bulkDelete: (ids) => api.post("/files/bulk-delete", { file_ids: ids }),
   updateTags: (id, tags) => api.put(`/files/${id}/tags`, { tags }),
   updateVisibility: (id, isPublic) => api.put(`/files/${id}/visibility`, { is_public: isPublic }),
   search: (params) => api.get("/files/search", { params }),
@@ -59,9 +60,82 @@ export const filesAPI = {
 };
 
 // AI Archivist
+// POST a chat turn to a /stream endpoint and read its server-sent events.
+// onSources(data) fires once before the reply; onToken(text) fires with the reply so far.
+// Resolves with the done payload plus the full reply text. The turn carries an
+// Idempotency-Key, so one retry after a dropped connection or a 502 replays the
+// generation already running on the server instead of starting another.
+const streamChat = async (path, body, handlers = {}) => {
+  const idempotencyKey = crypto.randomUUID();
+  try {
+    return await streamChatAttempt(path, body, idempotencyKey, handlers);
+  } catch (err) {
+    if (err.detail !== undefined && err.status !== 502) throw err;
+    return streamChatAttempt(path, body, idempotencyKey, handlers);
+  }
+};
+
+const streamChatAttempt = async (path, body, idempotencyKey, { onSources, onToken } = {}) => {
+  const token = localStorage.getItem("archiva_token");
+  const res = await fetch(`${API_BASE}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}`, "Idempotency-Key": idempotencyKey },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok) {
+    const detail = await res.json().then((d) => d.detail).catch(() => null);
+    throw Object.assign(new Error(detail || `Chat failed (${res.status})`), { detail, status: res.status });
+  }
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let text = "";
+  let done = {};
+  for (;;) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buffer += decoder.decode(value, { stream: true });
+    let sep;
+    while ((sep = buffer.indexOf("\n\n")) >= 0) {
+      const raw = buffer.slice(0, sep);
+      buffer = buffer.slice(sep + 2);
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+      const payload = JSON.parse(data);
+      if (event === "sources") onSources?.(payload);
+      else if (event === "token") {
+        text += payload.text;
+        onToken?.(text);
+      } else if (event === "done") done = payload;
+      else if (event === "error") throw Object.assign(new Error(payload.detail), { detail: payload.detail });
+    }
+  }
+  return { ...done, text };
+};
+
+// Chat turns carry an Idempotency-Key, so retrying after a dropped connection or a 502
+// attaches to the generation already running on the server instead of starting another.
+const postChatTurn = async (path, body) => {
+  const config = { headers: { "Idempotency-Key": crypto.randomUUID() } };
+  try {
+    return await api.post(path, body, config);
+  } catch (err) {
+    const status = err.response?.status;
+    if (status && status !== 502) throw err;
+    return api.post(path, body, config);
+  }
+};
+
 export const chatAPI = {
   send: (message, sessionId = null, includeFileContext = true, priorityFileIds = null) => 
-    api.post("/chat", { message, session_id: sessionId, include_file_context: includeFileContext, priority_file_ids: priorityFileIds }),
+    postChatTurn("/chat", { message, session_id: sessionId, include_file_context: includeFileContext, priority_file_ids: priorityFileIds }),
+  stream: (message, sessionId = null, includeFileContext = true, priorityFileIds = null, handlers = {}) =>
+    streamChat("/chat/stream", { message, session_id: sessionId, include_file_context: includeFileContext, priority_file_ids: priorityFileIds }, handlers),
   getSession: (sessionId) => api.get("/chat/sessions", { params: { session_id: sessionId } }),
   clearSession: (sessionId) => api.delete(`/chat/sessions/${sessionId}`),
   speechToText: (audioBlob) => {
@@ -82,16 +156,19 @@ export const projectsAPI = {
   append: (id, data) => api.post(`/projects/${id}/append`, data),
   exportPdf: (id) => `${BACKEND_URL}/api/projects/${id}/export-pdf`,
   delete: (id) => api.delete(`/projects/${id}`),
-  getMessages: (id) => api.get(`/projects/${id}/messages`),
+  // Newest page of messages; pass { cursor: next_cursor } for older ones or { since: sync_cursor } for new ones
+  getMessages: (id, params = {}) => api.get(`/projects/${id}/messages`, { params }),
   chat: (id, message, includeFileContext = true) => 
-    api.post(`/projects/${id}/chat`, { message, include_file_context: includeFileContext }),
+    postChatTurn(`/projects/${id}/chat`, { message, include_file_context: includeFileContext }),
+  chatStream: (id, message, handlers = {}, includeFileContext = true) =>
+    streamChat(`/projects/${id}/chat/stream`, { message, include_file_context: includeFileContext }, handlers),
 };
 
 // Stories
 export const storiesAPI = {
   create: (data) => api.post("/stories", data),
   list: () => api.get("/stories"),
-  get: (id) => api.get(`/stories/${id}`),
+  get: (id, params = {}) => api.get(`/stories/${id}`, { params }),
   update: (id, data) => api.put(`/stories/${id}`, data),
   delete: (id) => api.delete(`/stories/${id}`),
   createChapter: (storyId, data) => api.post(`/stories/${storyId}/chapters`, data),
@@ -99,6 +176,8 @@ export const storiesAPI = {
   updateChapter: (storyId, chapterId, data) => api.put(`/stories/${storyId}/chapters/${chapterId}`, data),
   deleteChapter: (storyId, chapterId) => api.delete(`/stories/${storyId}/chapters/${chapterId}`),
   reorderChapters: (storyId, chapterIds) => api.put(`/stories/${storyId}/chapters/reorder`, { chapter_ids: chapterIds }),
+  moveChapter: (storyId, chapterId, afterId = null) =>
+    api.post(`/stories/${storyId}/chapters/${chapterId}/move`, { after_id: afterId }),
   uploadMedia: (storyId, chapterId, formData) => 
     api.post(`/stories/${storyId}/chapters/${chapterId}/media`, formData, { headers: { "Content-Type": "multipart/form-data" } }),
   importFile: (storyId, chapterId, fileId) => 
@@ -111,9 +190,11 @@ export const storiesAPI = {
     api.post(`/stories/${storyId}/chapters/${chapterId}/append-blocks`, { blocks: [block] }),
   insertBlock: (storyId, chapterId, block, position) =>
     api.post(`/stories/${storyId}/chapters/${chapterId}/insert-block`, { block, position }),
+  patchBlocks: (storyId, chapterId, baseVersion, ops) =>
+    api.patch(`/stories/${storyId}/chapters/${chapterId}/blocks`, { base_version: baseVersion, ops }),
   getLanguages: () => api.get("/stories/languages"),
-  translate: (storyId, targetLanguage) =>
-    api.post(`/stories/${storyId}/translate`, { target_language: targetLanguage }),
+  translate: (storyId, targetLanguage, incremental = false) =>
+    api.post(`/stories/${storyId}/translate`, { target_language: targetLanguage, incremental }),
   getTranslationProgress: (taskId) => api.get(`/stories/translate-progress/${taskId}`),
   getTtsOptions: () => api.get("/stories/tts-options"),
   exportAudio: (storyId, voice, model, chapterId = null) =>
@@ -133,10 +214,44 @@ export const storiesAPI = {
     if (chapterId) url += `&chapter_id=${chapterId}`;
     return url;
   },
-  getMessages: (storyId, chapterId = null) => 
-    api.get(`/stories/${storyId}/messages`, { params: chapterId ? { chapter_id: chapterId } : {} }),
+  getMessages: (storyId, chapterId = null, params = {}) => 
+    api.get(`/stories/${storyId}/messages`, { params: chapterId ? { ...params, chapter_id: chapterId } : params }),
   chat: (storyId, message, mode = "coauthor", chapterId = null) => 
-    api.post(`/stories/${storyId}/chat`, { message, mode, chapter_id: chapterId }),
+    postChatTurn(`/stories/${storyId}/chat`, { message, mode, chapter_id: chapterId }),
+  chatStream: (storyId, message, mode = "coauthor", chapterId = null, handlers = {}) =>
+    streamChat(`/stories/${storyId}/chat/stream`, { message, mode, chapter_id: chapterId }, handlers),
+};
+
+// Server events: one shared EventSource per client for file status and task progress
+const EVENT_TYPES = ["file_status", "reindex", "translation", "audio_export"];
+let eventSource = null;
+const eventListeners = new Set();
+
+export const eventsAPI = {
+  // handler(type, data) is called for every event; returns an unsubscribe function
+  subscribe: (handler) => {
+    eventListeners.add(handler);
+    if (!eventSource) {
+      const token = localStorage.getItem("archiva_token");
+      eventSource = new EventSource(`${API_BASE}/events?token=${token}`);
+      EVENT_TYPES.forEach((type) =>
+        eventSource.addEventListener(type, (e) => {
+          const data = JSON.parse(e.data);
+          eventListeners.forEach((fn) => fn(type, data));
+        })
+      );
+    }
+    return () => {
+      eventListeners.delete(handler);
+      // Close lazily so a component re-subscribing on re-render keeps the same connection
+      setTimeout(() => {
+        if (eventListeners.size === 0 && eventSource) {
+          eventSource.close();
+          eventSource = null;
+        }
+      }, 1000);
+    };
+  },
 };
 
 export default api;
@@ -3,7 +3,7 @@ import { Card, CardContent } from "../components/ui/card";
 import { Button } from "../components/ui/button";
 import { Input } from "../components/ui/input";
 import { ScrollArea } from "../components/ui/scroll-area";
-import { chatAPI, filesAPI } from "../lib/api";
+import { chatAPI, filesAPI, eventsAPI } from "../lib/api";
 import { 
   Send, 
   Mic, 
@@ -112,7 +112,6 @@ export default function AIChatPage() {
   const [recentFileIds, setRecentFileIds] = useState([]); // recently uploaded file IDs for priority search
   const fileInputRef = useRef(null);
   const dragCounter = useRef(0);
-  const pollIntervalRef = useRef(null);
   
   const messagesEndRef = useRef(null);
   const mediaRecorderRef = useRef(null);
@@ -131,44 +130,33 @@ export default function AIChatPage() {
     }]);
   }, []);
 
-  // Poll embedding status for pending files
+  // Track embedding status for pending files
   useEffect(() => {
     const pendingIds = pendingFiles
       .filter(f => f.id && f.embeddingStatus !== "completed" && f.embeddingStatus !== "failed" && f.embeddingStatus !== "skipped" && f.embeddingStatus !== "disabled" && f.uploadStatus !== "error")
       .map(f => f.id);
     
-    if (pendingIds.length === 0) {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
-        pollIntervalRef.current = null;
-      }
-      return;
-    }
+    if (pendingIds.length === 0) return;
 
-    const poll = async () => {
-      try {
-        const res = await filesAPI.batchStatus(pendingIds);
-        const statusMap = {};
-        for (const s of res.data.statuses) {
-          statusMap[s.id] = { embeddingStatus: s.embedding_status, hasText: s.has_text, fileType: s.file_type, embeddingError: s.embedding_error };
+    const applyStatuses = (statuses) => {
+      const statusMap = {};
+      for (const s of statuses) {
+        statusMap[s.id] = { embeddingStatus: s.embedding_status, fileType: s.file_type, embeddingError: s.embedding_error };
+        if (s.has_text !== undefined) statusMap[s.id].hasText = s.has_text;
+      }
+      setPendingFiles(prev => prev.map(f => {
+        if (f.id && statusMap[f.id]) {
+          return { ...f, ...statusMap[f.id] };
         }
-        setPendingFiles(prev => prev.map(f => {
-          if (f.id && statusMap[f.id]) {
-            return { ...f, ...statusMap[f.id] };
-          }
-          return f;
-        }));
-      } catch {}
+        return f;
+      }));
     };
 
-    poll();
-    pollIntervalRef.current = setInterval(poll, 3000);
-    return () => {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
-        pollIntervalRef.current = null;
-      }
-    };
+    // Catch up once, then follow status transitions pushed over the event stream
+    filesAPI.batchStatus(pendingIds).then(res => applyStatuses(res.data.statuses)).catch(() => {});
+    return eventsAPI.subscribe((type, data) => {
+      if (type === "file_status" && pendingIds.includes(data.id)) applyStatuses([data]);
+    });
   }, [pendingFiles.map(f => `${f.id}:${f.embeddingStatus}`).join(",")]);
 
   // Auto-dismiss fully completed files after 5s (but keep failed ones with retry)
@@ -252,29 +240,37 @@ export default function AIChatPage() {
     setInput("");
     setLoading(true);
 
+    // Add the assistant reply on its first token and grow it as tokens stream in
+    let replyStarted = false;
+    let sources = [];
+    const updateReply = (fields) => {
+      const first = !replyStarted;
+      replyStarted = true;
+      setMessages(prev => first
+        ? [...prev, { role: "assistant", content: "", sources: [], ...fields }]
+        : [...prev.slice(0, -1), { ...prev[prev.length - 1], ...fields }]);
+    };
+
     try {
-      const res = await chatAPI.send(text.trim(), sessionId, true, recentFileIds.length > 0 ? recentFileIds : null);
-      const assistantMessage = { 
-        role: "assistant", 
-        content: res.data.response,
-        sources: res.data.sources || []
-      };
-      setMessages(prev => [...prev, assistantMessage]);
-      setSessionId(res.data.session_id);
+      const res = await chatAPI.stream(text.trim(), sessionId, true, recentFileIds.length > 0 ? recentFileIds : null, {
+        onSources: (data) => {
+          sources = data.sources || [];
+          setSessionId(data.session_id);
+        },
+        onToken: (content) => updateReply({ content, sources }),
+      });
 
       // Auto-speak response if enabled
       if (autoSpeak) {
         // Get the index of the new message (current messages + user message + this message)
         const newMsgIdx = messages.length + 1;
-        setTimeout(() => speakText(res.data.response, newMsgIdx), 100);
+        setTimeout(() => speakText(res.text, newMsgIdx), 100);
       }
     } catch (err) {
       console.error("Chat error:", err);
       toast.error("Failed to get response");
-      setMessages(prev => [...prev, { 
-        role: "assistant", 
-        content: "Sorry, I encountered an error. Please try again." 
-      }]);
+      const errorReply = { role: "assistant", content: "Sorry, I encountered an error. Please try again." };
+      setMessages(prev => replyStarted ? [...prev.slice(0, -1), errorReply] : [...prev, errorReply]);
     } finally {
       setLoading(false);
     }
@@ -582,7 +578,7 @@ export default function AIChatPage() {
                 )}
               </div>
             ))}
-            {loading && (
+            {loading && messages[messages.length - 1]?.role !== "assistant" && (
               <div className="flex gap-3 justify-start">
                 <div className="w-8 h-8 rounded-full bg-primary/10 flex items-center justify-center">
                   <Bot className="w-4 h-4 text-primary" />
@@ -8,7 +8,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from ".
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from "../components/ui/dialog";
 import { FileCard } from "../components/FileCard";
 import { ObjectViewer } from "../components/ObjectViewer";
-import { filesAPI } from "../lib/api";
+import { filesAPI, eventsAPI } from "../lib/api";
 import { Loader2, Grid3X3, List, ChevronLeft, ChevronRight, Globe, Lock, Users, Brain, RefreshCw, AlertCircle, CheckCircle2, FileText, ChevronDown, ChevronUp } from "lucide-react";
 import { toast } from "sonner";
 
@@ -40,7 +40,7 @@ export default function LibraryPage({ onNavigate, initialTag }) {
   const [showReindexPanel, setShowReindexPanel] = useState(false);
   const [reindexing, setReindexing] = useState(false);
   const [reindexProgress, setReindexProgress] = useState(null);
-  const reindexIntervalRef = useRef(null);
+  const reindexUnsubscribeRef = useRef(null);
 
   useEffect(() => {
     loadFiles();
@@ -48,10 +48,10 @@ export default function LibraryPage({ onNavigate, initialTag }) {
     loadEmbeddingStatus();
   }, [page, filter, tagFilter, visibility]);
 
-  // Cleanup polling on unmount
+  // Cleanup progress subscription on unmount
   useEffect(() => {
     return () => {
-      if (reindexIntervalRef.current) clearInterval(reindexIntervalRef.current);
+      if (reindexUnsubscribeRef.current) reindexUnsubscribeRef.current();
     };
   }, []);
 
@@ -113,30 +113,32 @@ export default function LibraryPage({ onNavigate, initialTag }) {
       toast.success(`Reindexing ${label} started...`);
       setReindexProgress({ processed: 0, total: res.data.total, status: "running" });
       
-      // Poll for progress
-      reindexIntervalRef.current = setInterval(async () => {
-        try {
-          const prog = await filesAPI.reindexProgress(taskId);
-          setReindexProgress(prog.data);
-          if (prog.data.status === "completed" || prog.data.status === "failed") {
-            clearInterval(reindexIntervalRef.current);
-            reindexIntervalRef.current = null;
-            setReindexing(false);
-            loadEmbeddingStatus();
-            loadEmbeddingStats();
-            if (prog.data.status === "completed") {
-              toast.success(`Reindex complete! ${prog.data.processed}/${prog.data.total} files processed`);
-            } else {
-              toast.error("Reindex failed");
-            }
-            setTimeout(() => setReindexProgress(null), 3000);
+      // Follow progress pushed over the event stream
+      const applyProgress = (prog) => {
+        setReindexProgress(prog);
+        if (prog.status === "completed" || prog.status === "failed") {
+          if (reindexUnsubscribeRef.current) {
+            reindexUnsubscribeRef.current();
+            reindexUnsubscribeRef.current = null;
           }
-        } catch (err) {
-          clearInterval(reindexIntervalRef.current);
-          reindexIntervalRef.current = null;
           setReindexing(false);
+          loadEmbeddingStatus();
+          loadEmbeddingStats();
+          if (prog.status === "completed") {
+            toast.success(`Reindex complete! ${prog.processed}/${prog.total} files processed`);
+          } else {
+            toast.error("Reindex failed");
+          }
+          setTimeout(() => setReindexProgress(null), 3000);
         }
-      }, 1500);
+      };
+      reindexUnsubscribeRef.current = eventsAPI.subscribe((type, data) => {
+        if (type === "reindex" && data.task_id === taskId) applyProgress(data);
+      });
+      // Catch up on anything that happened before the subscription was live
+      filesAPI.reindexProgress(taskId).then((prog) => {
+        if (reindexUnsubscribeRef.current && prog.data.status !== "running") applyProgress(prog.data);
+      }).catch(() => {});
     } catch (err) {
       toast.error("Failed to start reindex");
       setReindexing(false);
@@ -7,7 +7,7 @@ import { ScrollArea } from "../components/ui/scroll-area";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from "../components/ui/dialog";
 import { Checkbox } from "../components/ui/checkbox";
 import { Textarea } from "../components/ui/textarea";
-import { projectsAPI, filesAPI, chatAPI } from "../lib/api";
+import { projectsAPI, filesAPI, chatAPI, eventsAPI } from "../lib/api";
 import {
   FolderPlus,
   FolderOpen,
@@ -206,6 +206,8 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
   const [loadingHistory, setLoadingHistory] = useState(true);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [expandedSources, setExpandedSources] = useState({});
   
   // Voice state
@@ -222,9 +224,9 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
   const [isDragging, setIsDragging] = useState(false);
   const fileInputRef = useRef(null);
   const dragCounter = useRef(0);
-  const pollIntervalRef = useRef(null);
   
   const messagesEndRef = useRef(null);
+  const keepScrollRef = useRef(false);
   const mediaRecorderRef = useRef(null);
   const audioChunksRef = useRef([]);
   const audioRef = useRef(null);
@@ -234,6 +236,10 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
   }, [project.id]);
 
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages]);
 
@@ -242,6 +248,7 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
     try {
       const res = await projectsAPI.getMessages(project.id);
       setMessages(res.data.messages || []);
+      setOlderCursor(res.data.next_cursor || null);
     } catch (err) {
       console.error(err);
     } finally {
@@ -249,44 +256,52 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
     }
   };
 
-  // Poll embedding status for pending files
+  const loadOlderMessages = async () => {
+    if (!olderCursor || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const res = await projectsAPI.getMessages(project.id, { cursor: olderCursor });
+      const older = res.data.messages || [];
+      keepScrollRef.current = true;
+      // Sources panels and playback are tracked by index, so shift them past the prepended page
+      setExpandedSources((prev) => Object.fromEntries(Object.entries(prev).map(([idx, open]) => [Number(idx) + older.length, open])));
+      setPlayingMessageIdx((idx) => (idx === null ? null : idx + older.length));
+      setMessages((prev) => [...older, ...prev]);
+      setOlderCursor(res.data.next_cursor || null);
+    } catch (err) {
+      toast.error("Failed to load earlier messages");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  // Track embedding status for pending files
   useEffect(() => {
     const pendingIds = pendingFiles
       .filter(f => f.id && f.embeddingStatus !== "completed" && f.embeddingStatus !== "failed" && f.embeddingStatus !== "skipped" && f.embeddingStatus !== "disabled" && f.uploadStatus !== "error")
       .map(f => f.id);
     
-    if (pendingIds.length === 0) {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
-        pollIntervalRef.current = null;
-      }
-      return;
-    }
+    if (pendingIds.length === 0) return;
 
-    const poll = async () => {
-      try {
-        const res = await filesAPI.batchStatus(pendingIds);
-        const statusMap = {};
-        for (const s of res.data.statuses) {
-          statusMap[s.id] = { embeddingStatus: s.embedding_status, hasText: s.has_text, fileType: s.file_type, embeddingError: s.embedding_error };
+    const applyStatuses = (statuses) => {
+      const statusMap = {};
+      for (const s of statuses) {
+        statusMap[s.id] = { embeddingStatus: s.embedding_status, fileType: s.file_type, embeddingError: s.embedding_error };
+        if (s.has_text !== undefined) statusMap[s.id].hasText = s.has_text;
+      }
+      setPendingFiles(prev => prev.map(f => {
+        if (f.id && statusMap[f.id]) {
+          return { ...f, ...statusMap[f.id] };
         }
-        setPendingFiles(prev => prev.map(f => {
-          if (f.id && statusMap[f.id]) {
-            return { ...f, ...statusMap[f.id] };
-          }
-          return f;
-        }));
-      } catch {}
+        return f;
+      }));
     };
 
-    poll();
-    pollIntervalRef.current = setInterval(poll, 3000);
-    return () => {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current);
-        pollIntervalRef.current = null;
-      }
-    };
+    // Catch up once, then follow status transitions pushed over the event stream
+    filesAPI.batchStatus(pendingIds).then(res => applyStatuses(res.data.statuses)).catch(() => {});
+    return eventsAPI.subscribe((type, data) => {
+      if (type === "file_status" && pendingIds.includes(data.id)) applyStatuses([data]);
+    });
   }, [pendingFiles.map(f => `${f.id}:${f.embeddingStatus}`).join(",")]);
 
   // Auto-dismiss fully completed files after 5s (but keep failed ones with retry)
@@ -374,18 +389,31 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
     setInput("");
     setLoading(true);
 
+    // Add the assistant reply on its first token and grow it as tokens stream in
+    let replyStarted = false;
+    let sources = [];
+    const updateReply = (fields) => {
+      const first = !replyStarted;
+      replyStarted = true;
+      setMessages((prev) => first
+        ? [...prev, { role: "assistant", content: "", sources: [], ...fields }]
+        : [...prev.slice(0, -1), { ...prev[prev.length - 1], ...fields }]);
+    };
+
     try {
-      const res = await projectsAPI.chat(project.id, text.trim());
-      const assistantMsg = { role: "assistant", content: res.data.response, sources: res.data.sources || [] };
-      setMessages((prev) => [...prev, assistantMsg]);
+      const res = await projectsAPI.chatStream(project.id, text.trim(), {
+        onSources: (data) => { sources = data.sources || []; },
+        onToken: (content) => updateReply({ content, sources }),
+      });
       
       if (autoSpeak) {
         const newIdx = messages.length + 1;
-        setTimeout(() => speakText(res.data.response, newIdx), 100);
+        setTimeout(() => speakText(res.text, newIdx), 100);
       }
     } catch (err) {
       toast.error("Failed to get response");
-      setMessages((prev) => [...prev, { role: "assistant", content: "Sorry, I encountered an error. Please try again.", sources: [] }]);
+      const errorReply = { role: "assistant", content: "Sorry, I encountered an error. Please try again.", sources: [] };
+      setMessages((prev) => replyStarted ? [...prev.slice(0, -1), errorReply] : [...prev, errorReply]);
     } finally {
       setLoading(false);
     }
@@ -551,7 +579,15 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
                 </div>
               </div>
             ) : (
-              messages.map((msg, idx) => (
+              <>
+              {olderCursor && (
+                <div className="flex justify-center">
+                  <Button variant="ghost" size="sm" className="h-7 text-xs" onClick={loadOlderMessages} disabled={loadingOlder} data-testid="load-older-messages">
+                    {loadingOlder && <Loader2 className="w-3 h-3 mr-1 animate-spin" />}Load earlier messages
+                  </Button>
+                </div>
+              )}
+              {messages.map((msg, idx) => (
                 <div key={idx} className={`flex gap-3 ${msg.role === "user" ? "justify-end" : "justify-start"}`}>
                   {msg.role === "assistant" && (
                     <div className="w-8 h-8 rounded-full bg-primary/10 flex items-center justify-center flex-shrink-0">
@@ -582,9 +618,10 @@ function ProjectChatView({ project, onBack, onManageFiles }) {
                     </div>
                   )}
                 </div>
-              ))
+              ))}
+              </>
             )}
-            {loading && (
+            {loading && messages[messages.length - 1]?.role !== "assistant" && (
               <div className="flex gap-3 justify-start">
                 <div className="w-8 h-8 rounded-full bg-primary/10 flex items-center justify-center"><Bot className="w-4 h-4 text-primary" /></div>
                 <div className="bg-muted rounded-lg px-4 py-3"><Loader2 className="w-4 h-4 animate-spin" /></div>
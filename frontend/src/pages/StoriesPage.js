@@ -7,7 +7,8 @@ import { Badge } from "../components/ui/badge";
 import { ScrollArea } from "../components/ui/scroll-area";
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter, DialogDescription } from "../components/ui/dialog";
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from "../components/ui/select";
-import { storiesAPI, filesAPI } from "../lib/api";
+import { Checkbox } from "../components/ui/checkbox";
+import { storiesAPI, filesAPI, eventsAPI } from "../lib/api";
 import { toast } from "sonner";
 import {
   BookOpen,
@@ -43,14 +44,21 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
   const [input, setInput] = useState("");
   const [loading, setLoading] = useState(false);
   const [loadingHistory, setLoadingHistory] = useState(true);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [mode, setMode] = useState("coauthor"); // "coauthor" | "scribe"
   const scrollRef = useRef(null);
+  const keepScrollRef = useRef(false);
 
   useEffect(() => {
     loadMessages();
   }, [chapter?.id]);
 
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     if (scrollRef.current) {
       scrollRef.current.scrollTop = scrollRef.current.scrollHeight;
     }
@@ -69,13 +77,30 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
     try {
       const res = await storiesAPI.getMessages(story.id, chapter?.id);
       setMessages(res.data.messages || []);
+      setOlderCursor(res.data.next_cursor || null);
     } catch {
       setMessages([]);
+      setOlderCursor(null);
     } finally {
       setLoadingHistory(false);
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!olderCursor || loadingOlder) return;
+    setLoadingOlder(true);
+    try {
+      const res = await storiesAPI.getMessages(story.id, chapter?.id, { cursor: olderCursor });
+      keepScrollRef.current = true;
+      setMessages(prev => [...(res.data.messages || []), ...prev]);
+      setOlderCursor(res.data.next_cursor || null);
+    } catch {
+      toast.error("Failed to load earlier messages");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const sendMessage = async () => {
     if (!input.trim() || loading) return;
     const text = input.trim();
@@ -83,16 +108,18 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
     setMessages(prev => [...prev, { role: "user", content: text, id: Date.now() }]);
     setLoading(true);
 
+    // Add the assistant reply on its first token and grow it as tokens stream in
+    const replyId = Date.now() + 1;
+    const updateReply = (content) => setMessages(prev => prev.some(m => m.id === replyId)
+      ? prev.map(m => (m.id === replyId ? { ...m, content } : m))
+      : [...prev, { role: "assistant", content, id: replyId }]);
+
     try {
-      const res = await storiesAPI.chat(story.id, text, mode, chapter?.id);
-      setMessages(prev => [...prev, {
-        role: "assistant",
-        content: res.data.message,
-        id: Date.now() + 1
-      }]);
+      await storiesAPI.chatStream(story.id, text, mode, chapter?.id, { onToken: updateReply });
     } catch (err) {
-      const errorMsg = err.response?.data?.detail || "Chat failed - please try again";
+      const errorMsg = err.detail || "Chat failed - please try again";
       toast.error(errorMsg, { duration: 8000 });
+      setMessages(prev => prev.filter(m => m.id !== replyId));
     } finally {
       setLoading(false);
     }
@@ -154,6 +181,13 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
           </div>
         ) : (
           <div className="space-y-4">
+            {olderCursor && (
+              <div className="flex justify-center">
+                <Button variant="ghost" size="sm" className="h-7 text-xs" onClick={loadOlderMessages} disabled={loadingOlder} data-testid="load-older-messages">
+                  {loadingOlder && <Loader2 className="w-3 h-3 mr-1 animate-spin" />}Load earlier messages
+                </Button>
+              </div>
+            )}
             {messages.map((msg, i) => (
               <div key={msg.id || i} className={`flex gap-2.5 ${msg.role === "user" ? "justify-end" : ""}`}>
                 {msg.role === "assistant" && (
@@ -186,7 +220,7 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
                 )}
               </div>
             ))}
-            {loading && (
+            {loading && messages[messages.length - 1]?.role !== "assistant" && (
               <div className="flex gap-2.5">
                 <div className="w-7 h-7 rounded-full bg-primary/10 flex items-center justify-center">
                   <Loader2 className="w-3.5 h-3.5 text-primary animate-spin" />
@@ -233,7 +267,10 @@ function ChapterChat({ story, chapter, onContentUpdate, importedText, onImported
 }
 
 // ========== Content Block Viewer/Editor ==========
-function ContentBlockView({ block, index, storyId, chapterId, onUpdate, onDelete, isLast }) {
+// The "Exhibit N" text block placed before uploaded media; it is deleted along with the media
+const isExhibitLabel = (block) => block?.type === "text" && /^Exhibit \d+$/.test((block.content || "").trim());
+
+function ContentBlockView({ block, index, labelBlockId, onPatch, isLast }) {
   const [editing, setEditing] = useState(false);
   const [editText, setEditText] = useState(block.content || "");
   const [clickRatio, setClickRatio] = useState(0); // Ratio of where user clicked (0-1)
@@ -257,22 +294,22 @@ function ContentBlockView({ block, index, storyId, chapterId, onUpdate, onDelete
   const saveEdit = async () => {
     if (!editText.trim()) return;
     try {
-      await storiesAPI.updateBlock(storyId, chapterId, index, { ...block, content: editText });
+      await onPatch([{ op: "update", block_id: block.block_id, block: { ...block, content: editText } }]);
       setEditing(false);
-      if (onUpdate) onUpdate();
       toast.success("Changes saved");
-    } catch {
-      toast.error("Failed to save");
+    } catch (err) {
+      if (err.response?.status !== 409) toast.error("Failed to save");
     }
   };
 
   const handleDelete = async () => {
+    const ops = [{ op: "delete", block_id: block.block_id }];
+    if (labelBlockId) ops.push({ op: "delete", block_id: labelBlockId });
     try {
-      await storiesAPI.deleteBlock(storyId, chapterId, index);
-      if (onDelete) onDelete();
+      await onPatch(ops);
       toast.success("Block deleted");
-    } catch {
-      toast.error("Failed to delete block");
+    } catch (err) {
+      if (err.response?.status !== 409) toast.error("Failed to delete block");
     }
   };
 
@@ -433,11 +470,13 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
   const [loadingFiles, setLoadingFiles] = useState(false);
   const mediaInputRef = useRef(null);
   const chapterNameInputRef = useRef(null);
+  const openChapterIdRef = useRef(null);
   
   // Edit title/chapter state
   const [editingStoryTitle, setEditingStoryTitle] = useState(false);
   const [editStoryName, setEditStoryName] = useState("");
   const [editingChapterId, setEditingChapterId] = useState(null);
+  const [dragChapterId, setDragChapterId] = useState(null);
   const [editChapterName, setEditChapterName] = useState("");
   
   // Translation state
@@ -447,6 +486,7 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
   const [translating, setTranslating] = useState(false);
   const [translationStatus, setTranslationStatus] = useState("");
   const [translationProgress, setTranslationProgress] = useState(null);
+  const [updateExisting, setUpdateExisting] = useState(false);
 
   // Audio export state
   const [showAudioDialog, setShowAudioDialog] = useState(false);
@@ -507,16 +547,17 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
   const loadStory = async () => {
     setLoading(true);
     try {
-      const res = await storiesAPI.get(story.id);
+      // Outline only: chapter bodies are fetched when a chapter is opened
+      const res = await storiesAPI.get(story.id, { outline: true });
       setStory(res.data);
       setChapters(res.data.chapters || []);
       // Auto-select first chapter if none selected
       if (!selectedChapter && res.data.chapters?.length > 0) {
-        setSelectedChapter(res.data.chapters[0]);
+        openChapter(res.data.chapters[0]);
       } else if (selectedChapter) {
         // Refresh selected chapter data
         const updated = res.data.chapters?.find(c => c.id === selectedChapter.id);
-        if (updated) setSelectedChapter(updated);
+        if (updated) openChapter(updated);
       }
     } catch {
       toast.error("Failed to load story");
@@ -525,10 +566,42 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
     }
   };
 
+  const openChapter = async (chapter) => {
+    openChapterIdRef.current = chapter.id;
+    // Keep showing the current body while the same chapter refreshes; another chapter
+    // shows a loader until its body arrives
+    setSelectedChapter(prev => (prev?.id === chapter.id ? { ...prev, ...chapter } : chapter));
+    try {
+      const res = await storiesAPI.getChapter(story.id, chapter.id);
+      if (openChapterIdRef.current === chapter.id) setSelectedChapter(res.data);
+    } catch {
+      toast.error("Failed to load chapter");
+      setSelectedChapter(prev => (prev?.id === chapter.id && !prev.content_blocks ? null : prev));
+    }
+  };
+
+  // Block edits go out as id-based ops against the version on screen; a 409 means the
+  // chapter changed elsewhere, so it is reloaded before the user tries again
+  const patchChapterBlocks = async (ops) => {
+    const chapter = selectedChapter;
+    try {
+      const res = await storiesAPI.patchBlocks(story.id, chapter.id, chapter.version, ops);
+      setSelectedChapter(prev => (prev?.id === chapter.id ? { ...prev, version: res.data.version } : prev));
+    } catch (err) {
+      if (err.response?.status === 409) {
+        toast.error("This chapter was changed elsewhere and has been reloaded");
+        loadStory();
+      }
+      throw err;
+    }
+    loadStory();
+  };
+
   const createChapter = async () => {
     try {
       const res = await storiesAPI.createChapter(story.id, { name: newChapterName || undefined });
-      setChapters(prev => [...prev, res.data]);
+      setChapters(prev => [...prev, { ...res.data, ...res.data.stats }]);
+      openChapterIdRef.current = res.data.id;
       setSelectedChapter(res.data);
       setNewChapterName("");
       setShowNewChapter(false);
@@ -538,6 +611,23 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
     }
   };
 
+  // Drop the dragged chapter in place of the one at targetIndex. The list updates at once;
+  // the server only rewrites the moved chapter's order key
+  const dropChapter = async (targetIndex) => {
+    const moving = chapters.find(c => c.id === dragChapterId);
+    setDragChapterId(null);
+    if (!moving || chapters[targetIndex]?.id === moving.id) return;
+    const reordered = chapters.filter(c => c.id !== moving.id);
+    reordered.splice(targetIndex, 0, moving);
+    setChapters(reordered);
+    try {
+      await storiesAPI.moveChapter(story.id, moving.id, reordered[targetIndex - 1]?.id ?? null);
+    } catch {
+      toast.error("Failed to move chapter");
+      loadStory();
+    }
+  };
+
   const deleteChapter = async (chapterId) => {
     try {
       await storiesAPI.deleteChapter(story.id, chapterId);
@@ -683,7 +773,7 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
     
     try {
       // Start translation (returns immediately with task_id)
-      const res = await storiesAPI.translate(story.id, selectedLanguage);
+      const res = await storiesAPI.translate(story.id, selectedLanguage, updateExisting);
       const taskId = res.data.task_id;
       
       setTranslationProgress({
@@ -694,66 +784,58 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
         currentChapterName: "Starting..."
       });
       
-      // Poll for progress with retry on 502 errors
-      const pollProgress = async (retryCount = 0) => {
-        try {
-          const progressRes = await storiesAPI.getTranslationProgress(taskId);
-          const progress = progressRes.data;
-          
-          setTranslationProgress({
-            totalChapters: progress.total_chapters,
-            totalBlocks: progress.total_blocks,
-            currentChapter: progress.current_chapter,
-            blocksTranslated: progress.blocks_translated,
-            currentChapterName: progress.current_chapter_name
-          });
-          
-          if (progress.status === "completed") {
-            setTranslationStatus("Translation complete!");
-            toast.success(`Story translated to ${selectedLanguage}!`);
-            // Reset all state
-            setSelectedLanguage("");
-            setTranslationStatus("");
-            setTranslationProgress(null);
-            setTranslating(false);
-            // Close dialog after a brief delay to ensure state is updated
-            setTimeout(() => {
-              setShowTranslateDialog(false);
-              // Navigate to the new translated story
-              if (onTranslateSuccess && progress.new_story_id) {
-                onTranslateSuccess(progress.new_story_id);
-              }
-            }, 500);
-          } else if (progress.status === "failed") {
-            // Make error message more user-friendly
-            let errorMsg = progress.error || "Translation failed";
-            if (errorMsg.includes("Budget has been exceeded") || errorMsg.includes("budget_exceeded")) {
-              errorMsg = "API budget exceeded. Please add more credits to your Universal Key in Profile → Universal Key → Add Balance";
+      // Follow progress pushed over the event stream
+      let finished = false;
+      const applyProgress = (progress) => {
+        if (finished) return;
+        setTranslationProgress({
+          totalChapters: progress.total_chapters,
+          totalBlocks: progress.total_blocks,
+          currentChapter: progress.current_chapter,
+          blocksTranslated: progress.blocks_translated,
+          currentChapterName: progress.current_chapter_name
+        });
+        
+        if (progress.status === "completed") {
+          finished = true;
+          unsubscribe();
+          setTranslationStatus("Translation complete!");
+          toast.success(`Story translated to ${selectedLanguage}!`);
+          // Reset all state
+          setSelectedLanguage("");
+          setTranslationStatus("");
+          setTranslationProgress(null);
+          setTranslating(false);
+          // Close dialog after a brief delay to ensure state is updated
+          setTimeout(() => {
+            setShowTranslateDialog(false);
+            // Navigate to the new translated story
+            if (onTranslateSuccess && progress.new_story_id) {
+              onTranslateSuccess(progress.new_story_id);
             }
-            toast.error(errorMsg, { duration: 8000 });
-            setTranslationStatus("");
-            setTranslationProgress(null);
-            setTranslating(false);
-          } else {
-            // Still running, poll again (reset retry count on success)
-            setTimeout(() => pollProgress(0), 2000);
-          }
-        } catch (err) {
-          // Silently retry on 502 errors (proxy timeout) - this is normal during heavy processing
-          if (err.response?.status === 502 && retryCount < 180) {
-            // Keep retrying silently for up to ~6 minutes of 502 errors
-            setTimeout(() => pollProgress(retryCount + 1), 2000);
-            return;
+          }, 500);
+        } else if (progress.status === "failed") {
+          finished = true;
+          unsubscribe();
+          // Make error message more user-friendly
+          let errorMsg = progress.error || "Translation failed";
+          if (errorMsg.includes("Budget has been exceeded") || errorMsg.includes("budget_exceeded")) {
+            errorMsg = "API budget exceeded. Please add more credits to your Universal Key in Profile → Universal Key → Add Balance";
           }
-          // Only show error after many consecutive failures or for non-502 errors
-          console.error("Progress poll error:", err);
-          // Don't show error toast - just keep the dialog open for user to retry or close
-          // The translation might still complete in the background
+          toast.error(errorMsg, { duration: 8000 });
+          setTranslationStatus("");
+          setTranslationProgress(null);
+          setTranslating(false);
         }
       };
+      const unsubscribe = eventsAPI.subscribe((type, data) => {
+        if (type === "translation" && data.task_id === taskId) applyProgress(data);
+      });
       
-      // Start polling after a short delay
-      setTimeout(pollProgress, 1000);
+      // Catch up on anything that happened before the subscription was live
+      storiesAPI.getTranslationProgress(taskId)
+        .then((progressRes) => applyProgress(progressRes.data))
+        .catch((err) => console.error("Progress fetch error:", err));
       
     } catch (err) {
       console.error("Translation error:", err);
@@ -788,70 +870,59 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
         currentChapterName: "Starting..."
       });
       
-      // Poll for progress with retry on 502
-      const pollProgress = async (retryCount = 0) => {
-        try {
-          const progressRes = await storiesAPI.getAudioProgress(taskId);
-          const progress = progressRes.data;
+      // Follow progress pushed over the event stream
+      let finished = false;
+      const applyProgress = (progress) => {
+        if (finished) return;
+        setAudioProgress({
+          totalChapters: progress.total_chapters,
+          totalCharacters: progress.total_characters,
+          currentChapter: progress.current_chapter,
+          charactersProcessed: progress.characters_processed,
+          currentChapterName: progress.current_chapter_name
+        });
+        
+        if (progress.status === "completed" && progress.has_audio) {
+          finished = true;
+          unsubscribe();
+          // Download the audio
+          const token = localStorage.getItem("archiva_token");
+          const downloadUrl = storiesAPI.getAudioDownloadUrl(taskId, token);
           
-          // Reset retry count on success
-          setAudioProgress({
-            totalChapters: progress.total_chapters,
-            totalCharacters: progress.total_characters,
-            currentChapter: progress.current_chapter,
-            charactersProcessed: progress.characters_processed,
-            currentChapterName: progress.current_chapter_name
-          });
+          // Trigger download
+          const a = document.createElement("a");
+          a.href = downloadUrl;
+          a.download = `${story.name}_${selectedVoice}.mp3`;
+          document.body.appendChild(a);
+          a.click();
+          document.body.removeChild(a);
           
-          if (progress.status === "completed" && progress.has_audio) {
-            // Download the audio
-            const token = localStorage.getItem("archiva_token");
-            const downloadUrl = storiesAPI.getAudioDownloadUrl(taskId, token);
-            
-            // Trigger download
-            const a = document.createElement("a");
-            a.href = downloadUrl;
-            a.download = `${story.name}_${selectedVoice}.mp3`;
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
-            
-            toast.success("Audio exported successfully! Check your downloads.", { duration: 10000 });
-            setShowAudioDialog(false);
-            setAudioProgress(null);
-            setAudioTaskId(null);
-            setExporting(false);
-          } else if (progress.status === "failed") {
-            let errorMsg = progress.error || "Audio export failed";
-            if (errorMsg.includes("Budget has been exceeded") || errorMsg.includes("budget_exceeded")) {
-              errorMsg = "API budget exceeded. Please add more credits to your Universal Key.";
-            }
-            toast.error(errorMsg, { duration: 10000 });
-            setAudioProgress(null);
-            setAudioTaskId(null);
-            setExporting(false);
-          } else {
-            // Still running, poll again
-            setTimeout(() => pollProgress(0), 2000);
-          }
-        } catch (err) {
-          // Silently retry on 502 errors (proxy timeout) - this is normal during heavy processing
-          if (err.response?.status === 502 && retryCount < 60) {
-            // Don't log every retry, just keep trying quietly for up to ~2 minutes
-            setTimeout(() => pollProgress(retryCount + 1), 2000);
-            return;
+          toast.success("Audio exported successfully! Check your downloads.", { duration: 10000 });
+          setShowAudioDialog(false);
+          setAudioProgress(null);
+          setAudioTaskId(null);
+          setExporting(false);
+        } else if (progress.status === "failed") {
+          finished = true;
+          unsubscribe();
+          let errorMsg = progress.error || "Audio export failed";
+          if (errorMsg.includes("Budget has been exceeded") || errorMsg.includes("budget_exceeded")) {
+            errorMsg = "API budget exceeded. Please add more credits to your Universal Key.";
           }
-          // Only show error after many retries or for non-502 errors
-          console.error("Audio progress poll error:", err);
-          const errorMsg = err.response?.data?.detail || err.message || "Audio export polling failed";
-          toast.error(`Audio export error: ${errorMsg}`, { duration: 10000 });
+          toast.error(errorMsg, { duration: 10000 });
           setAudioProgress(null);
           setAudioTaskId(null);
           setExporting(false);
         }
       };
+      const unsubscribe = eventsAPI.subscribe((type, data) => {
+        if (type === "audio_export" && data.task_id === taskId) applyProgress(data);
+      });
       
-      setTimeout(pollProgress, 1000);
+      // Catch up on anything that happened before the subscription was live
+      storiesAPI.getAudioProgress(taskId)
+        .then((progressRes) => applyProgress(progressRes.data))
+        .catch((err) => console.error("Audio progress fetch error:", err));
       
     } catch (err) {
       console.error("Audio export error:", err);
@@ -1004,10 +1075,15 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
                         ? "bg-primary/10 text-primary font-medium"
                         : "hover:bg-muted text-muted-foreground hover:text-foreground"
                     }`}
-                    onClick={() => setSelectedChapter(ch)}
+                    onClick={() => openChapter(ch)}
+                    draggable={editingChapterId !== ch.id}
+                    onDragStart={() => setDragChapterId(ch.id)}
+                    onDragOver={(e) => dragChapterId && e.preventDefault()}
+                    onDrop={(e) => { e.preventDefault(); dropChapter(i); }}
+                    onDragEnd={() => setDragChapterId(null)}
                     data-testid={`chapter-item-${i}`}
                   >
-                    <GripVertical className="w-3 h-3 opacity-30" />
+                    <GripVertical className="w-3 h-3 opacity-30 cursor-grab" />
                     {editingChapterId === ch.id ? (
                       <input
                         ref={chapterNameInputRef}
@@ -1038,7 +1114,7 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
                       </span>
                     )}
                     <span className="text-[10px] opacity-40">
-                      {(ch.content_blocks || []).length}
+                      {ch.block_count || 0}
                     </span>
                     <Button
                       variant="ghost"
@@ -1134,46 +1210,50 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
               </Button>
             </div>
 
-            {/* Split: Content Preview + Chat */}
-            <div className="flex-1 flex overflow-hidden">
-              {/* Content Preview */}
-              <div className="w-2/5 border-r border-border overflow-auto p-4" data-testid="chapter-content-preview">
-                {(selectedChapter.content_blocks || []).length === 0 ? (
-                  <div className="text-center py-10 text-muted-foreground">
-                    <FileText className="w-8 h-8 mx-auto mb-2 opacity-30" />
-                    <p className="text-sm">No content yet</p>
-                    <p className="text-xs mt-1">Use the chat to compose, or import content from files</p>
-                  </div>
-                ) : (
-                  <div className="space-y-1">
-                    {(selectedChapter.content_blocks || []).map((block, i) => (
-                      <ContentBlockView
-                        key={i}
-                        block={block}
-                        index={i}
-                        storyId={story.id}
-                        chapterId={selectedChapter.id}
-                        onUpdate={loadStory}
-                        onDelete={loadStory}
-                        isLast={i === (selectedChapter.content_blocks || []).length - 1}
-                      />
-                    ))}
-                  </div>
-                )}
+            {/* Split: Content Preview + Chat; outline entries carry no body, so wait for it */}
+            {!selectedChapter.content_blocks ? (
+              <div className="flex-1 flex items-center justify-center" data-testid="chapter-loading">
+                <Loader2 className="w-5 h-5 animate-spin text-muted-foreground" />
               </div>
+            ) : (
+              <div className="flex-1 flex overflow-hidden">
+                {/* Content Preview */}
+                <div className="w-2/5 border-r border-border overflow-auto p-4" data-testid="chapter-content-preview">
+                  {(selectedChapter.content_blocks || []).length === 0 ? (
+                    <div className="text-center py-10 text-muted-foreground">
+                      <FileText className="w-8 h-8 mx-auto mb-2 opacity-30" />
+                      <p className="text-sm">No content yet</p>
+                      <p className="text-xs mt-1">Use the chat to compose, or import content from files</p>
+                    </div>
+                  ) : (
+                    <div className="space-y-1">
+                      {(selectedChapter.content_blocks || []).map((block, i, blocks) => (
+                        <ContentBlockView
+                          key={block.block_id || i}
+                          block={block}
+                          index={i}
+                          labelBlockId={block.type !== "text" && isExhibitLabel(blocks[i - 1]) ? blocks[i - 1].block_id : null}
+                          onPatch={patchChapterBlocks}
+                          isLast={i === blocks.length - 1}
+                        />
+                      ))}
+                    </div>
+                  )}
+                </div>
 
-              {/* Chat */}
-              <div className="flex-1 flex flex-col" data-testid="chapter-chat">
-                <ChapterChat 
-                  story={story} 
-                  chapter={selectedChapter} 
-                  onContentUpdate={loadStory}
-                  importedText={importedText}
-                  onImportedTextUsed={() => setImportedText("")}
-                  onImportClick={openImportDialog}
-                />
+                {/* Chat */}
+                <div className="flex-1 flex flex-col" data-testid="chapter-chat">
+                  <ChapterChat 
+                    story={story} 
+                    chapter={selectedChapter} 
+                    onContentUpdate={loadStory}
+                    importedText={importedText}
+                    onImportedTextUsed={() => setImportedText("")}
+                    onImportClick={openImportDialog}
+                  />
+                </div>
               </div>
-            </div>
+            )}
           </div>
         ) : (
           <div className="flex-1 flex items-center justify-center text-muted-foreground">
@@ -1312,12 +1392,20 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
                   </SelectContent>
                 </Select>
               </div>
+              <label className="flex items-center gap-2 text-sm cursor-pointer">
+                <Checkbox
+                  checked={updateExisting}
+                  onCheckedChange={(checked) => setUpdateExisting(checked === true)}
+                  data-testid="translate-update-existing"
+                />
+                Update my existing translation, re-translating only changed text
+              </label>
               <div className="bg-muted/50 rounded-lg p-3 text-xs text-muted-foreground space-y-1">
                 <p><strong>What will be translated:</strong></p>
                 <ul className="list-disc list-inside space-y-0.5">
                   <li>Story title and description</li>
                   <li>All chapter names</li>
-                  <li>All text content blocks ({chapters.reduce((acc, ch) => acc + (ch.content_blocks || []).filter(b => b.type === 'text').length, 0)} total)</li>
+                  <li>All text content blocks ({chapters.reduce((acc, ch) => acc + (ch.text_block_count || 0), 0)} total)</li>
                 </ul>
                 <p className="mt-2">Media files (images, audio, video) will be kept as-is.</p>
               </div>
@@ -1443,7 +1531,7 @@ function StoryDetailView({ story: initialStory, onBack, onTranslateSuccess }) {
                 <p><strong>What will be converted:</strong></p>
                 <ul className="list-disc list-inside space-y-0.5">
                   <li>All {chapters.length} chapter{chapters.length !== 1 ? 's' : ''}</li>
-                  <li>{chapters.reduce((acc, ch) => acc + (ch.content_blocks || []).filter(b => b.type === 'text').reduce((a, b) => a + (b.content?.length || 0), 0), 0).toLocaleString()} characters of text</li>
+                  <li>{chapters.reduce((acc, ch) => acc + (ch.char_count || 0), 0).toLocaleString()} characters of text</li>
                 </ul>
                 <p className="mt-2">Images, videos, and existing audio will be skipped.</p>
               </div>
@@ -1535,7 +1623,7 @@ export default function StoriesPage() {
       // First refresh the stories list
       await loadStories();
       // Then load and navigate to the new story
-      const res = await storiesAPI.get(newStoryId);
+      const res = await storiesAPI.get(newStoryId, { outline: true });
       setSelectedStory(res.data);
       toast.success("Navigated to translated story");
     } catch {